@@ -1,21 +1,18 @@
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 import os
 from dotenv import load_dotenv
+from core.log import get_logger
 
 # Load environment variables
 load_dotenv()
 
-# Try to initialize Composio integration
-has_composio = False
-
 # Check if required API keys are present in environment
-from dotenv import load_dotenv
-import os
-load_dotenv()
-
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 composio_api_key = os.getenv("COMPOSIO_API_KEY")
 
@@ -24,38 +21,53 @@ if not gemini_api_key:
 if not composio_api_key:
     raise ValueError("COMPOSIO_API_KEY not set. This is required. Please set it in the .env file.")
 
-try:
-    from composio_gemini import Action, ComposioToolSet, App
-    from composio_integration.client import ComposioClient
-    
-    # Initialize Composio client - this will raise an error if keys are missing
-    composio_client = ComposioClient()
-    
-    # Import Composio routes
-    from routes.composio import router as composio_router
-    has_composio = True
-    print("Composio client and routes loaded successfully")
-        
-except ImportError as e:
-    has_composio = False
-    print(f"ERROR: Composio integration not available due to ImportError: {e}")
-    print("Please ensure all dependencies are installed: pip install -r requirements.txt")
-    raise # Re-raise the exception to prevent the app from starting in a broken state
-except Exception as e:
-    has_composio = False
-    print(f"ERROR: Composio initialization failed: {e}")
-    raise # Re-raise the exception
+# Composio itself is imported and initialized lazily (see composio_integration/provider.py);
+# only check here that the package is installed so a broken install still fails fast.
+if importlib.util.find_spec("composio_gemini") is None:
+    get_logger("http").error("composio_unavailable", reason="composio_gemini is not installed",
+                             hint="pip install -r requirements.txt")
+    raise ImportError("No module named 'composio_gemini'")
+
+from composio_integration.http_client import composio_http
+from composio_integration.provider import reset_composio_client, warm_up_async
+from routes.composio import router as composio_router
+has_composio = True
 
 # Import other routes
-from routes.websocket import router as websocket_router
+from routes.websocket import router as websocket_router, codec_executor, session_pool, tool_executor
+from routes.metrics import router as metrics_router
+from core.session_store import session_store
+
+log = get_logger("http")
+
+# "background" creates the Composio client right after startup without delaying it;
+# "lazy" waits for the first request that needs it.
+COMPOSIO_WARM_UP = os.getenv("COMPOSIO_WARM_UP", "background").lower()
+
+# Application lifespan: open shared clients on startup, release them on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    composio_http.open()
+    warm_up_task = None
+    if COMPOSIO_WARM_UP == "background":
+        warm_up_task = asyncio.create_task(warm_up_async())
+    yield
+    if warm_up_task:
+        warm_up_task.cancel()
+    await session_pool.close()
+    tool_executor.shutdown()
+    codec_executor.shutdown(wait=False)
+    await composio_http.close()
+    await session_store.close()
+    reset_composio_client()
 
 # Create FastAPI app
-app = FastAPI(title="Gemini Multimodal API")
+app = FastAPI(title="Gemini Multimodal API", lifespan=lifespan)
 
 # Middleware to log all request paths
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    print(f"Incoming request: {request.method} {request.url.path}")
+    log.debug("http_request", category="http", method=request.method, path=request.url.path)
     response = await call_next(request)
     return response
 
@@ -71,10 +83,11 @@ app.add_middleware(
 
 # Include routers
 app.include_router(websocket_router)
+app.include_router(metrics_router)
 if has_composio:
     app.include_router(composio_router)
 else:
-    print("Composio routes not loaded - some features will be disabled")
+    log.warning("composio_routes_disabled")
 
 # Mount frontend static files
 app.mount("/static", StaticFiles(directory="../frontend"), name="static")
@@ -0,0 +1,99 @@
+"""
+Microbenchmark: linear Action enum scan vs. the prebuilt ActionIndex.
+
+Usage (from backend/):
+    python -m benchmarks.bench_action_index [--apps gmail,github] [--repeat 20]
+
+Uses composio_gemini's real Action/App enums when installed, otherwise a
+synthetic enum of comparable size.
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+from composio_integration.action_index import ActionIndex
+
+
+def synthetic_enums(app_count: int = 250, actions_per_app: int = 40):
+    """Build App/Action stand-ins shaped like composio_gemini's enums."""
+    apps = SimpleNamespace()
+    actions = SimpleNamespace()
+    for a in range(app_count):
+        app_name = f"APP{a}"
+        setattr(apps, app_name, app_name.lower())
+        for n in range(actions_per_app):
+            setattr(actions, f"{app_name}_ACTION_{n}", SimpleNamespace(app=app_name.lower()))
+    # Give the benchmark the same app names the real enum would have
+    setattr(apps, "GMAIL", "gmail")
+    setattr(apps, "GITHUB", "github")
+    for n in range(actions_per_app):
+        setattr(actions, f"GMAIL_ACTION_{n}", SimpleNamespace(app="gmail"))
+        setattr(actions, f"GITHUB_ACTION_{n}", SimpleNamespace(app="github"))
+    return actions, apps
+
+
+def load_enums():
+    try:
+        from composio_gemini import Action, App
+        return Action, App, "composio_gemini"
+    except ImportError:
+        actions, apps = synthetic_enums()
+        return actions, apps, "synthetic"
+
+
+def scan(action_enum, app_enum, app_names):
+    """The lookup get_tools used to perform on every call."""
+    apps_enum = [getattr(app_enum, name.upper()) for name in app_names if hasattr(app_enum, name.upper())]
+    found = []
+    for action_name in dir(action_enum):
+        if not action_name.startswith('__'):
+            action = getattr(action_enum, action_name)
+            if hasattr(action, 'app') and action.app in apps_enum:
+                found.append(action)
+    return found
+
+
+def indexed(index, app_names):
+    found = []
+    for name in app_names:
+        app = index.app(name)
+        if app is not None:
+            found.extend(index.actions_for(app))
+    return found
+
+
+def timeit(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apps", default="gmail,github")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    app_names = [name for name in args.apps.split(",") if name]
+
+    action_enum, app_enum, source = load_enums()
+    print(f"Enums: {source}, {len(dir(action_enum))} Action attributes")
+
+    index = ActionIndex(action_enum, app_enum)
+    build_start = time.perf_counter()
+    index.apps()
+    build_time = time.perf_counter() - build_start
+
+    scan_time, scanned = timeit(lambda: scan(action_enum, app_enum, app_names), args.repeat)
+    index_time, found = timeit(lambda: indexed(index, app_names), args.repeat)
+
+    print(f"Index build (once):   {build_time * 1000:9.3f} ms")
+    print(f"Linear scan per call: {scan_time * 1000:9.3f} ms  ({len(scanned)} actions)")
+    print(f"Index per call:       {index_time * 1000:9.3f} ms  ({len(found)} actions)")
+    if index_time:
+        print(f"Speedup:              {scan_time / index_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Microbenchmark: relaying one Gemini audio part to the browser.
+
+Compares the per-message CPU time and egress size of
+    decode + re-encode   parse the Gemini message, build {"type": "audio"} and serialize it
+    JSON passthrough     match_audio_only() + audio_message(), no JSON round trip
+    binary frame         match_audio_only() + audio_frame(), base64-decoded PCM
+    mulaw / opus         match_audio_only() + the negotiated downstream codec
+                         (opus only when opuslib and libopus are installed)
+
+Usage (from backend/):
+    python -m benchmarks.bench_audio_passthrough [--chunk-bytes 7680] [--repeat 5000]
+"""
+
+import argparse
+import base64
+import json
+import os
+import time
+
+from core import serialization
+from gemini.codecs import DownstreamEncoder, available_codecs, create_encoder
+from gemini.passthrough import audio_frame, audio_message, match_audio_only
+
+
+def gemini_audio_message(chunk_bytes: int) -> bytes:
+    pcm = os.urandom(chunk_bytes)
+    return json.dumps({"serverContent": {"modelTurn": {"parts": [{
+        "inlineData": {"mimeType": "audio/pcm;rate=24000", "data": base64.b64encode(pcm).decode("ascii")}
+    }]}}}).encode("utf-8")
+
+
+def decode_reencode(raw):
+    response = serialization.loads(raw)
+    data = response["serverContent"]["modelTurn"]["parts"][0]["inlineData"]["data"]
+    return serialization.dumps({"type": "audio", "data": data})
+
+
+def json_passthrough(raw):
+    return audio_message(match_audio_only(raw).data)
+
+
+def binary_frame(raw):
+    audio = match_audio_only(raw)
+    return audio_frame(audio.data, audio.sample_rate)
+
+
+def codec_frame(codec):
+    # Called directly rather than through the worker pool, to time the encoding itself
+    stage = DownstreamEncoder(create_encoder(codec), executor=None)
+
+    def encode(raw):
+        return stage._encode(match_audio_only(raw).data) or b""
+    return encode
+
+
+def per_op_us(func, raw, repeat: int) -> float:
+    func(raw)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(raw)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-bytes", type=int, default=7680, help="PCM bytes per Gemini audio part (160 ms at 24 kHz)")
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    raw = gemini_audio_message(args.chunk_bytes)
+    print(f"Gemini message: {len(raw)} bytes, JSON backend: {serialization.backend}")
+
+    paths = [("decode + re-encode", decode_reencode), ("JSON passthrough", json_passthrough), ("binary frame", binary_frame)]
+    paths += [(codec, codec_frame(codec)) for codec in available_codecs()]
+
+    baseline = None
+    for name, func in paths:
+        us = per_op_us(func, raw, args.repeat)
+        size = len(func(raw))
+        baseline = baseline or (us, size)
+        print(f"  {name:<20} {us:7.1f} us/msg  {size:6d} bytes to browser  "
+              f"(cpu {us / baseline[0]:.2f}x, egress {size / baseline[1]:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
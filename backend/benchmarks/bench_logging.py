@@ -0,0 +1,91 @@
+"""
+Microbenchmark: per-message logging cost on the relay's hot paths.
+
+Compares what the relay used to do - print() of every HTTP request, every
+Gemini text part and full tool payloads, written synchronously - with
+core/log.py at the default INFO level (hot-path events are DEBUG and
+return immediately), at DEBUG with sampling, and at DEBUG with every event
+kept (records are formatted and written on the listener thread).
+
+stdout is redirected to /dev/null while timing, so the numbers are the
+cost paid by the caller, not by the terminal.
+
+Usage (from backend/):
+    python -m benchmarks.bench_logging [--repeat 20000]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import time
+
+from core import log as relay_log
+
+
+def payloads():
+    tool_result = {"data": {"messages": [{"id": str(i), "snippet": "x" * 200} for i in range(50)]}, "successful": True}
+    text = "Sure, here is the summary of your inbox for today. " * 4
+    return tool_result, text
+
+
+def per_op_us(func, repeat: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def measure_print(repeat, tool_result, text):
+    return {
+        "http request": per_op_us(lambda: print(f"Incoming request: GET /api/composio/connections"), repeat),
+        "gemini text part": per_op_us(lambda: print("Gemini text part:", text), repeat),
+        "tool result": per_op_us(lambda: print(f"ComposioClient: Action 'GMAIL_FETCH_EMAILS' execution result: {tool_result}"), repeat // 10),
+    }
+
+
+def measure_logger(repeat, tool_result, text):
+    log = relay_log.get_logger("bench")
+    return {
+        "http request": per_op_us(lambda: log.debug("http_request", category="http", method="GET", path="/api/composio/connections"), repeat),
+        "gemini text part": per_op_us(lambda: log.debug("gemini_text_part", category="gemini.part", client_id="c1", text=text), repeat),
+        "tool result": per_op_us(lambda: log.debug("action_executed", category="composio.result", tool="GMAIL_FETCH_EMAILS", result=tool_result), repeat // 10),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+    tool_result, text = payloads()
+
+    results = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results.append(("print", measure_print(args.repeat, tool_result, text)))
+
+        relay_log.configure_logging()
+        # Point the listener at /dev/null too
+        for handler in relay_log._listener.handlers:
+            handler.setStream(devnull)
+        root = logging.getLogger("relay")
+
+        root.setLevel(logging.INFO)
+        results.append(("relay log, INFO", measure_logger(args.repeat, tool_result, text)))
+
+        root.setLevel(logging.DEBUG)
+        relay_log.sampler.rates.update({"http": 0.01, "gemini.part": 0.1, "composio.result": 0.1})
+        results.append(("relay log, DEBUG sampled", measure_logger(args.repeat, tool_result, text)))
+
+        relay_log.sampler.rates.clear()
+        results.append(("relay log, DEBUG all", measure_logger(args.repeat, tool_result, text)))
+        relay_log.shutdown_logging()
+
+    for name, timings in results:
+        print(f"\n{name}")
+        for kind, us in timings.items():
+            print(f"  {kind:<17} {us:9.2f} us/event")
+
+
+if __name__ == "__main__":
+    main()
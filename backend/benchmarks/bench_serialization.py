@@ -0,0 +1,115 @@
+"""
+Microbenchmark: JSON encode/decode cost of relay traffic, stdlib json vs. orjson.
+
+Times the serialization work the relay does for each message kind, on
+payloads shaped like real traffic, and converts it into CPU time per
+session-second at typical message rates:
+
+    upstream audio   realtime_input media chunk, 4096 bytes of PCM (coalesced)
+    upstream image   realtime_input media chunk, ~45 KB JPEG
+    downstream audio Gemini serverContent with a 24 kHz PCM inlineData part,
+                     decoded from Gemini and re-encoded for the browser
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--repeat 2000] [--audio-rate 25]
+"""
+
+import argparse
+import base64
+import json
+import os
+import time
+
+from core import serialization
+
+
+def random_b64(size: int) -> str:
+    return base64.b64encode(os.urandom(size)).decode("ascii")
+
+
+def payloads(gemini_chunk_bytes: int):
+    upstream_audio = {"realtime_input": {"media_chunks": [{"data": random_b64(4096), "mime_type": "audio/pcm"}]}}
+    upstream_image = {"realtime_input": {"media_chunks": [{"data": random_b64(45_000), "mime_type": "image/jpeg"}]}}
+    gemini_audio = json.dumps({"serverContent": {"modelTurn": {"parts": [{
+        "inlineData": {"mimeType": "audio/pcm;rate=24000", "data": random_b64(gemini_chunk_bytes)}
+    }]}}})
+    return upstream_audio, upstream_image, gemini_audio
+
+
+def stdlib_backend():
+    # What the relay did before: json.dumps defaults for Gemini,
+    # Starlette's send_json settings for the browser
+    def dumps(obj):
+        return json.dumps(obj)
+
+    def dumps_browser(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    return "json", dumps, dumps_browser, json.loads
+
+
+def relay_backend():
+    return f"serialization ({serialization.backend})", serialization.dumps, serialization.dumps, serialization.loads
+
+
+def per_op_us(func, repeat: int) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def measure(backend, upstream_audio, upstream_image, gemini_audio, repeat):
+    name, dumps, dumps_browser, loads = backend
+
+    def downstream_audio():
+        message = loads(gemini_audio)
+        data = message["serverContent"]["modelTurn"]["parts"][0]["inlineData"]["data"]
+        dumps_browser({"type": "audio", "data": data})
+
+    return name, {
+        "upstream audio": per_op_us(lambda: dumps(upstream_audio), repeat),
+        "upstream image": per_op_us(lambda: dumps(upstream_image), max(1, repeat // 10)),
+        "downstream audio": per_op_us(downstream_audio, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--gemini-chunk-bytes", type=int, default=7680, help="PCM bytes per Gemini audio part (160 ms at 24 kHz)")
+    parser.add_argument("--upstream-audio-rate", type=float, default=8.0, help="coalesced mic messages per second")
+    parser.add_argument("--image-rate", type=float, default=1.0, help="video frames per second")
+    parser.add_argument("--audio-rate", type=float, default=6.25, help="Gemini audio parts per second while speaking")
+    args = parser.parse_args()
+
+    upstream_audio, upstream_image, gemini_audio = payloads(args.gemini_chunk_bytes)
+    rates = {
+        "upstream audio": args.upstream_audio_rate,
+        "upstream image": args.image_rate,
+        "downstream audio": args.audio_rate,
+    }
+
+    results = [measure(stdlib_backend(), upstream_audio, upstream_image, gemini_audio, args.repeat)]
+    if serialization.backend != "json":
+        results.append(measure(relay_backend(), upstream_audio, upstream_image, gemini_audio, args.repeat))
+    else:
+        print("orjson is not installed; only the stdlib backend is measured")
+
+    for name, timings in results:
+        print(f"\n{name}")
+        per_session = 0.0
+        for kind, us in timings.items():
+            per_session += us * rates[kind]
+            print(f"  {kind:<17} {us:9.1f} us/msg")
+        print(f"  CPU per session   {per_session / 1000:9.3f} ms/s at the configured rates")
+
+    if len(results) == 2:
+        base = sum(us * rates[kind] for kind, us in results[0][1].items())
+        fast = sum(us * rates[kind] for kind, us in results[1][1].items())
+        print(f"\nserialization CPU per session reduced by {(1 - fast / base) * 100:.0f}% ({base / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
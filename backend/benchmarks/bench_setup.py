@@ -0,0 +1,148 @@
+"""
+Benchmark: size and cost of the Gemini 'setup' message, before and after
+compaction and caching (gemini/setup.py).
+
+Builds a config carrying Composio-style tool schemas (long descriptions,
+per-property titles and examples, some declarations listed twice), then
+reports:
+
+    setup size      bytes sent per connection, full vs compacted
+    build cost      building and serializing per connection vs a cached lookup;
+                    the fingerprint is hashed once per session, not per connect
+    connect         open + setup + ack against an in-process mock Gemini,
+                    which parses the setup like the real endpoint must
+
+plus the upload time of each payload at --uplink-mbps, which dominates on
+real networks.
+
+Usage (from backend/):
+    python -m benchmarks.bench_setup [--tools 200] [--repeat 200] [--connects 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from types import SimpleNamespace
+
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+
+from benchmarks.mock_gemini import MockGemini
+from core import serialization
+from gemini import setup as gemini_setup
+
+LOREM = (
+    "Fetches messages from the user's mailbox matching the given query. Supports Gmail search "
+    "operators such as from:, to:, subject:, has:attachment and date ranges. "
+)
+
+
+def composio_tools(count: int, duplicates: int):
+    """Tool entries shaped like Composio's Gemini tool schemas."""
+    declarations = []
+    for index in range(count):
+        properties = {}
+        for param in range(8):
+            properties[f"param_{param}"] = {
+                "type": "string",
+                "title": f"Param {param}",
+                "description": LOREM * 3,
+                "examples": [f"example value {n}" for n in range(3)],
+                "default": None if param % 2 else "",
+            }
+        declarations.append({
+            "name": f"APP_ACTION_{index}",
+            "description": LOREM * 12,
+            "parameters": {
+                "type": "object",
+                "title": f"Action{index}Request",
+                "properties": properties,
+                "required": ["param_0"]
+            }
+        })
+    # Browsers that merge tool lists from several requests repeat declarations
+    return [{"function_declarations": declarations}, {"function_declarations": declarations[:duplicates]}]
+
+
+def config_with_tools(args):
+    return {
+        "modelId": "gemini-2.0-flash-exp",
+        "currentMode": "audio",
+        "systemPrompt": "You are a helpful assistant.",
+        "tools": composio_tools(args.tools, args.duplicates),
+        "toolUsage": True,
+        "structuredOutput": {"enabled": True, "schema": '{"type": "object", "properties": {"answer": {"type": "string"}}}'},
+    }
+
+
+def time_per_call(func, repeat):
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started_at) / repeat
+
+
+async def connect_latency(uri, payload, connects):
+    samples = []
+    for _ in range(connects):
+        started_at = time.perf_counter()
+        async with connect(uri, max_size=None) as ws:
+            await ws.send(payload)
+            await ws.recv()
+        samples.append(time.perf_counter() - started_at)
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tools", type=int, default=200, help="function declarations in the config")
+    parser.add_argument("--duplicates", type=int, default=40, help="declarations listed a second time")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--connects", type=int, default=50)
+    parser.add_argument("--uplink-mbps", type=float, default=10.0)
+    args = parser.parse_args()
+
+    config = config_with_tools(args)
+    model = "gemini-2.0-flash-exp"
+
+    full = serialization.dumps(gemini_setup.build_setup(config, model, compact=False))
+    compact, _ = gemini_setup.setup_payload(config, model)
+
+    build_full = time_per_call(lambda: serialization.dumps(gemini_setup.build_setup(config, model, compact=False)), args.repeat)
+    build_compact = time_per_call(lambda: serialization.dumps(gemini_setup.build_setup(config, model)), args.repeat)
+    fingerprint = gemini_setup.setup_fingerprint(config)
+    hashing = time_per_call(lambda: gemini_setup.setup_fingerprint(config), args.repeat)
+    cached = time_per_call(lambda: gemini_setup.setup_payload(config, model, fingerprint), args.repeat)
+
+    print(f"tools: {args.tools} declarations (+{args.duplicates} repeated), json backend: {serialization.backend}")
+    print(f"setup size       full {len(full) / 1024:8.1f} KB   compacted {len(compact) / 1024:8.1f} KB"
+          f"   ({100 * (1 - len(compact) / len(full)):.0f}% smaller)")
+    print(f"per connect      build full {build_full * 1e3:6.2f} ms   build compacted {build_compact * 1e3:6.2f} ms"
+          f"   cached {cached * 1e3:6.3f} ms")
+    print(f"per session      fingerprint {hashing * 1e3:6.2f} ms")
+    bits = 8 / (args.uplink_mbps * 1e6)
+    print(f"upload @{args.uplink_mbps:g}Mbit  full {len(full) * bits * 1e3:6.1f} ms   compacted {len(compact) * bits * 1e3:6.1f} ms")
+
+    mock = MockGemini(SimpleNamespace(chunk_ms=40, setup_delay_ms=0, drop_after=0))
+    async with serve(mock.handle, "127.0.0.1", 0, max_size=None) as server:
+        port = server.sockets[0].getsockname()[1]
+        uri = f"ws://127.0.0.1:{port}/ws"
+        # Old path: build and serialize on every connect
+        old = []
+        for _ in range(args.connects):
+            started_at = time.perf_counter()
+            payload = serialization.dumps(gemini_setup.build_setup(config, model, compact=False))
+            old.append(time.perf_counter() - started_at + (await connect_latency(uri, payload, 1))[0])
+        new = []
+        for _ in range(args.connects):
+            started_at = time.perf_counter()
+            payload, _ = gemini_setup.setup_payload(config, model, fingerprint)
+            new.append(time.perf_counter() - started_at + (await connect_latency(uri, payload, 1))[0])
+
+    print(f"local connect    full+build p50 {statistics.median(old) * 1e3:6.2f} ms"
+          f"   compacted+cached p50 {statistics.median(new) * 1e3:6.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Cold-start benchmark for the backend.
+
+Each run starts a fresh interpreter and measures:
+  - import: time until `import app` returns (the app object is ready to serve)
+  - composio: time to create the shared ComposioClient afterwards, i.e. the
+    work the lifespan warm-up (or the first Composio request) pays
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup [--runs 5]
+
+Requires the backend dependencies and GEMINI_API_KEY / COMPOSIO_API_KEY
+(dummy values are used if unset; Composio client creation may then fail,
+which is reported but does not affect the import timing).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+result = {"import": imported - start}
+try:
+    from composio_integration.provider import get_composio_client
+    get_composio_client()
+    result["composio"] = time.perf_counter() - imported
+except Exception as e:
+    result["composio_error"] = str(e)
+print("BENCH " + json.dumps(result))
+"""
+
+
+def run_once(env):
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=backend_dir, env=env, capture_output=True, text=True
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH "):
+            return json.loads(line[len("BENCH "):])
+    raise RuntimeError(f"Probe failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+
+
+def summarize(label, values):
+    if not values:
+        return
+    values_ms = [v * 1000 for v in values]
+    print(f"{label:<10} median {statistics.median(values_ms):8.1f} ms   "
+          f"min {min(values_ms):8.1f} ms   max {max(values_ms):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "benchmark")
+    env.setdefault("COMPOSIO_API_KEY", "benchmark")
+
+    results = [run_once(env) for _ in range(args.runs)]
+    summarize("import", [r["import"] for r in results])
+    summarize("composio", [r["composio"] for r in results if "composio" in r])
+    errors = {r["composio_error"] for r in results if "composio_error" in r}
+    for error in errors:
+        print(f"Composio client creation failed: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: upstream audio saved by the microphone VAD (gemini/vad.py).
+
+Synthesizes a call where the user speaks in short bursts (voiced harmonics
+around 150 Hz with a syllable envelope) and the rest is low room noise,
+feeds it through VoiceActivityGate in browser-sized chunks, and reports per
+mode:
+
+    forwarded   share of the PCM bytes still sent to Gemini
+    speech kept share of the speech frames that were forwarded
+    cost        microseconds of VAD work per microphone chunk
+
+Usage (from backend/):
+    python -m benchmarks.bench_vad [--seconds 120] [--speech 0.3] [--chunk-ms 40]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from gemini.vad import INPUT_SAMPLE_RATE, VoiceActivityGate
+
+
+def synthetic_call(seconds: float, speech_share: float, noise_db: float, seed: int = 7):
+    """
+    PCM16 audio of a call and a per-sample mask of where speech was placed.
+
+    Speech comes in bursts of 0.8-3 s separated by pauses sized so that
+    about speech_share of the call is speech.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * INPUT_SAMPLE_RATE)
+    noise = rng.normal(0.0, 10 ** (noise_db / 20), total)
+    signal = np.zeros(total)
+    mask = np.zeros(total, dtype=bool)
+
+    position = int(rng.uniform(0.5, 2.0) * INPUT_SAMPLE_RATE)
+    while position < total:
+        burst = int(rng.uniform(0.8, 3.0) * INPUT_SAMPLE_RATE)
+        end = min(total, position + burst)
+        t = np.arange(end - position) / INPUT_SAMPLE_RATE
+        pitch = 150 * (1 + 0.1 * np.sin(2 * np.pi * 0.7 * t))
+        phase = 2 * np.pi * np.cumsum(pitch) / INPUT_SAMPLE_RATE
+        voiced = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 12))
+        envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 3 * t))
+        signal[position:end] = 0.15 * envelope * voiced
+        mask[position:end] = True
+        pause = burst * (1 - speech_share) / speech_share
+        position = end + int(pause * rng.uniform(0.5, 1.5))
+
+    pcm = np.clip((signal + noise) * 32767, -32768, 32767).astype("<i2")
+    return pcm.tobytes(), mask
+
+
+def run(mode: str, pcm: bytes, mask, chunk_bytes: int, spectral: bool):
+    gate = VoiceActivityGate(mode, spectral=spectral)
+    forwarded = 0
+    chunks = 0
+    started_at = time.perf_counter()
+    for start in range(0, len(pcm), chunk_bytes):
+        for event, value in gate.process(pcm[start:start + chunk_bytes], now=start / 2 / INPUT_SAMPLE_RATE):
+            if event == "audio":
+                forwarded += len(value)
+        chunks += 1
+    elapsed = time.perf_counter() - started_at
+
+    # Speech frames forwarded: replay the decisions frame by frame
+    gate = VoiceActivityGate(mode, spectral=spectral)
+    frame_bytes = gate.frame_samples * 2
+    speech_frames = speech_kept = 0
+    for offset in range(0, len(pcm) - frame_bytes + 1, frame_bytes):
+        before = gate.forwarded
+        gate.process(pcm[offset:offset + frame_bytes], now=offset / 2 / INPUT_SAMPLE_RATE)
+        if mask[offset // 2:(offset + frame_bytes) // 2].mean() > 0.5:
+            speech_frames += 1
+            # A frame held in pre-roll counts once the onset releases it
+            speech_kept += gate.forwarded > before
+    return forwarded / len(pcm), speech_kept / max(1, speech_frames), elapsed / chunks, gate.utterances
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--speech", type=float, default=0.3, help="share of the call that is speech")
+    parser.add_argument("--noise-db", type=float, default=-60.0, help="room noise level, dBFS")
+    parser.add_argument("--chunk-ms", type=int, default=40, help="microphone chunk size")
+    parser.add_argument("--spectral", action="store_true", help="also run the speech-band check")
+    args = parser.parse_args()
+
+    pcm, mask = synthetic_call(args.seconds, args.speech, args.noise_db)
+    chunk_bytes = INPUT_SAMPLE_RATE * 2 * args.chunk_ms // 1000
+    print(f"call: {args.seconds:g}s, {100 * mask.mean():.0f}% speech, noise {args.noise_db:g} dBFS, "
+          f"{args.chunk_ms} ms chunks, spectral={args.spectral}")
+    print("mode    forwarded   speech kept   utterances   cost/chunk")
+    print("off       100.0%        100.0%            -       0.0 us")
+    for mode in ("thin", "gate"):
+        share, kept, cost, utterances = run(mode, pcm, mask, chunk_bytes, args.spectral)
+        print(f"{mode:<6} {100 * share:8.1f}%     {100 * kept:8.1f}%   {utterances:10d}   {cost * 1e6:7.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Client simulator for load testing the /ws/{client_id} relay.
+
+Opens N concurrent browser-like sessions. Each session sends its config,
+streams 16 kHz PCM16 microphone frames (binary frames, 512 samples every
+32 ms) and periodically sends a text turn. With benchmarks/mock_gemini.py
+behind the relay, every text turn is echoed back immediately, so the time
+from sending "ping:<n>" to receiving "echo:ping:<n>" is the relay round
+trip (browser -> relay -> Gemini -> relay -> browser).
+
+Usage (from backend/), with the mock and the relay running:
+    python -m benchmarks.mock_gemini --port 9100 &
+    GEMINI_WS_URI=ws://127.0.0.1:9100/ws python app.py &
+    python -m benchmarks.load_test --sessions 50 --duration 30 --relay-pid <pid of app.py>
+
+Reports p50/p99 round-trip latency, message rates and the relay's RSS
+(read from /proc when --relay-pid is given).
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import struct
+import time
+import uuid
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from gemini.frames import FRAME_AUDIO_PCM16, build_frame
+
+MIC_SAMPLE_RATE = 16000
+MIC_CHUNK_SAMPLES = 512
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.received = 0
+        self.audio_received = 0
+        self.sent = 0
+        self.errors = 0
+        self.connected = 0
+
+
+def read_rss_mb(pid: int) -> float:
+    """Resident set size of a process in MB, via /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_session(args, stats: Stats, deadline: float):
+    url = f"{args.url.rstrip('/')}/ws/{uuid.uuid4()}"
+    config = {"systemPrompt": "Load test", "voice": "Puck", "currentMode": "audio", "toolUsage": False,
+              "binaryAudio": args.binary_audio}
+    pending = {}
+    frame = build_frame(FRAME_AUDIO_PCM16, struct.pack(f"<{MIC_CHUNK_SAMPLES}h", *([0] * MIC_CHUNK_SAMPLES)), MIC_SAMPLE_RATE)
+
+    try:
+        async with connect(url, max_size=None) as ws:
+            await ws.send(json.dumps({"type": "config", "config": config}))
+            stats.connected += 1
+
+            async def reader():
+                async for raw in ws:
+                    stats.received += 1
+                    if isinstance(raw, bytes):
+                        stats.audio_received += 1
+                        continue
+                    message = json.loads(raw)
+                    if message.get("type") == "audio":
+                        stats.audio_received += 1
+                    elif message.get("type") == "text":
+                        sent_at = pending.pop(message.get("text", "").removeprefix("echo:"), None)
+                        if sent_at is not None:
+                            stats.latencies.append(time.perf_counter() - sent_at)
+
+            async def writer():
+                seq = 0
+                next_ping = time.monotonic() + args.ping_interval
+                chunk_interval = MIC_CHUNK_SAMPLES / MIC_SAMPLE_RATE
+                while time.monotonic() < deadline:
+                    await ws.send(frame)
+                    stats.sent += 1
+                    if time.monotonic() >= next_ping:
+                        seq += 1
+                        text = f"ping:{seq}"
+                        pending[text] = time.perf_counter()
+                        await ws.send(json.dumps({"type": "text", "data": text}))
+                        stats.sent += 1
+                        next_ping += args.ping_interval
+                    await asyncio.sleep(chunk_interval)
+
+            read_task = asyncio.create_task(reader())
+            try:
+                await writer()
+            finally:
+                read_task.cancel()
+    except (ConnectionClosed, OSError) as e:
+        stats.errors += 1
+        if args.verbose:
+            print(f"session error: {e}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://127.0.0.1:8000")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to stream per session")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which sessions are opened")
+    parser.add_argument("--ping-interval", type=float, default=2.0, help="seconds between text turns per session")
+    parser.add_argument("--binary-audio", action="store_true", help="ask for model audio as binary PCM frames")
+    parser.add_argument("--relay-pid", type=int, help="pid of the relay process, for RSS reporting")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    stats = Stats()
+    rss_samples = []
+    start = time.monotonic()
+    deadline = start + args.ramp + args.duration
+
+    async def ramp_and_run(index):
+        await asyncio.sleep(args.ramp * index / max(1, args.sessions))
+        await run_session(args, stats, deadline)
+
+    async def sample_rss():
+        while True:
+            rss_samples.append(read_rss_mb(args.relay_pid))
+            await asyncio.sleep(1.0)
+
+    sampler = asyncio.create_task(sample_rss()) if args.relay_pid else None
+    await asyncio.gather(*(ramp_and_run(i) for i in range(args.sessions)))
+    if sampler:
+        sampler.cancel()
+    elapsed = time.monotonic() - start
+
+    latencies_ms = [latency * 1000 for latency in stats.latencies]
+    print(f"sessions: {args.sessions} (connected {stats.connected}, errors {stats.errors}) over {elapsed:.1f}s")
+    print(f"round trip: n={len(latencies_ms)} p50={percentile(latencies_ms, 50):.1f} ms "
+          f"p99={percentile(latencies_ms, 99):.1f} ms "
+          f"mean={statistics.fmean(latencies_ms) if latencies_ms else float('nan'):.1f} ms")
+    print(f"messages: sent {stats.sent / elapsed:.1f}/s, received {stats.received / elapsed:.1f}/s "
+          f"(audio {stats.audio_received / elapsed:.1f}/s)")
+    if rss_samples:
+        print(f"relay RSS: start {rss_samples[0]:.1f} MB, peak {max(rss_samples):.1f} MB, end {rss_samples[-1]:.1f} MB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,161 @@
+"""
+Local stand-in for the Gemini Live BidiGenerateContent WebSocket.
+
+Acks the 'setup' message, then answers every client_content turn with a
+synthetic model turn: an immediate text part echoing the user's text (so
+the load tester can measure relay round trips), a stream of 24 kHz PCM
+audio parts at a configurable rate, an optional functionCall, and
+turnComplete. realtime_input media is accepted and counted, and so are
+history turns replayed with turn_complete=false (no answer is sent).
+--drop-after closes every socket after that many seconds with code 1011,
+to exercise the relay's reconnect path.
+
+Usage (from backend/):
+    python -m benchmarks.mock_gemini --port 9100 --audio-chunks 25 --audio-rate 25
+
+Point the relay at it with:
+    GEMINI_WS_URI=ws://127.0.0.1:9100/ws python app.py
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import struct
+import time
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+OUTPUT_SAMPLE_RATE = 24000
+
+
+def synthetic_pcm(duration_ms: int, frequency: float = 440.0) -> str:
+    """Base64 PCM16 sine tone, shaped like a Gemini audio part."""
+    samples = int(OUTPUT_SAMPLE_RATE * duration_ms / 1000)
+    pcm = struct.pack(
+        f"<{samples}h",
+        *(int(8000 * math.sin(2 * math.pi * frequency * i / OUTPUT_SAMPLE_RATE)) for i in range(samples))
+    )
+    return base64.b64encode(pcm).decode("ascii")
+
+
+class MockGemini:
+    def __init__(self, args):
+        self.args = args
+        self.audio_part = synthetic_pcm(args.chunk_ms)
+        self.sessions = 0
+        self.turns = 0
+        self.media_chunks = 0
+        self.sent = 0
+        self.replayed_turns = 0
+        self.dropped = 0
+
+    async def handle(self, ws):
+        active = False
+        try:
+            setup = json.loads(await ws.recv())
+            if "setup" not in setup:
+                await ws.close(code=1008, reason="First message must be setup")
+                return
+            if self.args.setup_delay_ms:
+                await asyncio.sleep(self.args.setup_delay_ms / 1000)
+            await ws.send(json.dumps({"setupComplete": {}}))
+            self.sessions += 1
+            active = True
+            if self.args.drop_after:
+                asyncio.create_task(self.drop_later(ws))
+
+            turn_count = 0
+            async for raw in ws:
+                message = json.loads(raw)
+                if "realtime_input" in message:
+                    self.media_chunks += len(message["realtime_input"].get("media_chunks", []))
+                elif "client_content" in message and not message["client_content"].get("turn_complete", True):
+                    self.replayed_turns += len(message["client_content"].get("turns", []))
+                elif "client_content" in message:
+                    turn_count += 1
+                    self.turns += 1
+                    await self.model_turn(ws, message["client_content"], turn_count)
+        except ConnectionClosed:
+            pass
+        finally:
+            if active:
+                self.sessions -= 1
+
+    async def model_turn(self, ws, client_content, turn_count):
+        user_text = ""
+        for turn in client_content.get("turns", []):
+            for part in turn.get("parts", []):
+                if "text" in part:
+                    user_text = part["text"]
+                elif "functionResponse" in part:
+                    # Tool results end the turn without further output
+                    await self.send(ws, {"serverContent": {"turnComplete": True}})
+                    return
+
+        # Echo first so round-trip latency can be measured by the client
+        await self.send(ws, {"serverContent": {"modelTurn": {"parts": [{"text": f"echo:{user_text}"}]}}})
+
+        interval = 1.0 / self.args.audio_rate if self.args.audio_rate > 0 else 0
+        for _ in range(self.args.audio_chunks):
+            await self.send(ws, {"serverContent": {"modelTurn": {"parts": [{
+                "inlineData": {"mimeType": f"audio/pcm;rate={OUTPUT_SAMPLE_RATE}", "data": self.audio_part}
+            }]}}})
+            if interval:
+                await asyncio.sleep(interval)
+
+        if self.args.function_call_every and turn_count % self.args.function_call_every == 0:
+            await self.send(ws, {"serverContent": {"modelTurn": {"parts": [{
+                "functionCall": {"name": self.args.function_name, "args": {"turn": turn_count}}
+            }]}}})
+
+        await self.send(ws, {"serverContent": {"turnComplete": True}})
+
+    async def drop_later(self, ws):
+        await asyncio.sleep(self.args.drop_after)
+        self.dropped += 1
+        await ws.close(code=1011, reason="Simulated upstream reset")
+
+    async def send(self, ws, message):
+        await ws.send(json.dumps(message))
+        self.sent += 1
+
+    async def report(self):
+        last_sent, last_time = 0, time.monotonic()
+        while True:
+            await asyncio.sleep(self.args.report_interval)
+            now = time.monotonic()
+            rate = (self.sent - last_sent) / (now - last_time)
+            last_sent, last_time = self.sent, now
+            print(f"mock: sessions={self.sessions} turns={self.turns} "
+                  f"media_chunks_in={self.media_chunks} msgs_out/s={rate:.1f} "
+                  f"dropped={self.dropped} replayed_turns={self.replayed_turns}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--audio-chunks", type=int, default=25, help="audio parts per model turn")
+    parser.add_argument("--audio-rate", type=float, default=25.0, help="audio parts per second (0 = as fast as possible)")
+    parser.add_argument("--chunk-ms", type=int, default=40, help="duration of each audio part")
+    parser.add_argument("--function-call-every", type=int, default=0, help="emit a functionCall every N turns (0 = never)")
+    parser.add_argument("--function-name", default="GMAIL_FETCH_EMAILS")
+    parser.add_argument("--setup-delay-ms", type=int, default=0, help="simulated setup round-trip delay")
+    parser.add_argument("--drop-after", type=float, default=0, help="close each socket after this many seconds (0 = never)")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    mock = MockGemini(args)
+    async with serve(mock.handle, args.host, args.port, max_size=None):
+        print(f"Mock Gemini Live listening on ws://{args.host}:{args.port}/ws")
+        await mock.report()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
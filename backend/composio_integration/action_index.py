@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from core.log import get_logger
+
+log = get_logger("composio.actions")
+
+
+def app_key(app: Any) -> str:
+    """
+    Case-folded key for an app, whether given as a name string or an App member.
+
+    Args:
+        app: App name (e.g. "gmail", "GMAIL") or App enum member
+
+    Returns:
+        Normalized app key
+    """
+    if isinstance(app, str):
+        return app.casefold()
+    return str(getattr(app, "slug", None) or getattr(app, "name", None) or app).casefold()
+
+
+class ActionIndex:
+    """
+    Lookup tables over the Composio App and Action enums.
+
+    Scanning dir(Action) touches thousands of members; the index does that
+    scan once, on first use, and afterwards resolves an app name to its App
+    member and an app to its actions in O(1).
+    """
+
+    def __init__(self, action_enum: Any, app_enum: Any, retry_interval: float = 30.0):
+        """
+        Args:
+            action_enum: The Composio Action enum (or a compatible stand-in)
+            app_enum: The Composio App enum (or a compatible stand-in)
+            retry_interval: Seconds an empty scan is served before scanning again
+        """
+        self._action_enum = action_enum
+        self._app_enum = app_enum
+        self.retry_interval = retry_interval
+        self._apps: Optional[Dict[str, Any]] = None
+        self._actions: Optional[Dict[str, List[Any]]] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def app(self, name: str) -> Optional[Any]:
+        """
+        Resolve an app name case-insensitively.
+
+        Args:
+            name: App name, e.g. "gmail"
+
+        Returns:
+            The App member, or None if there is no such app
+        """
+        self._ensure_built()
+        return self._apps.get(app_key(name))
+
+    def actions_for(self, app: Any) -> List[Any]:
+        """
+        All actions belonging to an app.
+
+        Args:
+            app: App name or App member
+
+        Returns:
+            List of Action members (empty if the app has none)
+        """
+        self._ensure_built()
+        return list(self._actions.get(app_key(app), []))
+
+    def apps(self) -> List[str]:
+        """Normalized names of every known app."""
+        self._ensure_built()
+        return sorted(self._apps)
+
+    def _ensure_built(self) -> None:
+        # An empty index means the enums could not be loaded (e.g. composio's
+        # local cache was unavailable). It is served as is for retry_interval
+        # seconds, so lookups do not each pay for a full scan, then rebuilt.
+        if self._fresh():
+            return
+        with self._lock:
+            if not self._fresh():
+                self._build()
+
+    def _fresh(self) -> bool:
+        if self._actions is None:
+            return False
+        return bool(self._actions) or time.monotonic() - self._built_at < self.retry_interval
+
+    def _build(self) -> None:
+        apps = {}
+        for app in self._members(self._app_enum):
+            apps[app_key(app)] = app
+
+        actions: Dict[str, List[Any]] = {}
+        for action in self._members(self._action_enum):
+            try:
+                if hasattr(action, 'app'):
+                    actions.setdefault(app_key(action.app), []).append(action)
+            except Exception as e:
+                log.warning("action_index_entry_failed", action=action, error=e)
+
+        self._apps = apps
+        self._actions = actions
+        self._built_at = time.monotonic()
+        if actions:
+            log.info("action_index_built", actions=sum(len(a) for a in actions.values()), apps=len(actions))
+        else:
+            log.warning("action_index_empty", retry_seconds=self.retry_interval)
+
+    @staticmethod
+    def _members(enum: Any) -> List[Any]:
+        """
+        Every member of a Composio enum.
+
+        composio's enums load members lazily from a local cache and expose
+        them through all(); plain attribute scanning is the fallback for
+        enums (or versions) without it.
+        """
+        all_members = getattr(enum, "all", None)
+        if callable(all_members):
+            try:
+                return list(all_members())
+            except Exception as e:
+                log.warning("action_enum_all_failed", enum=getattr(enum, "__name__", enum), error=e)
+
+        members = []
+        for member_name in dir(enum):
+            if member_name.startswith('_'):
+                continue
+            try:
+                member = getattr(enum, member_name)
+            except Exception as e:
+                log.warning("action_index_member_failed", member=member_name, error=e)
+                continue
+            if not callable(member):
+                members.append(member)
+        return members
+
+
+_default_index: Optional[ActionIndex] = None
+
+
+def get_action_index() -> ActionIndex:
+    """
+    The process-wide index over composio_gemini's Action and App enums.
+
+    Created on first call; the enums themselves are only scanned on the
+    first lookup.
+    """
+    global _default_index
+    if _default_index is None:
+        from composio_gemini import Action, App
+        _default_index = ActionIndex(Action, App, float(os.getenv("COMPOSIO_ACTION_INDEX_RETRY", 30)))
+    return _default_index
@@ -0,0 +1,116 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from cachetools import TTLCache
+
+
+def normalize_apps(apps: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """
+    Canonical cache key for a set of app names: lower-cased, de-duplicated, sorted.
+
+    Args:
+        apps: App names as sent by the client (e.g. ["Gmail", "github"])
+
+    Returns:
+        Tuple of normalized app names
+    """
+    return tuple(sorted({app.strip().lower() for app in apps or [] if app and app.strip()}))
+
+
+class _Flight:
+    """A load in progress that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ToolSchemaCache:
+    """
+    Process-wide TTL cache for Composio tool schemas.
+
+    Entries expire after ttl seconds and can be dropped explicitly with
+    invalidate(), e.g. when a connection is added or removed. Concurrent
+    misses for the same key are collapsed into a single load: the first
+    caller fetches, the others block until it finishes and share its
+    result (or its exception). Failed loads are never cached.
+    """
+
+    def __init__(self, ttl: float = 300.0, maxsize: int = 64):
+        """
+        Args:
+            ttl: Seconds an entry stays valid
+            maxsize: Maximum number of cached app sets
+        """
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, loading it at most once concurrently.
+
+        Args:
+            key: Cache key (see normalize_apps)
+            loader: Callable producing the value on a miss
+
+        Returns:
+            Cached or freshly loaded value
+
+        Raises:
+            Exception: Whatever loader raised
+        """
+        with self._lock:
+            try:
+                value = self._cache[key]
+                self.hits += 1
+                return value
+            except KeyError:
+                pass
+
+            self.misses += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                generation = self._generation
+
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = loader()
+            with self._lock:
+                # Don't resurrect data loaded before an invalidation
+                if generation == self._generation:
+                    self._cache[key] = flight.result
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+# Shared by every ComposioClient in the process
+tool_schema_cache = ToolSchemaCache(ttl=float(os.environ.get("COMPOSIO_TOOLS_CACHE_TTL", 300)))
@@ -1,10 +1,18 @@
 import os
 import json
 import uuid
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any
 # Removed google.genai imports as self.client is no longer used
-from composio_gemini import Action, ComposioToolSet, App
-import requests
+from composio_gemini import ComposioToolSet
+import httpx
+from composio_integration.action_index import get_action_index
+from composio_integration.cache import normalize_apps, tool_schema_cache
+from composio_integration.result_cache import tool_result_cache
+from composio_integration.tool_selection import invalidate_selections
+from composio_integration.http_client import composio_http
+from core.log import get_logger
+
+log = get_logger("composio")
 
 class ComposioClient:
     """
@@ -23,10 +31,12 @@ class ComposioClient:
         
         # Initialize Composio toolset
         self.toolset = ComposioToolSet(api_key=self.api_key)
-        print("Composio toolset initialized successfully")
+        # Connections are made for, and tools run as, Composio's default entity
+        self.entity_id = "default"
+        log.info("composio_toolset_initialized")
         # Removed diagnostic print for dir(self.toolset)
         
-    def get_tools(self, apps: List[str] = None) -> List[Dict[str, Any]]:
+    def get_tools(self, apps: List[str] = None, raise_errors: bool = False) -> List[Dict[str, Any]]:
         """
         Get available tools for specified apps.
         Fetches ALL actions for the specified apps, not just default important ones.
@@ -34,51 +44,72 @@ class ComposioClient:
         Args:
             apps: List of app names to get tools for (e.g., ["gmail", "github"])
                   If None, returns tools for all connected apps.
+            raise_errors: Re-raise Composio errors instead of returning an
+                  empty list, for callers that must not mistake an outage
+                  for "no tools"
 
         Returns:
             List of tool definitions in Gemini-compatible format.
+            Results are cached per app set (see composio_integration/cache.py).
         """
-        try:
-            # Convert string app names to App enum values
-            apps_enum = []
-            if apps:
-                for app_name in apps:
-                    app_name_upper = app_name.upper()
-                    if hasattr(App, app_name_upper):
-                        apps_enum.append(getattr(App, app_name_upper))
-                    else:
-                        print(f"Warning: App enum member for '{app_name}' not found.")
-
-            if not apps_enum:
-                print("No valid apps specified or found. Returning no tools.")
-                return []
+        app_key = normalize_apps(apps)
+        if not app_key:
+            log.debug("no_apps_for_tools")
+            return []
 
-            # Get ALL actions for the specified apps
-            all_relevant_actions = []
-            # Iterate through all possible actions in the Action enum
-            for action_name in dir(Action):
-                if not action_name.startswith('__'): # Skip built-in attributes
-                    try:
-                        action_enum_member = getattr(Action, action_name)
-                        # Check if this action belongs to one of the connected apps
-                        if hasattr(action_enum_member, 'app') and action_enum_member.app in apps_enum:
-                             all_relevant_actions.append(action_enum_member)
-                    except Exception as e:
-                        print(f"Error processing Action {action_name}: {e}")
-                        # Continue to next action
-
-            print(f"Fetching {len(all_relevant_actions)} relevant actions for apps: {[app.name for app in apps_enum]}")
-
-            # Fetch tool definitions for ALL relevant actions
-            # Using actions=[...] should bypass the default 'important' filtering
-            tools = self.toolset.get_tools(actions=all_relevant_actions)
-
-            print(f"Successfully fetched {len(tools)} tool definitions.")
-            return tools
+        try:
+            # Tool schemas are shared process-wide; concurrent misses load once
+            return tool_schema_cache.get_or_load(app_key, lambda: self._fetch_tools(app_key))
         except Exception as e:
-            print(f"Error getting tools: {e}")
+            log.error("get_tools_failed", apps=list(app_key), error=e)
+            if raise_errors:
+                raise
             return []
-    
+
+    def _fetch_tools(self, apps: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch tool definitions for the given apps from Composio, bypassing the cache.
+
+        Args:
+            apps: List of app names
+
+        Returns:
+            List of tool definitions in Gemini-compatible format.
+        """
+        index = get_action_index()
+
+        # Convert string app names to App enum values
+        apps_enum = []
+        for app_name in apps:
+            app_enum_member = index.app(app_name)
+            if app_enum_member is not None:
+                apps_enum.append(app_enum_member)
+            else:
+                log.warning("app_not_found", app=app_name)
+
+        if not apps_enum:
+            log.debug("no_apps_for_tools", apps=list(apps))
+            return []
+
+        # Get ALL actions for the specified apps from the prebuilt index
+        all_relevant_actions = []
+        for app_enum_member in apps_enum:
+            all_relevant_actions.extend(index.actions_for(app_enum_member))
+
+        # Fetch tool definitions for ALL relevant actions
+        # Using actions=[...] should bypass the default 'important' filtering
+        tools = self.toolset.get_tools(actions=all_relevant_actions)
+
+        log.info("tools_fetched", apps=[app.name for app in apps_enum], actions=len(all_relevant_actions), tools=len(tools))
+        return tools
+
+    def invalidate_tools_cache(self) -> None:
+        """Drop cached tool schemas, selections and results, e.g. after a connection is added or deleted."""
+        tool_schema_cache.invalidate()
+        invalidate_selections()
+        # Reads may now hit a different account, in every session
+        tool_result_cache.invalidate()
+
     def execute_tool(self, tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Execute a Composio tool with the given parameters
@@ -96,16 +127,15 @@ class ComposioClient:
             # The actual method name and signature should be verified against the composio-gemini library.
             # Changed from 'execute' to 'execute_action' based on dir() output.
             # Assuming 'props' is the correct parameter name for the arguments.
-            print(f"ComposioClient: Executing action '{tool_name}' with props: {params}")
             execution_result = self.toolset.execute_action(action_name=tool_name, props=params)
             
             # The result from self.toolset.execute_action should ideally be a dictionary (JSON response).
             # If it's a string, it might need parsing or further processing depending on the library's behavior.
             # Assuming it returns a dictionary or a type that can be directly returned.
-            print(f"ComposioClient: Action '{tool_name}' execution result: {execution_result}")
+            log.debug("action_executed", category="composio.result", tool=tool_name, result=execution_result)
             return execution_result
         except Exception as e:
-            print(f"Error executing action {tool_name} with props {params}: {e}")
+            log.error("action_failed", tool=tool_name, params=params, error=e)
             # Return a structured error message
             return {"error": str(e), "tool_name": tool_name, "details": "Failed during direct execution via ComposioToolSet"}
     
@@ -121,27 +151,11 @@ class ComposioClient:
             A dictionary containing "url" (the OAuth URL) and "state" (the generated state string)
         """
         try:
-            print(f"ComposioClient: Attempting get_oauth_url for app: {app_name}") # Moved to very top of try
             state = f"{app_name}_{uuid.uuid4().hex}"
             
-            print(f"ComposioClient: Generated state: {state} for app: {app_name}")
-            print(f"ComposioClient: Available App enums: {dir(App)}") # Log available App members
-
-            app_enum_member = None
             app_name_upper = app_name.upper()
-            
-            if hasattr(App, app_name_upper):
-                app_enum_member = getattr(App, app_name_upper)
-                print(f"ComposioClient: Found App enum member: {app_enum_member} for {app_name_upper}")
-            else:
-                print(f"ComposioClient: App enum member for '{app_name_upper}' not found directly. Available: {[member for member in dir(App) if not member.startswith('__')]}")
-                # Attempt a case-insensitive match as a fallback, though exact match is preferred
-                for member_name in dir(App):
-                    if not member_name.startswith('__') and member_name.upper() == app_name_upper:
-                        app_enum_member = getattr(App, member_name)
-                        print(f"ComposioClient: Found App enum member (case-insensitive): {app_enum_member} for {app_name_upper} as {member_name}")
-                        break
-            
+            # Case-insensitive lookup via the prebuilt App index
+            app_enum_member = get_action_index().app(app_name)
             if not app_enum_member:
                 raise ValueError(f"Unsupported app for integration: {app_name}. '{app_name_upper}' not found in App enum.")
 
@@ -153,25 +167,22 @@ class ComposioClient:
 
             # Let's try to pass the `state` to `initiate_connection` as it's crucial for security.
             # The `redirect_uri` might be inferred by Composio from the integration tied to the API key or app.
-            print(f"ComposioClient: Attempting self.toolset.initiate_connection(app={app_enum_member}, entity_id='default', state='{state}')")
             try:
                 connection_request = self.toolset.initiate_connection(
                     app=app_enum_member,
-                    entity_id="default", # As per Composio example
+                    entity_id=self.entity_id, # As per Composio example
                     state=state # Attempting to pass state
                 )
             except TypeError as te:
                 if "unexpected keyword argument 'state'" in str(te):
-                    print("ComposioClient: `initiate_connection` does not accept 'state'. Trying without it.")
+                    log.debug("initiate_connection_without_state", app=app_name)
                     connection_request = self.toolset.initiate_connection(
                         app=app_enum_member,
-                        entity_id="default"
+                        entity_id=self.entity_id
                     )
                 else:
                     raise # Re-raise other TypeErrors
 
-            print(f"ComposioClient: Received connection_request: {connection_request}")
-
             if not connection_request or not hasattr(connection_request, 'redirectUrl'):
                 raise Exception("Failed to get redirectUrl from initiate_connection or connection_request is invalid")
 
@@ -182,19 +193,17 @@ class ComposioClient:
             returned_state = None
             if hasattr(connection_request, 'state') and connection_request.state:
                 returned_state = connection_request.state
-                print(f"ComposioClient: State returned from initiate_connection: {returned_state}")
             else:
                 # If Composio doesn't return a state here, we must rely on the one we generated earlier (state variable in this method)
                 # for our own CSRF check in the callback, assuming Composio passes it through.
                 # Or, if Composio handles state entirely server-side for this flow, our state check might be problematic.
                 # For now, we will use the state generated at the beginning of this method.
                 returned_state = state # Use the state generated at the start of this function
-                print(f"ComposioClient: No state in connection_request, using originally generated state: {returned_state}")
 
-            print(f"Generated OAuth URL for {app_name} via initiate_connection: {oauth_url}, using state: {returned_state}")
+            log.info("oauth_url_generated", app=app_name, state=returned_state, state_from_composio=returned_state != state)
             return {"url": oauth_url, "state": returned_state}
         except Exception as e:
-            print(f"Error generating OAuth URL via initiate_connection for {app_name}: {e}")
+            log.error("oauth_url_failed", app=app_name, error=e)
             # Fallback or re-raise: For now, re-raise to make the error visible.
             raise e
     
@@ -226,10 +235,10 @@ class ComposioClient:
             if not connection:
                 raise Exception(f"Failed to create connection for {app_name}")
             
-            print(f"Successfully created connection for {app_name}")
+            log.info("connection_created", app=app_name)
             return connection
         except Exception as e:
-            print(f"Error handling OAuth callback: {e}")
+            log.error("oauth_callback_failed", error=e)
             return {"error": str(e)}
     
     def list_connections(self) -> List[Dict[str, Any]]:
@@ -244,47 +253,37 @@ class ComposioClient:
             # Get connections from the real Composio API
             # Changed from get_connections to get_connected_accounts based on dir() output
             raw_connections = self.toolset.get_connected_accounts()
-            print(f"ComposioClient: Raw get_connected_accounts() response: {raw_connections}")
 
             if not isinstance(raw_connections, list):
-                print(f"Unexpected connections format: {type(raw_connections)}")
+                log.warning("connections_format_unexpected", type=type(raw_connections).__name__)
                 return []
 
             active_connections = []
-            print(f"ComposioClient: Iterating through {len(raw_connections)} raw connections from SDK...")
-            for i, conn in enumerate(raw_connections):
-                print(f"ComposioClient: Raw connection #{i}: {conn}")
-                try:
-                    # Attempt to convert to dict if it's a model object, for better logging
-                    conn_dict = conn if isinstance(conn, dict) else conn.__dict__
-                    print(f"ComposioClient: Raw connection #{i} (dict): {conn_dict}")
-                except AttributeError:
-                    print(f"ComposioClient: Raw connection #{i} could not be converted to dict for logging.")
-
+            for conn in raw_connections:
                 conn_app_name = getattr(conn, 'appName', getattr(conn, 'app', 'UnknownApp'))
                 conn_id = getattr(conn, 'id', 'UnknownID')
                 conn_status = getattr(conn, 'status', 'UnknownStatus')
-                print(f"ComposioClient: Conn #{i} Details - AppName: {conn_app_name}, ID: {conn_id}, Status: {conn_status}")
+                log.debug("connection_listed", category="composio.connection", app=conn_app_name, id=conn_id, status=conn_status)
 
                 if conn_status == 'ACTIVE':
                     active_connections.append(conn)
                 elif conn_status == 'UnknownStatus' and not hasattr(conn, 'status'): # If no status attribute, include it
-                    print(f"ComposioClient: Conn #{i} has no 'status' attribute, including it.")
                     active_connections.append(conn)
-                else:
-                    print(f"ComposioClient: Conn #{i} has status '{conn_status}', not including it.")
-            
-            print(f"ComposioClient: Filtered active_connections (count: {len(active_connections)}): {active_connections}")
+
+            log.info("connections_listed", total=len(raw_connections), active=len(active_connections))
             return active_connections
         except Exception as e:
-            print(f"Error listing connections: {e}")
+            log.error("list_connections_failed", error=e)
             # Return empty list on error
             return []
 
-    def delete_connection(self, connection_id: str) -> bool:
+    async def delete_connection(self, connection_id: str) -> bool:
         """
         Delete a Composio connection by its ID.
 
+        Uses the shared pooled HTTP client, so the call neither blocks the
+        event loop nor pays a fresh TCP/TLS handshake.
+
         Args:
             connection_id: The ID of the connection to delete.
 
@@ -292,42 +291,36 @@ class ComposioClient:
             True if deletion was successful or the connection didn't exist, False otherwise.
         """
         try:
-            print(f"ComposioClient: Received request to delete connection ID: {connection_id}")
-            # Construct the URL for the Composio API delete endpoint
-            # Assuming the base API URL is https://api.composio.dev
-            composio_api_url = f"https://api.composio.dev/connections/{connection_id}"
+            # Path on the Composio API (base URL is configured on the shared client)
+            composio_api_path = f"/connections/{connection_id}"
 
             headers = {
                 "Authorization": f"Bearer {self.api_key}"
             }
 
-            print(f"ComposioClient: Making DELETE request to Composio API: {composio_api_url}")
-            response = requests.delete(composio_api_url, headers=headers)
-
-            print(f"ComposioClient: Received response status code: {response.status_code}")
+            response = await composio_http.client.delete(composio_api_path, headers=headers)
 
             if response.status_code == 200 or response.status_code == 204:
-                print(f"ComposioClient: Successfully deleted connection {connection_id} via Composio API.")
+                log.info("connection_deleted", id=connection_id)
                 return True
             elif response.status_code == 404:
-                print(f"ComposioClient: Connection {connection_id} not found on Composio API (might already be deleted).")
+                log.info("connection_already_deleted", id=connection_id)
                 return True # Treat as success if it's already gone
             else:
                 # Log error details from response if available
                 try:
                     error_details = response.json()
-                    print(f"ComposioClient: Composio API returned error details: {error_details}")
                 except json.JSONDecodeError:
-                    print(f"ComposioClient: Composio API returned non-JSON error response: {response.text}")
+                    error_details = response.text
 
-                print(f"ComposioClient: Failed to delete connection {connection_id}. Composio API returned status: {response.status_code}")
+                log.error("connection_delete_failed", id=connection_id, status=response.status_code, details=error_details)
                 return False
 
-        except requests.exceptions.RequestException as e:
-            print(f"ComposioClient: Network or request error during delete_connection for {connection_id}: {e}")
+        except httpx.HTTPError as e:
+            log.error("connection_delete_request_failed", id=connection_id, error=e)
             return False
         except Exception as e:
-            print(f"ComposioClient: Unexpected error during delete_connection for {connection_id}: {e}")
+            log.exception("connection_delete_error", id=connection_id, error=e)
             return False
             
     def get_gmail_tools(self) -> List[Dict[str, Any]]:
@@ -0,0 +1,83 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from core.log import get_logger
+
+log = get_logger("tools")
+
+
+def parse_timeouts(spec: str) -> Dict[str, float]:
+    """
+    Parse per-tool timeout overrides of the form "TOOL_A=60,TOOL_B=5".
+
+    Args:
+        spec: Comma-separated NAME=SECONDS pairs
+
+    Returns:
+        Dict mapping upper-cased tool names to timeouts in seconds
+    """
+    timeouts = {}
+    for entry in spec.split(","):
+        name, _, seconds = entry.partition("=")
+        if name.strip() and seconds.strip():
+            try:
+                timeouts[name.strip().upper()] = float(seconds)
+            except ValueError:
+                log.warning("tool_timeout_invalid", entry=entry)
+    return timeouts
+
+
+class ToolExecutor:
+    """
+    Runs blocking Composio calls on a bounded thread pool.
+
+    ComposioToolSet.execute_action performs a synchronous HTTP request;
+    calling it directly from a coroutine freezes the event loop for every
+    connected client. run() hands the call to a worker thread and awaits
+    it with a per-tool timeout. Cancelling the awaiting task (e.g. when the
+    client disconnects) releases the caller immediately; the worker thread
+    finishes the in-flight HTTP request in the background and its result
+    is discarded.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        default_timeout: float = 30.0,
+        timeouts: Optional[Dict[str, float]] = None
+    ):
+        """
+        Args:
+            max_workers: Maximum number of concurrently running tool calls
+            default_timeout: Timeout in seconds for tools without an override
+            timeouts: Per-tool timeout overrides keyed by tool name
+        """
+        self.default_timeout = default_timeout
+        self.timeouts = {name.upper(): value for name, value in (timeouts or {}).items()}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="composio-tool")
+
+    def timeout_for(self, tool_name: str) -> float:
+        return self.timeouts.get(tool_name.upper(), self.default_timeout)
+
+    async def run(self, tool_name: str, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run func(*args) on the pool, bounded by the timeout for tool_name.
+
+        Args:
+            tool_name: Tool name, used to look up the timeout
+            func: Blocking callable
+            *args: Positional arguments for func
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            asyncio.TimeoutError: If the call does not finish in time
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, func, *args)
+        return await asyncio.wait_for(future, timeout=self.timeout_for(tool_name))
+
+    def shutdown(self) -> None:
+        """Stop accepting work; running calls finish in the background."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,68 @@
+import os
+from typing import Optional
+import httpx
+
+# Base URL for direct Composio REST calls
+COMPOSIO_API_BASE_URL = "https://api.composio.dev"
+
+
+class ComposioHTTP:
+    """
+    Shared, pooled async HTTP client for direct Composio REST calls.
+
+    One httpx.AsyncClient is reused for every request so TCP/TLS
+    connections are kept alive between calls instead of being set up per
+    request. open() and close() are called from the FastAPI lifespan;
+    the client is also opened lazily if a request arrives first.
+    """
+
+    def __init__(
+        self,
+        base_url: str = COMPOSIO_API_BASE_URL,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        timeout: float = 15.0
+    ):
+        """
+        Args:
+            base_url: Composio API base URL
+            max_connections: Maximum concurrent connections in the pool
+            max_keepalive_connections: Idle connections kept open for reuse
+            timeout: Default request timeout in seconds
+        """
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.timeout = httpx.Timeout(timeout)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def open(self) -> httpx.AsyncClient:
+        """Create the underlying client if it does not exist yet."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                timeout=self.timeout
+            )
+        return self._client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self.open()
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Shared by every ComposioClient in the process
+composio_http = ComposioHTTP(
+    base_url=os.environ.get("COMPOSIO_API_BASE_URL", COMPOSIO_API_BASE_URL),
+    max_connections=int(os.environ.get("COMPOSIO_HTTP_MAX_CONNECTIONS", 20)),
+    max_keepalive_connections=int(os.environ.get("COMPOSIO_HTTP_MAX_KEEPALIVE", 10)),
+    timeout=float(os.environ.get("COMPOSIO_HTTP_TIMEOUT", 15))
+)
@@ -0,0 +1,66 @@
+"""
+Process-wide ComposioClient, created on first use.
+
+Importing composio_gemini and constructing ComposioToolSet is the slowest
+part of backend startup, so nothing here touches Composio at import time.
+Routes receive the client through FastAPI's dependency injection
+(Depends(get_composio_client)); the app lifespan starts warm_up() in the
+background so the first request usually finds the client ready.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Optional
+from starlette.concurrency import run_in_threadpool
+from core.log import get_logger
+
+if TYPE_CHECKING:
+    from composio_integration.client import ComposioClient
+
+log = get_logger("composio")
+
+_client: Optional["ComposioClient"] = None
+_lock = threading.Lock()
+
+
+def get_composio_client() -> "ComposioClient":
+    """
+    Return the shared ComposioClient, creating it on first call.
+
+    This is a blocking call the first time; FastAPI runs sync dependencies
+    in its thread pool, and async callers should use
+    run_in_threadpool(get_composio_client).
+
+    Raises:
+        ValueError: If COMPOSIO_API_KEY is not set
+        ImportError: If composio_gemini is not installed
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from composio_integration.client import ComposioClient
+                _client = ComposioClient()
+    return _client
+
+
+def warm_up() -> None:
+    """Create the shared client and build the action index ahead of the first request."""
+    from composio_integration.action_index import get_action_index
+    try:
+        get_composio_client()
+        get_action_index().apps()
+        log.info("composio_warmed_up")
+    except Exception as e:
+        log.error("composio_warm_up_failed", error=e)
+
+
+async def warm_up_async() -> None:
+    """warm_up() on a worker thread, for use from the event loop."""
+    await run_in_threadpool(warm_up)
+
+
+def reset_composio_client() -> None:
+    """Drop the shared client so the next call creates a fresh one."""
+    global _client
+    with _lock:
+        _client = None
@@ -0,0 +1,210 @@
+"""
+Short-lived cache for the results of read-only Composio actions.
+
+Gemini often repeats a lookup within one conversation - listing the same
+Gmail thread or fetching the same GitHub issue - and every repeat costs a
+Composio round trip. When TOOL_RESULT_CACHE=true, results of read-only
+actions are kept for TOOL_RESULT_CACHE_TTL seconds, keyed by session, tool
+name and canonicalized parameters, so a repeat is answered from memory.
+
+Entries are scoped per browser session (its client_id) and dropped when the
+session ends. Every session currently runs actions as Composio's shared
+"default" entity, so a result could be valid for all of them, but scoping
+by session keeps one user's mail or issues out of another's conversation
+once sessions run as their own entities. Adding or deleting a connection
+drops every entry.
+
+An action counts as read-only when the word after the app name is a read
+verb (GITHUB_GET_AN_ISSUE, GMAIL_LIST_THREADS) and no word of the name is a
+write verb (SEND, CREATE, MARK, ...), or when it matches a
+TOOL_RESULT_CACHE_ACTIONS pattern. A read word elsewhere in the name does
+not count: GMAIL_MARK_AS_READ changes state. Apps whose names span several
+words are not recognized and their actions are not cached unless listed. Names matching
+TOOL_RESULT_CACHE_EXCLUDE are never cached. Error results are not cached.
+
+Settings:
+    TOOL_RESULT_CACHE          "true" to enable (default false)
+    TOOL_RESULT_CACHE_TTL      seconds an entry stays valid (default 30)
+    TOOL_RESULT_CACHE_SIZE     maximum entries, least recently used evicted first (default 256)
+    TOOL_RESULT_CACHE_ACTIONS  extra fnmatch patterns treated as read-only, comma-separated
+    TOOL_RESULT_CACHE_EXCLUDE  fnmatch patterns never cached, comma-separated
+"""
+
+import asyncio
+import fnmatch
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from cachetools import TTLCache
+
+# Verbs in Composio action names (APP_VERB_OBJECT) that only read
+READ_VERBS = frozenset({"GET", "LIST", "FETCH", "SEARCH", "FIND", "READ", "RETRIEVE", "QUERY", "LOOKUP", "DESCRIBE", "COUNT", "CHECK"})
+# Verbs that change something; any of them disqualifies a name
+WRITE_VERBS = frozenset({
+    "SEND", "CREATE", "DELETE", "UPDATE", "ADD", "REMOVE", "POST", "PUT", "PATCH", "MODIFY", "MOVE", "SET",
+    "STAR", "UNSTAR", "REPLY", "FORWARD", "ARCHIVE", "UNARCHIVE", "TRASH", "UNTRASH", "MERGE", "CLOSE", "REOPEN",
+    "INSERT", "UPLOAD", "EXECUTE", "RUN", "MARK", "UNMARK", "PIN", "UNPIN", "LABEL", "ASSIGN", "UNASSIGN", "INVITE",
+    "ACCEPT", "APPROVE", "REJECT", "ENABLE", "DISABLE", "SUBSCRIBE", "UNSUBSCRIBE", "FOLLOW", "UNFOLLOW", "LIKE",
+    "REACT", "SHARE", "RENAME", "COPY", "MUTE", "UNMUTE", "JOIN", "LEAVE", "CANCEL", "SCHEDULE", "SYNC", "RESET"
+})
+
+
+def parse_patterns(spec: str) -> List[str]:
+    """
+    Args:
+        spec: Comma-separated fnmatch patterns, e.g. "GMAIL_*_THREAD,NOTION_QUERY_*"
+
+    Returns:
+        Upper-cased patterns
+    """
+    return [pattern.strip().upper() for pattern in spec.split(",") if pattern.strip()]
+
+
+def canonical_params(params: Any) -> str:
+    """
+    Parameters as JSON with sorted keys, so equal dicts give equal keys
+    whatever order Gemini sent them in.
+    """
+    return json.dumps(params, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def is_error_result(result: Any) -> bool:
+    """True for results that must not be cached: errors and unsuccessful executions."""
+    if not isinstance(result, dict):
+        return False
+    # Composio has spelled the flag both ways
+    return bool(result.get("error")) or result.get("successful", result.get("successfull", True)) is False
+
+
+class ToolResultCache:
+    """
+    LRU cache with a TTL for read-only tool results.
+
+    Used from the event loop only. Concurrent calls for the same key while
+    a result is being fetched wait for that fetch instead of starting
+    another one. The fetch runs in its own task, so cancelling any caller,
+    including the one that started it, leaves the others waiting on it.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        ttl: float = 30.0,
+        maxsize: int = 256,
+        read_only: Iterable[str] = (),
+        exclude: Iterable[str] = ()
+    ):
+        """
+        Args:
+            enabled: Whether results are cached at all
+            ttl: Seconds an entry stays valid
+            maxsize: Maximum number of cached results
+            read_only: fnmatch patterns of actions to treat as read-only
+            exclude: fnmatch patterns of actions never to cache
+        """
+        self.enabled = enabled
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._read_only = [pattern.upper() for pattern in read_only]
+        self._exclude = [pattern.upper() for pattern in exclude]
+        self._cacheable: Dict[str, bool] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def is_cacheable(self, tool_name: str) -> bool:
+        """Whether results of tool_name may be cached."""
+        cacheable = self._cacheable.get(tool_name)
+        if cacheable is None:
+            cacheable = self._cacheable[tool_name] = self._classify(tool_name.upper())
+        return cacheable
+
+    def _classify(self, name: str) -> bool:
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in self._exclude):
+            return False
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in self._read_only):
+            return True
+        words = name.split("_")
+        # The verb follows the app name: GITHUB_GET_AN_ISSUE
+        return len(words) > 1 and words[1] in READ_VERBS and not WRITE_VERBS.intersection(words)
+
+    async def get_or_run(
+        self,
+        scope: str,
+        tool_name: str,
+        params: Dict[str, Any],
+        run: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Return the cached result for a call, or await run() and cache it.
+
+        Args:
+            scope: Session the call belongs to; entries are never shared across scopes
+            tool_name: Composio action name
+            params: Action parameters
+            run: Coroutine factory executing the action
+
+        Returns:
+            (result, hit) where hit is True if no action was executed
+
+        Raises:
+            Exception: Whatever run() raised; failures are not cached
+        """
+        if not self.enabled or not self.is_cacheable(tool_name):
+            return await run(), False
+
+        key = (scope, tool_name, canonical_params(params))
+        try:
+            result = self._cache[key]
+            self.hits += 1
+            return result, True
+        except KeyError:
+            pass
+
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.hits += 1
+            # shield: a waiter being cancelled must not cancel the shared fetch
+            return await asyncio.shield(flight), True
+
+        self.misses += 1
+        flight = self._inflight[key] = asyncio.ensure_future(self._fetch(key, run))
+        # Nobody may be left to retrieve a failure once every caller is cancelled
+        flight.add_done_callback(lambda task: task.cancelled() or task.exception())
+        # shield: the caller that started the fetch is cancelled like any other waiter
+        return await asyncio.shield(flight), False
+
+    async def _fetch(self, key: Hashable, run: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await run()
+            if not is_error_result(result):
+                self._cache[key] = result
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, scope: Optional[str] = None) -> None:
+        """
+        Drop cached results.
+
+        Args:
+            scope: Only drop this session's results; None drops everything
+        """
+        if scope is None:
+            self._cache.clear()
+            return
+        for key in [key for key in list(self._cache.keys()) if key[0] == scope]:
+            self._cache.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+# Shared by every session in the process
+tool_result_cache = ToolResultCache(
+    enabled=os.getenv("TOOL_RESULT_CACHE", "false").lower() == "true",
+    ttl=float(os.getenv("TOOL_RESULT_CACHE_TTL", 30)),
+    maxsize=int(os.getenv("TOOL_RESULT_CACHE_SIZE", 256)),
+    read_only=parse_patterns(os.getenv("TOOL_RESULT_CACHE_ACTIONS", "")),
+    exclude=parse_patterns(os.getenv("TOOL_RESULT_CACHE_EXCLUDE", ""))
+)
@@ -0,0 +1,335 @@
+"""
+Bounds the size of Composio results before they reach Gemini and the browser.
+
+A Gmail search or a repository listing can return megabytes; sent as is in
+a functionResponse it costs memory, latency and the model's context. Each
+result goes through ResultShaper.apply():
+
+1. Field projection: TOOL_RESULT_FIELDS keeps only the listed keys of the
+   objects in an action's lists, e.g.
+   "GMAIL_FETCH_EMAILS=messageId,subject,sender,messageTimestamp,preview".
+2. If the result still exceeds the byte budget, the full result is kept
+   in the session store behind a handle and a page is returned instead:
+   long lists are cut to their first items and long strings are clipped,
+   with the budget halved until the page fits. The page records the total
+   length of every list it cut.
+
+The rest is fetched on demand by the browser through
+GET /api/composio/results/{handle}, or by the model through the
+relay_fetch_result function, which is declared to Gemini alongside the
+session's tools (see with_result_page_tool()).
+
+Settings:
+    TOOL_RESULT_MAX_BYTES       byte budget per result (default 32768, 0 disables shaping)
+    TOOL_RESULT_MAX_TOKENS      token budget, about 4 bytes per token (default 0, off)
+    TOOL_RESULT_MAX_LIST_ITEMS  items kept per list in a page (default 25)
+    TOOL_RESULT_MAX_STRING      characters kept per string in a page (default 2000)
+    TOOL_RESULT_FIELDS          ACTION_PATTERN=field,field;... projections
+    TOOL_RESULT_STORE_TTL       seconds a stored result stays fetchable (default 900)
+"""
+
+import fnmatch
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from core import serialization
+from core.session_store import SessionStore, session_store
+
+RESULT_PREFIX = "result:"
+RESULT_PAGE_TOOL = "relay_fetch_result"
+
+# Limits below which a page is not shrunk further
+MIN_LIST_ITEMS = 1
+MIN_STRING = 100
+
+RESULT_PAGE_DECLARATION = {
+    "name": RESULT_PAGE_TOOL,
+    "description": (
+        "Read more of a tool result that was too large to return in full. "
+        "Truncated results carry a 'truncated' object with a handle and the lists that were cut."
+    ),
+    "parameters": {
+        "type": "OBJECT",
+        "properties": {
+            "handle": {"type": "STRING", "description": "Handle from the truncated result"},
+            "path": {"type": "STRING", "description": "Dotted path of the list to read, as listed under 'lists'"},
+            "offset": {"type": "INTEGER", "description": "Index of the first item to return"},
+            "limit": {"type": "INTEGER", "description": "Maximum number of items to return"}
+        },
+        "required": ["handle"]
+    }
+}
+
+
+def parse_fields(spec: str) -> Dict[str, List[str]]:
+    """
+    Parse TOOL_RESULT_FIELDS.
+
+    Args:
+        spec: e.g. "GMAIL_FETCH_EMAILS=messageId,subject;GITHUB_LIST_*=number,title"
+
+    Returns:
+        Dict of upper-cased action pattern to field names
+    """
+    projections = {}
+    for entry in spec.split(";"):
+        pattern, _, fields = entry.partition("=")
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        if pattern.strip() and names:
+            projections[pattern.strip().upper()] = names
+    return projections
+
+
+def project(value: Any, fields: List[str]) -> Any:
+    """
+    Keep only the given keys of every object found in a list.
+
+    Objects that have none of the fields are left whole, so the wrapper
+    objects around a list survive.
+    """
+    if isinstance(value, dict):
+        return {key: project(item, fields) for key, item in value.items()}
+    if isinstance(value, list):
+        projected = []
+        for item in value:
+            if isinstance(item, dict) and any(name in item for name in fields):
+                item = {name: item[name] for name in fields if name in item}
+            projected.append(project(item, fields))
+        return projected
+    return value
+
+
+def trim(value: Any, list_limit: int, string_limit: int, lists: Dict[str, Dict[str, int]], path: str = "") -> Any:
+    """
+    Cut lists to list_limit items and strings to string_limit characters.
+
+    Args:
+        value: Result or part of one
+        list_limit: Items kept per list
+        string_limit: Characters kept per string
+        lists: Filled with {path: {"total": n, "shown": k}} for every list cut
+        path: Dotted path of value within the result
+
+    Returns:
+        A trimmed copy
+    """
+    if isinstance(value, dict):
+        return {key: trim(item, list_limit, string_limit, lists, f"{path}.{key}" if path else str(key)) for key, item in value.items()}
+    if isinstance(value, list):
+        if len(value) > list_limit:
+            lists[path] = {"total": len(value), "shown": list_limit}
+        return [
+            trim(item, list_limit, string_limit, lists, f"{path}.{index}" if path else str(index))
+            for index, item in enumerate(value[:list_limit])
+        ]
+    if isinstance(value, str) and len(value) > string_limit:
+        return f"{value[:string_limit]}...(+{len(value) - string_limit} chars)"
+    return value
+
+
+def resolve(value: Any, path: str) -> Any:
+    """
+    Follow a dotted path ("data.messages", "items.0.comments") into a result.
+
+    Raises:
+        KeyError: If the path does not exist
+    """
+    for segment in filter(None, (path or "").split(".")):
+        if isinstance(value, list) and segment.isdigit() and int(segment) < len(value):
+            value = value[int(segment)]
+        elif isinstance(value, dict) and segment in value:
+            value = value[segment]
+        else:
+            raise KeyError(path)
+    return value
+
+
+def largest_list_path(value: Any) -> Optional[str]:
+    """Path of the longest list in a result, or None if it has no lists."""
+    best: Tuple[int, Optional[str]] = (-1, None)
+    pending = [("", value)]
+    while pending:
+        path, item = pending.pop()
+        if isinstance(item, list):
+            if len(item) > best[0]:
+                best = (len(item), path)
+            children = enumerate(item)
+        elif isinstance(item, dict):
+            children = item.items()
+        else:
+            continue
+        pending.extend((f"{path}.{key}" if path else str(key), child) for key, child in children)
+    return best[1]
+
+
+class ResultShaper:
+    """Applies projection and the size budget, and serves stored results page by page."""
+
+    def __init__(
+        self,
+        store: SessionStore,
+        max_bytes: int = 32768,
+        max_tokens: int = 0,
+        max_list_items: int = 25,
+        max_string: int = 2000,
+        fields: Optional[Dict[str, List[str]]] = None,
+        ttl: float = 900.0
+    ):
+        """
+        Args:
+            store: Where oversized results are kept; shared so any worker can serve a page
+            max_bytes: Byte budget per result; 0 disables budgeting
+            max_tokens: Token budget, converted at about 4 bytes per token; 0 for none
+            max_list_items: Items kept per list in a page
+            max_string: Characters kept per string in a page
+            fields: Projections keyed by action name pattern
+            ttl: Seconds a stored result stays fetchable
+        """
+        self.store = store
+        budgets = [budget for budget in (max_bytes, max_tokens * 4) if budget > 0]
+        self.budget = min(budgets) if budgets and max_bytes > 0 else 0
+        self.max_list_items = max_list_items
+        self.max_string = max_string
+        self.fields = fields or {}
+        self.ttl = ttl
+
+    def fields_for(self, tool_name: str) -> Optional[List[str]]:
+        name = tool_name.upper()
+        for pattern, fields in self.fields.items():
+            if fnmatch.fnmatchcase(name, pattern):
+                return fields
+        return None
+
+    def fit(self, value: Any) -> Tuple[Any, Dict[str, Dict[str, int]]]:
+        """
+        Trim value until it serializes within the budget.
+
+        Returns:
+            (page, lists) where lists describes every list that was cut
+        """
+        list_limit, string_limit = self.max_list_items, self.max_string
+        while True:
+            lists: Dict[str, Dict[str, int]] = {}
+            page = trim(value, list_limit, string_limit, lists)
+            encoded = serialization.dumps_bytes(page)
+            if len(encoded) <= self.budget:
+                return page, lists
+            if list_limit <= MIN_LIST_ITEMS and string_limit <= MIN_STRING:
+                # Still too big, e.g. a huge object with many keys
+                text = encoded[:self.budget].decode("utf-8", errors="ignore")
+                return {"preview": text}, lists
+            list_limit = max(MIN_LIST_ITEMS, list_limit // 2)
+            string_limit = max(MIN_STRING, string_limit // 2)
+
+    def shape(self, tool_name: str, result: Any) -> Tuple[Any, int]:
+        """
+        Project a result and measure it. Serializes the result once; run it
+        off the event loop, results can be megabytes.
+
+        Returns:
+            (value, size): the projected result and its serialized size in bytes
+        """
+        fields = self.fields_for(tool_name)
+        if fields:
+            result = project(result, fields)
+        return result, len(serialization.dumps_bytes(result))
+
+    def page(self, result: Any, handle: str, total_bytes: int) -> Dict[str, Any]:
+        """The page returned in place of an oversized result of total_bytes."""
+        page, lists = self.fit(result)
+        return {
+            "result": page,
+            "truncated": {
+                "handle": handle,
+                "total_bytes": total_bytes,
+                "lists": lists,
+                "hint": f"Call {RESULT_PAGE_TOOL} with this handle, a list path, offset and limit to read more"
+            }
+        }
+
+    async def apply(self, tool_name: str, result: Any) -> Any:
+        """
+        Shape one tool result.
+
+        Args:
+            tool_name: Composio action name
+            result: Result as returned by the action
+
+        Returns:
+            The result itself if it fits, otherwise a page with a handle to the rest
+        """
+        if not self.budget and not self.fields:
+            return result
+        # Even sizing a result means serializing it, so all of it runs on a worker thread
+        shaped, size = await run_in_threadpool(self.shape, tool_name, result)
+        if not self.budget or size <= self.budget:
+            return shaped
+
+        handle = uuid.uuid4().hex
+        await self.store.set(RESULT_PREFIX + handle, {"tool": tool_name, "result": shaped}, self.ttl)
+        return await run_in_threadpool(self.page, shaped, handle, size)
+
+    async def fetch(self, handle: str, path: Optional[str] = None, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Read part of a stored result.
+
+        Args:
+            handle: Handle from a truncated result
+            path: Dotted path of a list; defaults to the longest list
+            offset: First item to return
+            limit: Items to return (default TOOL_RESULT_MAX_LIST_ITEMS)
+
+        Returns:
+            {"items": [...], "path", "offset", "total"} trimmed to the budget,
+            or {"error": ...} if the handle expired or the path is wrong
+        """
+        entry = await self.store.get(RESULT_PREFIX + handle)
+        if entry is None:
+            return {"error": f"Result {handle} not found or expired"}
+        result = entry["result"]
+        if path is None:
+            path = largest_list_path(result)
+        try:
+            target = resolve(result, path or "")
+        except KeyError:
+            return {"error": f"No list at path '{path}'"}
+        if not isinstance(target, list):
+            page, _ = self.fit(target) if self.budget else (target, {})
+            return {"value": page, "path": path}
+
+        offset = max(0, offset)
+        limit = self.max_list_items if not limit or limit <= 0 else limit
+        items = target[offset:offset + limit]
+        if self.budget:
+            items, _ = await run_in_threadpool(self.fit, items)
+        return {"items": items, "path": path, "offset": offset, "total": len(target)}
+
+
+def with_result_page_tool(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Declare relay_fetch_result to Gemini when a session has tools.
+
+    Args:
+        config: Session config from the browser
+
+    Returns:
+        The config, with the declaration appended to "tools" if shaping is on
+        and the session uses tools; the original is not modified
+    """
+    tools = config.get("tools")
+    if not result_shaper.budget or not config.get("toolUsage", True) or not isinstance(tools, list) or not tools:
+        return config
+    return {**config, "tools": tools + [{"function_declarations": [RESULT_PAGE_DECLARATION]}]}
+
+
+# Shared by every session in the process
+result_shaper = ResultShaper(
+    session_store,
+    max_bytes=int(os.getenv("TOOL_RESULT_MAX_BYTES", 32768)),
+    max_tokens=int(os.getenv("TOOL_RESULT_MAX_TOKENS", 0)),
+    max_list_items=int(os.getenv("TOOL_RESULT_MAX_LIST_ITEMS", 25)),
+    max_string=int(os.getenv("TOOL_RESULT_MAX_STRING", 2000)),
+    fields=parse_fields(os.getenv("TOOL_RESULT_FIELDS", "")),
+    ttl=float(os.getenv("TOOL_RESULT_STORE_TTL", 900))
+)
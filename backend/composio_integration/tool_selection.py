@@ -0,0 +1,215 @@
+"""
+Server-side resolution of the tools a session declares to Gemini.
+
+Instead of downloading full schemas from /api/composio/tools and uploading
+them again in its config, the browser can name what it wants:
+
+    "toolApps":    ["gmail", "github"]              every action of these apps
+    "toolActions": ["GITHUB_GET_AN_ISSUE", ...]     individual actions
+    "toolTopK":    20                               optional, see below
+
+resolve_session_tools() fills in "tools" from the process-wide schema cache
+(see composio_integration/cache.py). Tools the browser sent itself are kept.
+
+With a top-K (toolTopK, or TOOL_SELECTION_TOP_K), only the K app actions
+most relevant to the system prompt (plus an optional "toolQuery") are
+declared; actions named in toolActions are always kept, even when there are
+more of them than K (a warning is logged). Relevance is term overlap
+between the prompt and each action's name and description,
+weighted by how rare the term is among the candidates. When nothing in the
+prompt matches, the first K actions are kept.
+"""
+
+import math
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from cachetools import TTLCache
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from composio_integration.action_index import get_action_index
+from composio_integration.provider import get_composio_client
+from core.log import get_logger
+
+log = get_logger("composio.tools")
+
+DEFAULT_TOP_K = int(os.getenv("TOOL_SELECTION_TOP_K", 0))
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({
+    "the", "and", "for", "with", "you", "your", "are", "can", "this", "that", "from", "into", "use",
+    "all", "any", "not", "will", "when", "what", "which", "who", "how", "help", "user", "users",
+    "assistant", "friendly", "helpful", "please", "given", "using"
+})
+
+# Selected declarations by (apps, actions, query, top_k), kept as long as
+# the schemas they were picked from. Empty selections are not cached, so a
+# session started during a Composio outage does not pin "no tools".
+_selections = TTLCache(maxsize=64, ttl=float(os.getenv("COMPOSIO_TOOLS_CACHE_TTL", 300)))
+
+
+def invalidate_selections() -> None:
+    """Forget every cached selection; the next session selects again."""
+    _selections.clear()
+
+
+def terms(text: str) -> List[str]:
+    """Lower-cased words of three or more characters, without stopwords."""
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 2 and word not in _STOPWORDS]
+
+
+def declarations_of(tools: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Flatten tool entries into function declarations.
+
+    Accepts Tool-shaped entries ({"function_declarations": [...]}, camelCase
+    too), bare declarations and SDK objects, which are converted the same
+    way /api/composio/tools would serialize them.
+    """
+    declarations = []
+    for tool in jsonable_encoder(list(tools)):
+        if not isinstance(tool, dict):
+            continue
+        nested = tool.get("function_declarations") or tool.get("functionDeclarations")
+        if nested:
+            declarations.extend(declaration for declaration in nested if isinstance(declaration, dict))
+        elif "name" in tool:
+            declarations.append(tool)
+    return declarations
+
+
+def rank(declarations: List[Dict[str, Any]], query: str, top_k: int) -> List[Dict[str, Any]]:
+    """
+    Keep the top_k declarations most relevant to query, in their original order.
+
+    Args:
+        declarations: Candidate function declarations
+        query: Text to rank against, e.g. the system prompt
+        top_k: Number to keep; 0 keeps all
+
+    Returns:
+        Selected declarations
+    """
+    if top_k <= 0 or len(declarations) <= top_k:
+        return declarations
+    wanted = set(terms(query))
+    documents = []
+    for declaration in declarations:
+        name_terms = set(terms(declaration.get("name", "").replace("_", " ")))
+        description_terms = set(terms(str(declaration.get("description", ""))))
+        documents.append((name_terms, description_terms))
+
+    document_frequency: Dict[str, int] = {}
+    for name_terms, description_terms in documents:
+        for term in (name_terms | description_terms) & wanted:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    weight = {term: math.log(1 + len(documents) / count) for term, count in document_frequency.items()}
+
+    scores = []
+    for index, (name_terms, description_terms) in enumerate(documents):
+        # A term in the action's name says more than one in its description
+        score = sum(2 * weight[term] for term in name_terms & wanted) + sum(weight[term] for term in (description_terms - name_terms) & wanted)
+        scores.append((-score, index))
+    keep = sorted(index for _, index in sorted(scores)[:top_k])
+    return [declarations[index] for index in keep]
+
+
+def app_for_action(action: str, apps: List[str]) -> Optional[str]:
+    """The app whose name prefixes an action name, e.g. "github" for GITHUB_GET_AN_ISSUE."""
+    action = action.casefold()
+    matches = [app for app in apps if action.startswith(app + "_")]
+    return max(matches, key=len) if matches else None
+
+
+def select_tools(
+    apps: Tuple[str, ...],
+    actions: Tuple[str, ...],
+    query: str,
+    top_k: int
+) -> List[Dict[str, Any]]:
+    """
+    Resolve app names and action names to declarations. Blocking; schemas
+    may have to be fetched from Composio.
+
+    Returns:
+        Tool entries for the setup message (a single function_declarations entry)
+
+    Raises:
+        Exception: Composio errors while fetching schemas; nothing is cached
+    """
+    key = (apps, actions, query, top_k)
+    cached = _selections.get(key)
+    if cached is not None:
+        return cached
+
+    client = get_composio_client()
+    known_apps = get_action_index().apps() if actions else []
+    action_apps = {action: app_for_action(action, known_apps) for action in actions}
+    unknown = [action for action, app in action_apps.items() if app is None]
+    if unknown:
+        log.warning("tool_actions_unknown", actions=unknown)
+
+    # Named actions are always declared; the ranking only thins out whole apps
+    named = []
+    wanted_apps = sorted({app for app in action_apps.values() if app})
+    if wanted_apps:
+        named = [
+            declaration for declaration in declarations_of(client.get_tools(wanted_apps, raise_errors=True))
+            if declaration.get("name", "").upper() in action_apps
+        ]
+    named_names = {declaration.get("name") for declaration in named}
+
+    candidates = [
+        declaration for declaration in (declarations_of(client.get_tools(list(apps), raise_errors=True)) if apps else [])
+        if declaration.get("name") not in named_names
+    ]
+    if top_k and len(named) >= top_k:
+        # Named actions fill the budget; they are kept even beyond it
+        if len(named) > top_k:
+            log.warning("tool_actions_exceed_top_k", actions=len(named), top_k=top_k)
+        ranked = []
+    else:
+        ranked = rank(candidates, query, top_k - len(named) if top_k else 0)
+    selected = named + ranked
+
+    tools = [{"function_declarations": selected}] if selected else []
+    if tools:
+        _selections[key] = tools
+    log.info("tools_selected", apps=list(apps), actions=len(actions), candidates=len(candidates) + len(named), selected=len(selected))
+    return tools
+
+
+def _names(value: Any) -> Tuple[str, ...]:
+    if not isinstance(value, list):
+        return ()
+    return tuple(sorted({str(item).strip() for item in value if str(item).strip()}))
+
+
+async def resolve_session_tools(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill in "tools" from the config's toolApps and toolActions.
+
+    Args:
+        config: Session config from the browser
+
+    Returns:
+        The config with resolved tools appended after any the browser sent;
+        the original is not modified. Returned unchanged if the config names
+        no apps or actions, tool usage is off, or resolution fails.
+    """
+    apps = tuple(sorted({name.casefold() for name in _names(config.get("toolApps"))}))
+    actions = tuple(sorted({name.upper() for name in _names(config.get("toolActions"))}))
+    if not (apps or actions) or not config.get("toolUsage", True):
+        return config
+
+    top_k = config.get("toolTopK", DEFAULT_TOP_K)
+    top_k = top_k if isinstance(top_k, int) and top_k > 0 else 0
+    query = " ".join(filter(None, [str(config.get("systemPrompt") or ""), str(config.get("toolQuery") or "")])) if top_k else ""
+    try:
+        tools = await run_in_threadpool(select_tools, apps, actions, query, top_k)
+    except Exception as e:
+        log.error("tool_selection_failed", apps=list(apps), actions=list(actions), error=e)
+        return config
+
+    own = config.get("tools") if isinstance(config.get("tools"), list) else []
+    return {**config, "tools": own + tools}
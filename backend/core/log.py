@@ -0,0 +1,280 @@
+"""
+Structured, non-blocking logging for the relay.
+
+    log = get_logger("websocket")
+    log.info("client_connected", client_id=client_id)
+    log.debug("gemini_text_part", category="gemini.part", client_id=client_id, text=text)
+
+Each call is an event name plus key/value fields. Records go onto a queue
+and are formatted and written by a background thread, so the event loop
+never blocks on stdout. Field values are clipped to RELAY_LOG_MAX_FIELD
+characters when the call is made, so tool results, configs or SDK objects
+cost a bounded amount to log whatever their size.
+
+Events on hot paths carry a category that RELAY_LOG_SAMPLE can thin out:
+"http=0.01,gemini.part=0" keeps 1% of HTTP request events and no model
+text parts. Events sampled out are counted (see sampled_out()).
+
+Settings:
+    RELAY_LOG_LEVEL      DEBUG, INFO (default), WARNING or ERROR
+    RELAY_LOG_FORMAT     "text" (default) or "json", one object per line
+    RELAY_LOG_MAX_FIELD  maximum characters per field value (default 256)
+    RELAY_LOG_SAMPLE     comma-separated category=rate pairs, rate in [0, 1]
+"""
+
+import atexit
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+import reprlib
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+from core import serialization
+
+LOG_LEVEL = os.getenv("RELAY_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("RELAY_LOG_FORMAT", "text").lower()
+MAX_FIELD_CHARS = int(os.getenv("RELAY_LOG_MAX_FIELD", 256))
+# Items kept per dict or list field, and how deep nested containers are copied
+MAX_FIELD_ITEMS = 8
+MAX_FIELD_DEPTH = 2
+
+_SIMPLE_TYPES = (bool, int, float, type(None))
+
+_repr = reprlib.Repr()
+_repr.maxlevel = 3
+_repr.maxdict = 8
+_repr.maxlist = 8
+_repr.maxtuple = 8
+_repr.maxset = 8
+_repr.maxstring = MAX_FIELD_CHARS
+_repr.maxother = MAX_FIELD_CHARS
+
+
+def clip(value: Any, limit: int = MAX_FIELD_CHARS, depth: int = MAX_FIELD_DEPTH) -> Any:
+    """
+    Bound the size of a field value.
+
+    Args:
+        value: Anything passed as a log field
+        limit: Maximum characters kept per string
+        depth: Levels of nested dicts and lists copied as containers
+
+    Returns:
+        Numbers, booleans and None unchanged; dicts and lists as clipped
+        copies of their first MAX_FIELD_ITEMS items; everything else as a
+        string of at most limit characters plus a note of how much was cut
+    """
+    if isinstance(value, _SIMPLE_TYPES):
+        return value
+    if depth > 0 and isinstance(value, dict):
+        clipped = {str(key): clip(item, limit, depth - 1) for key, item in itertools.islice(value.items(), MAX_FIELD_ITEMS)}
+        if len(value) > MAX_FIELD_ITEMS:
+            clipped["..."] = f"+{len(value) - MAX_FIELD_ITEMS} keys"
+        return clipped
+    if depth > 0 and isinstance(value, (list, tuple, set, frozenset)):
+        clipped = [clip(item, limit, depth - 1) for item in itertools.islice(value, MAX_FIELD_ITEMS)]
+        if len(value) > MAX_FIELD_ITEMS:
+            clipped.append(f"...(+{len(value) - MAX_FIELD_ITEMS} items)")
+        return clipped
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if isinstance(value, BaseException):
+        value = f"{type(value).__name__}: {value}"
+    elif not isinstance(value, str):
+        # reprlib stops descending into large containers early
+        value = _repr.repr(value)
+    if len(value) > limit:
+        return f"{value[:limit]}...(+{len(value) - limit} chars)"
+    return value
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """
+    Parse RELAY_LOG_SAMPLE.
+
+    Args:
+        spec: e.g. "http=0.01,gemini.part=0"
+
+    Returns:
+        Dict of category to keep rate; invalid entries are ignored
+    """
+    rates = {}
+    for entry in spec.split(","):
+        category, _, rate = entry.partition("=")
+        try:
+            rates[category.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    rates.pop("", None)
+    return rates
+
+
+class Sampler:
+    """
+    Keeps a fixed fraction of the events in each category.
+
+    Deterministic rather than random: with rate 0.1 every tenth event is
+    kept, so rare categories are not lost to chance.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        self.rates = rates
+        self._credit: Dict[str, float] = {}
+        self.dropped: Dict[str, int] = {}
+
+    def keep(self, category: str) -> bool:
+        rate = self.rates.get(category)
+        if rate is None or rate >= 1.0:
+            return True
+        if rate > 0.0:
+            credit = self._credit.get(category, 1.0) + rate
+            if credit >= 1.0:
+                self._credit[category] = credit - 1.0
+                return True
+            self._credit[category] = credit
+        self.dropped[category] = self.dropped.get(category, 0) + 1
+        return False
+
+
+sampler = Sampler(parse_sampling(os.getenv("RELAY_LOG_SAMPLE", "")))
+
+
+class StructuredFormatter(logging.Formatter):
+    """Renders an event and its fields as key=value text or a JSON object."""
+
+    def __init__(self, fmt: str = "text"):
+        super().__init__()
+        self.json = fmt == "json"
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", {})
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}"
+        if self.json:
+            entry = {"ts": timestamp, "level": record.levelname, "logger": record.name, "event": record.getMessage()}
+            entry.update(fields)
+            if record.exc_info:
+                entry["exc"] = self.formatException(record.exc_info)
+            return serialization.dumps(entry)
+
+        parts = [timestamp, f"{record.levelname:<7}", record.name, record.getMessage()]
+        for key, value in fields.items():
+            if isinstance(value, (dict, list)) or (isinstance(value, str) and (not value or any(c.isspace() or c in '"=' for c in value))):
+                value = serialization.dumps(value)
+            parts.append(f"{key}={value}")
+        line = " ".join(parts)
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread without formatting them first."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Fields are already clipped copies, so the record can be formatted
+        # later on the listener thread
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging() -> None:
+    """Install the queue handler on the "relay" logger; later calls do nothing."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        records = queue.SimpleQueue()
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(StructuredFormatter(LOG_FORMAT))
+
+        root = logging.getLogger("relay")
+        root.setLevel(LOG_LEVEL)
+        root.handlers = [_QueueHandler(records)]
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(records, output)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+class StructuredLogger:
+    """
+    Logger taking an event name and keyword fields.
+
+    Disabled levels and sampled-out categories return before any field is
+    touched, so debug events on hot paths are nearly free.
+    """
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(f"relay.{name}")
+
+    def isEnabledFor(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, event: str, category: Optional[str], exc_info: Any, fields: Dict[str, Any]) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        if category is not None and not sampler.keep(category):
+            return
+        if exc_info is True:
+            exc_info = sys.exc_info()
+        # Built directly rather than through Logger.log(), which walks the
+        # stack to find the caller's file and line on every call
+        record = self._logger.makeRecord(
+            self._logger.name, level, "", 0, event, (), exc_info,
+            extra={"fields": {key: clip(value) for key, value in fields.items()}}
+        )
+        self._logger.handle(record)
+
+    def debug(self, event: str, category: Optional[str] = None, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, category, None, fields)
+
+    def info(self, event: str, category: Optional[str] = None, **fields: Any) -> None:
+        self._log(logging.INFO, event, category, None, fields)
+
+    def warning(self, event: str, category: Optional[str] = None, **fields: Any) -> None:
+        self._log(logging.WARNING, event, category, None, fields)
+
+    def error(self, event: str, category: Optional[str] = None, exc_info: Any = None, **fields: Any) -> None:
+        self._log(logging.ERROR, event, category, exc_info, fields)
+
+    def exception(self, event: str, category: Optional[str] = None, **fields: Any) -> None:
+        """Log at ERROR with the active exception's traceback."""
+        self._log(logging.ERROR, event, category, True, fields)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """
+    Args:
+        name: Component name, e.g. "websocket"; records use "relay.<name>"
+
+    Returns:
+        A StructuredLogger writing through the shared queue
+    """
+    configure_logging()
+    return StructuredLogger(name)
+
+
+def sampled_out() -> Dict[str, int]:
+    """Events dropped by sampling so far, per category."""
+    return dict(sampler.dropped)
+
+
+if serialization.JSON_BACKEND == "orjson" and serialization.backend != "orjson":
+    get_logger("serialization").warning("json_backend_unavailable", requested="orjson", using=serialization.backend)
@@ -0,0 +1,316 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Histograms and counters are plain Python objects updated from the event
+loop; routes/metrics.py renders them on GET /metrics. Collectors are
+callables evaluated at scrape time for values that already live elsewhere
+(pool and cache stats, queue depths), so nothing is copied on the hot path.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from core.log import get_logger
+
+log = get_logger("metrics")
+
+# Seconds; spans from sub-millisecond queue waits to multi-second tool calls
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+# (labels, value) pairs produced by a collector for one metric
+Sample = Tuple[Dict[str, str], float]
+# (name, type, help, samples) produced by a collector
+CollectedMetric = Tuple[str, str, str, List[Sample]]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: str) -> int:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, ([*series[0]], series[1], series[2])) for key, series in self._series.items())
+        lines = []
+        for key, (bucket_counts, total, count) in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), bucket_counts):
+                cumulative += bucket_count
+                bucket_labels = {**labels, "le": "+Inf" if bound == math.inf else repr(float(bound))}
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Named counters, histograms and scrape-time collectors.
+
+    histogram() and counter() return the existing metric when called again
+    with the same name, so modules can declare the metrics they use without
+    coordinating import order.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[CollectedMetric]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[CollectedMetric]]) -> None:
+        """
+        Register a callable evaluated on every scrape.
+
+        Args:
+            collector: Returns (name, type, help, samples) tuples, where type
+                       is "gauge" or "counter" and samples are (labels, value)
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        for collector in list(self._collectors):
+            try:
+                collected = list(collector())
+            except Exception as e:
+                log.error("metrics_collector_failed", collector=collector, error=e)
+                continue
+            for name, kind, help, samples in collected:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+
+        return "\n".join(lines) + "\n"
+
+    def _get_or_create(self, name: str, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+
+# Process-wide registry rendered by GET /metrics
+metrics = MetricsRegistry()
+
+session_stage_seconds = metrics.histogram(
+    "relay_session_stage_seconds",
+    "Time from WebSocket accept to the first occurrence of each session stage",
+    ("stage",)
+)
+first_part_seconds = metrics.histogram(
+    "relay_time_to_first_part_seconds",
+    "Time from the end of user input to the first model part of a turn",
+    ("trigger",)
+)
+first_audio_seconds = metrics.histogram(
+    "relay_time_to_first_audio_seconds",
+    "Time from the end of user input to the first model audio of a turn",
+    ("trigger",)
+)
+turn_seconds = metrics.histogram(
+    "relay_turn_seconds",
+    "Time from the end of user input to turnComplete",
+    ("trigger",)
+)
+
+
+class SessionTimeline:
+    """
+    Timestamps for one relay session.
+
+    Session stages (config received, Gemini connected, first audio up, ...)
+    are recorded once each, relative to the WebSocket accept. Per-turn
+    latency is measured from the end of the user's input: the text message
+    or tool response that triggered the turn, or otherwise the last audio
+    chunk sent before the model started answering (with an always-on
+    microphone this is an approximation of when the user stopped talking;
+    mark_user_turn_end() lets a VAD supply the exact point).
+    """
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.stages: Dict[str, float] = {}
+        self.turns = 0
+
+        # End of the latest user input not yet answered, and what it was
+        self._anchor: Optional[float] = None
+        self._anchor_trigger = "audio"
+        self._last_audio_at: Optional[float] = None
+        # Anchor of the turn currently being answered
+        self._turn_start: Optional[Tuple[float, str]] = None
+        self._first_audio_seen = False
+
+    def mark(self, stage: str) -> bool:
+        """
+        Record the first occurrence of a session stage.
+
+        Returns:
+            True if this call recorded the stage, False if it was already seen
+        """
+        if stage in self.stages:
+            return False
+        elapsed = time.monotonic() - self.started_at
+        self.stages[stage] = elapsed
+        session_stage_seconds.observe(elapsed, stage=stage)
+        return True
+
+    def input_sent(self, kind: str) -> None:
+        """Note that user input of the given kind ("audio", "text", "tool", ...) is being sent to Gemini."""
+        now = time.monotonic()
+        if kind == "audio":
+            self._last_audio_at = now
+            self.mark("first_audio_up")
+        elif kind in ("text", "tool"):
+            self.mark_user_turn_end(kind, now)
+
+    def mark_user_turn_end(self, trigger: str, at: Optional[float] = None) -> None:
+        """Set the point the next model turn is measured from."""
+        self._anchor = at if at is not None else time.monotonic()
+        self._anchor_trigger = trigger
+
+    def model_part(self, kind: str) -> None:
+        """
+        Note a model part ("audio", "text" or "function_call") arriving from Gemini.
+        """
+        now = time.monotonic()
+        if self._turn_start is None:
+            self.mark("first_model_part")
+            if self._anchor is None and self._last_audio_at is not None:
+                # Audio keeps streaming while the model answers; pin the
+                # turn to the last chunk sent before its first part
+                self.mark_user_turn_end("audio", self._last_audio_at)
+            if self._anchor is None:
+                return
+            # Input arriving from here on belongs to the next turn
+            self._turn_start = (self._anchor, self._anchor_trigger)
+            self._anchor = None
+            first_part_seconds.observe(now - self._turn_start[0], trigger=self._turn_start[1])
+        if kind == "audio" and not self._first_audio_seen:
+            self._first_audio_seen = True
+            self.mark("first_audio_down")
+            first_audio_seconds.observe(now - self._turn_start[0], trigger=self._turn_start[1])
+
+    def turn_complete(self) -> None:
+        turn_start = self._turn_start
+        if turn_start is None and self._anchor is not None:
+            # A turn without any model parts
+            turn_start, self._anchor = (self._anchor, self._anchor_trigger), None
+        if turn_start is not None:
+            turn_seconds.observe(time.monotonic() - turn_start[0], trigger=turn_start[1])
+        self.turns += 1
+        self.mark("first_turn_complete")
+        self._turn_start = None
+        self._first_audio_seen = False
+
+    @property
+    def in_turn(self) -> bool:
+        """Whether user input is awaiting an answer or the model is still answering."""
+        return self._anchor is not None or self._turn_start is not None
+
+    def summary(self) -> Dict[str, float]:
+        """Stage offsets in milliseconds, for logging at session end."""
+        return {stage: round(elapsed * 1000, 1) for stage, elapsed in self.stages.items()}
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+from core.metrics import metrics
+
+# Message kinds that may be discarded when a queue is full, in the order
+# they are sacrificed. Anything else (text, tool calls and responses,
+# control messages) is never dropped; producers wait for space instead.
+DROP_ORDER = ("image", "audio")
+
+queue_wait_seconds = metrics.histogram(
+    "relay_queue_wait_seconds",
+    "Time messages spend in a relay queue before being consumed",
+    ("queue", "kind")
+)
+queue_dropped_total = metrics.counter(
+    "relay_queue_dropped_total",
+    "Messages dropped by a full relay queue",
+    ("queue", "kind")
+)
+
+
+class RelayQueue:
+    """
+    Bounded FIFO between one side of the relay and the other.
+
+    Keeps latency bounded when the consumer (the browser or the Gemini
+    socket) falls behind: stale video frames are dropped first, then the
+    oldest audio, while text and tool traffic applies backpressure to the
+    producer. Tracks a high-water mark and per-kind drop counts.
+    """
+
+    def __init__(self, name: str, maxsize: int = 64):
+        """
+        Args:
+            name: Label used in stats, e.g. "upstream" or "downstream"
+            maxsize: Maximum number of queued messages
+        """
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self._items: Deque[Tuple[str, Any, float]] = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+        self.high_water_mark = 0
+        self.enqueued: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def full(self) -> bool:
+        return len(self._items) >= self.maxsize
+
+    async def put(self, kind: str, item: Any) -> None:
+        """
+        Enqueue a message, applying the drop policy if the queue is full.
+
+        Args:
+            kind: Message kind ("audio", "image", "text", "tool", ...)
+            item: Message payload handed to the consumer unchanged
+        """
+        while self.full():
+            if self._evict_for(kind):
+                break
+            if kind in DROP_ORDER:
+                # Nothing cheaper to drop: discard the incoming media
+                self._count_drop(kind)
+                return
+            self._not_full.clear()
+            await self._not_full.wait()
+
+        self._items.append((kind, item, time.monotonic()))
+        self._count(self.enqueued, kind)
+        if len(self._items) > self.high_water_mark:
+            self.high_water_mark = len(self._items)
+        self._not_empty.set()
+
+    async def get(self) -> Tuple[str, Any]:
+        """
+        Wait for and remove the oldest message.
+
+        Returns:
+            (kind, item) tuple
+        """
+        while not self._items:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        kind, item, enqueued_at = self._items.popleft()
+        self._not_full.set()
+        queue_wait_seconds.observe(time.monotonic() - enqueued_at, queue=self.name, kind=kind)
+        return kind, item
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, high-water mark and counters."""
+        return {
+            "name": self.name,
+            "size": len(self._items),
+            "maxsize": self.maxsize,
+            "high_water_mark": self.high_water_mark,
+            "enqueued": dict(self.enqueued),
+            "dropped": dict(self.dropped),
+        }
+
+    def _evict_for(self, kind: str) -> bool:
+        """Drop the oldest droppable message that ranks at or below kind."""
+        for candidate in DROP_ORDER:
+            for index, (queued_kind, _, _) in enumerate(self._items):
+                if queued_kind == candidate:
+                    del self._items[index]
+                    self._count_drop(candidate)
+                    return True
+            if candidate == kind:
+                # Never evict a higher-priority kind to make room for this one
+                break
+        return False
+
+    def _count_drop(self, kind: str) -> None:
+        self._count(self.dropped, kind)
+        queue_dropped_total.inc(queue=self.name, kind=kind)
+
+    @staticmethod
+    def _count(counter: Dict[str, int], kind: str) -> None:
+        counter[kind] = counter.get(kind, 0) + 1
@@ -0,0 +1,82 @@
+"""
+JSON encoding for the WebSocket relay.
+
+Every relayed message is decoded and re-encoded at least once, and most of
+them carry large base64 audio or image strings. orjson handles those several
+times faster than the stdlib json module; it is used when installed, with
+json as the fallback. RELAY_JSON_BACKEND=json forces the stdlib backend.
+
+    dumps(obj) -> str            compact JSON text
+    dumps_bytes(obj) -> bytes    the same, UTF-8 encoded
+    loads(data) -> Any           accepts str, bytes, bytearray or memoryview
+    dumps_canonical(obj) -> bytes  sorted keys, for hashing; unknown types via str()
+
+Decode errors are raised as json.JSONDecodeError by both backends
+(orjson.JSONDecodeError subclasses it), so callers catch one exception type.
+"""
+
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+    has_orjson = True
+except ImportError:
+    orjson = None
+    has_orjson = False
+
+JSON_BACKEND = os.getenv("RELAY_JSON_BACKEND", "auto").lower()
+
+
+def _orjson_dumps_bytes(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits, which json handles
+        return _json_dumps_bytes(obj)
+
+
+def _orjson_dumps(obj: Any) -> str:
+    return _orjson_dumps_bytes(obj).decode("utf-8")
+
+
+def _json_dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def _json_dumps_bytes(obj: Any) -> bytes:
+    return _json_dumps(obj).encode("utf-8")
+
+
+def _json_dumps_canonical(obj: Any) -> bytes:
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _orjson_dumps_canonical(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        return _json_dumps_canonical(obj)
+
+
+def _json_loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+
+def _orjson_loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    return orjson.loads(data)
+
+
+if has_orjson and JSON_BACKEND != "json":
+    backend = "orjson"
+    dumps, dumps_bytes, loads = _orjson_dumps, _orjson_dumps_bytes, _orjson_loads
+    dumps_canonical = _orjson_dumps_canonical
+else:
+    # A RELAY_JSON_BACKEND=orjson that could not be honoured is logged by
+    # core/log.py, which imports this module
+    backend = "json"
+    dumps, dumps_bytes, loads = _json_dumps, _json_dumps_bytes, _json_loads
+    dumps_canonical = _json_dumps_canonical
@@ -0,0 +1,228 @@
+"""
+Shared key/value store for state that must be visible to every relay process.
+
+OAuth states are created by one request and checked by the callback, which
+a load balancer may send to another uvicorn worker or replica; the session
+registry lets any node see which sessions are live and where. Both go
+through a SessionStore so the backend can be chosen per deployment:
+
+    memory://                    per-process dict (default, single worker)
+    redis://host:6379/0          Redis, shared by every worker and replica
+    rediss://...                 Redis over TLS
+
+Values are JSON-serializable objects. Every entry has a TTL so state left
+behind by a crashed worker expires on its own.
+"""
+
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+from core import serialization
+
+try:
+    import redis.asyncio as redis_asyncio
+    has_redis = True
+except ImportError:
+    redis_asyncio = None
+    has_redis = False
+
+# Identifies this process in the session registry
+NODE_ID = os.getenv("RELAY_NODE_ID") or f"{os.uname().nodename}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class SessionStore(ABC):
+    """
+    Interface of a TTL key/value store.
+
+    Keys are strings; callers namespace them with a prefix such as
+    "oauth:" or "session:". ttl is in seconds.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the value for key, or None if missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store value under key for ttl seconds, replacing any previous value."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove key if present."""
+
+    @abstractmethod
+    async def pop(self, key: str) -> Optional[Any]:
+        """
+        Atomically remove key and return its value.
+
+        Only one caller gets the value, which makes one-time tokens such
+        as OAuth states safe to check from several processes.
+        """
+
+    @abstractmethod
+    async def items(self, prefix: str) -> Dict[str, Any]:
+        """Return all live entries whose key starts with prefix."""
+
+    async def close(self) -> None:
+        """Release connections held by the backend."""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process store. Only correct with a single worker, since every
+    process has its own copy.
+
+    Expired entries are freed by a sweep that set() runs at most once per
+    sweep_interval, so values nobody reads again (e.g. stored tool results)
+    do not pile up.
+    """
+
+    def __init__(self, sweep_interval: float = 1.0):
+        """
+        Args:
+            sweep_interval: Minimum seconds between sweeps of expired entries
+        """
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+
+    def _sweep(self, now: float) -> None:
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        self._next_sweep = now + self.sweep_interval
+
+    def _live(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._live(key)
+        return entry[1] if entry else None
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        self._entries[key] = (now + ttl, value)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def pop(self, key: str) -> Optional[Any]:
+        entry = self._live(key)
+        if entry is None:
+            return None
+        del self._entries[key]
+        return entry[1]
+
+    async def items(self, prefix: str) -> Dict[str, Any]:
+        self._sweep(time.monotonic())
+        return {key: value for key, (_, value) in self._entries.items() if key.startswith(prefix)}
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Store backed by Redis, shared by all workers and replicas.
+
+    The client is injectable: anything implementing the redis.asyncio
+    methods used here (get, set with px, delete, getdel, scan_iter, mget,
+    aclose) works, e.g. fakeredis.aioredis or a local redis-server for
+    testing.
+    """
+
+    def __init__(self, client, namespace: str = "relay:"):
+        """
+        Args:
+            client: redis.asyncio.Redis or a compatible stand-in
+            namespace: Prefix for every key, so several deployments can share a database
+        """
+        self.client = client
+        self.namespace = namespace
+
+    @classmethod
+    def from_url(cls, url: str, namespace: str = "relay:") -> "RedisSessionStore":
+        """
+        Args:
+            url: redis:// or rediss:// URL
+
+        Raises:
+            ImportError: If the redis package is not installed
+        """
+        if not has_redis:
+            raise ImportError("SESSION_STORE_URL points at Redis but the redis package is not installed")
+        return cls(redis_asyncio.from_url(url), namespace)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.namespace + key)
+        return serialization.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self.client.set(self.namespace + key, serialization.dumps_bytes(value), px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.namespace + key)
+
+    async def pop(self, key: str) -> Optional[Any]:
+        raw = await self.client.getdel(self.namespace + key)
+        return serialization.loads(raw) if raw is not None else None
+
+    async def items(self, prefix: str) -> Dict[str, Any]:
+        keys = [key async for key in self.client.scan_iter(match=self.namespace + prefix + "*", count=500)]
+        if not keys:
+            return {}
+        values = await self.client.mget(keys)
+        strip = len(self.namespace)
+        return {
+            (key.decode("utf-8") if isinstance(key, bytes) else key)[strip:]: serialization.loads(raw)
+            for key, raw in zip(keys, values)
+            # A key can expire between SCAN and MGET
+            if raw is not None
+        }
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_session_store(url: Optional[str] = None) -> SessionStore:
+    """
+    Create the store selected by a URL.
+
+    Args:
+        url: "memory://", "redis://..." or "rediss://..."; defaults to the
+             SESSION_STORE_URL environment variable, then memory://
+
+    Returns:
+        A SessionStore backend
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    url = url or os.getenv("SESSION_STORE_URL", "memory://")
+    scheme = url.split("://", 1)[0].lower()
+    if scheme == "memory":
+        return MemorySessionStore()
+    if scheme in ("redis", "rediss"):
+        return RedisSessionStore.from_url(url, os.getenv("SESSION_STORE_NAMESPACE", "relay:"))
+    raise ValueError(f"Unsupported SESSION_STORE_URL scheme: {scheme}")
+
+
+async def list_sessions(store: SessionStore) -> List[Dict[str, Any]]:
+    """
+    Sessions registered by every relay process sharing the store.
+
+    Args:
+        store: The shared store
+
+    Returns:
+        Session records, see routes/websocket.py register_session()
+    """
+    return list((await store.items("session:")).values())
+
+
+# Shared store for the process, selected by SESSION_STORE_URL
+session_store = create_session_store()
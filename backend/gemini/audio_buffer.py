@@ -0,0 +1,94 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+from core.metrics import metrics
+from core.log import get_logger
+
+log = get_logger("gemini.audio")
+
+batch_age_seconds = metrics.histogram(
+    "gemini_audio_batch_age_seconds",
+    "Time the oldest microphone chunk in a batch waited before the batch was sent"
+)
+
+
+class AudioCoalescer:
+    """
+    Batches small PCM chunks into fewer, larger upstream messages.
+
+    The browser delivers a 512-sample chunk (~32 ms at 16 kHz) at a time.
+    Chunks are appended to a buffer that is flushed once it reaches
+    target_bytes, or max_latency_ms after the first buffered chunk,
+    whichever comes first. flush() can also be called directly, e.g. on
+    turn boundaries, so no audio is held back when it matters.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[bytes], Awaitable[None]],
+        target_bytes: int = 4096,
+        max_latency_ms: int = 100
+    ):
+        """
+        Args:
+            send: Coroutine called with each batched PCM payload
+            target_bytes: Flush as soon as this many bytes are buffered
+                          (0 or less disables batching)
+            max_latency_ms: Longest time a chunk may wait in the buffer
+        """
+        self._send = send
+        self.target_bytes = target_bytes
+        self.max_latency = max_latency_ms / 1000.0
+        self._buffer = bytearray()
+        self._first_at = 0.0
+        self._timer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    async def add(self, pcm: bytes) -> None:
+        """
+        Buffer a PCM chunk, flushing if the size target is reached.
+
+        Args:
+            pcm: Raw 16-bit PCM bytes
+        """
+        if self.target_bytes <= 0:
+            await self._send(bytes(pcm))
+            return
+
+        if not self._buffer:
+            self._first_at = time.monotonic()
+        self._buffer += pcm
+        if len(self._buffer) >= self.target_bytes:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_deadline())
+
+    async def flush(self) -> None:
+        """Send any buffered audio immediately."""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+
+        if not self._buffer:
+            return
+
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        batch_age_seconds.observe(time.monotonic() - self._first_at)
+        await self._send(data)
+
+    def clear(self) -> None:
+        """Drop buffered audio and cancel the pending deadline."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._buffer.clear()
+
+    async def _flush_after_deadline(self) -> None:
+        await asyncio.sleep(self.max_latency)
+        try:
+            await self.flush()
+        except Exception as e:
+            log.warning("audio_flush_failed", error=e)
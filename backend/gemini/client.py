@@ -1,7 +1,51 @@
-import json
+import asyncio
+import base64
+import inspect
 import os
+import random
+import time
+from collections import deque
 from websockets import connect
-from typing import Dict, Optional, Any
+from websockets.exceptions import ConnectionClosed
+from typing import Deque, Dict, List, Optional, Any, Callable, Tuple
+from gemini.audio_buffer import AudioCoalescer
+from gemini.frame_gate import FrameGate
+from gemini.vad import VoiceActivityGate, create_vad
+from gemini.setup import setup_fingerprint, setup_payload, with_session_resumption
+from core import serialization
+from core.metrics import metrics
+from core.log import get_logger
+
+log = get_logger("gemini")
+
+# Gemini Live (BidiGenerateContent) WebSocket endpoint
+GEMINI_WS_URI = (
+    "wss://generativelanguage.googleapis.com/ws/"
+    "google.ai.generativelanguage.v1alpha.GenerativeService.BidiGenerateContent"
+)
+
+connect_seconds = metrics.histogram(
+    "gemini_connect_seconds",
+    "Time to open the WebSocket to Gemini (TCP, TLS and upgrade)"
+)
+setup_ack_seconds = metrics.histogram(
+    "gemini_setup_ack_seconds",
+    "Time from sending 'setup' to Gemini's first reply"
+)
+reconnect_seconds = metrics.histogram(
+    "gemini_reconnect_seconds",
+    "Time from losing the Gemini socket to a replayed, usable session",
+    ("result",)
+)
+reconnect_buffer_dropped = metrics.counter(
+    "gemini_reconnect_buffer_dropped_total",
+    "Outgoing messages dropped because the reconnect buffer was full",
+    ("kind",)
+)
+
+# Close codes that mean the request itself is wrong; reconnecting would not help
+FATAL_CLOSE_CODES = {1002, 1003, 1007, 1008}
+
 
 class GeminiConnection:
     """
@@ -9,23 +53,63 @@ class GeminiConnection:
     Handles WebSocket communication, audio/video streaming, and response processing
     """
 
-    def __init__(self):
-        """Initialize the Gemini connection with API key from environment"""
+    def __init__(self, base_uri: Optional[str] = None):
+        """
+        Initialize the Gemini connection with API key from environment
+
+        Args:
+            base_uri: WebSocket endpoint without the key query parameter.
+                      Defaults to GEMINI_WS_URI or the Google endpoint; point it
+                      at benchmarks/mock_gemini.py for load testing.
+        """
         # Get API key from environment
         self.api_key = os.environ.get("GEMINI_API_KEY")
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
 
         self.model = "gemini-2.0-flash-exp"  # Default model
-        self.uri = (
-            "wss://generativelanguage.googleapis.com/ws/"
-            "google.ai.generativelanguage.v1alpha.GenerativeService.BidiGenerateContent"
-            f"?key={self.api_key}"
-        )
+        base_uri = base_uri or os.environ.get("GEMINI_WS_URI") or GEMINI_WS_URI
+        self.uri = f"{base_uri}?key={self.api_key}"
         self.ws = None
         self.config = None
 
-    def set_config(self, config_data: Dict[str, Any]) -> None:
+        # Batch microphone chunks into fewer upstream messages
+        self.audio_buffer = AudioCoalescer(
+            self._send_audio_chunk,
+            target_bytes=int(os.environ.get("GEMINI_AUDIO_FLUSH_BYTES", 4096)),
+            max_latency_ms=int(os.environ.get("GEMINI_AUDIO_FLUSH_MS", 100))
+        )
+
+        # Drops near-identical video frames; created in set_config for camera/screen
+        self.frame_gate: Optional[FrameGate] = None
+        # Drops silent microphone audio when GEMINI_VAD is on; created in set_config
+        self.vad: Optional[VoiceActivityGate] = None
+        # Called with ("activity_start" | "activity_end", monotonic time) as the VAD detects speech
+        self.on_activity: Optional[Callable[[str, float], Any]] = None
+
+        # Reconnect with exponential backoff when the socket drops mid-session
+        self.reconnect_attempts = int(os.environ.get("GEMINI_RECONNECT_ATTEMPTS", 5))
+        self.reconnect_base_delay = float(os.environ.get("GEMINI_RECONNECT_BASE_DELAY", 0.25))
+        self.reconnect_max_delay = float(os.environ.get("GEMINI_RECONNECT_MAX_DELAY", 8.0))
+        self.reconnects = 0
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._reconnect_failed = False
+        # Outgoing messages held while reconnecting, as (kind, JSON text)
+        self._pending: Deque[Tuple[str, str]] = deque()
+        self._pending_limit = int(os.environ.get("GEMINI_RECONNECT_BUFFER_MESSAGES", 256))
+        # Text turns replayed into a new session to restore context
+        self.history: List[Dict[str, Any]] = []
+        self.history_limit = int(os.environ.get("GEMINI_RESUME_HISTORY_TURNS", 20))
+        self._model_text: List[str] = []
+        # Native session resumption, for endpoints that support it
+        self.session_resumption = os.environ.get("GEMINI_SESSION_RESUMPTION", "false").lower() == "true"
+        self.resumption_handle: Optional[str] = None
+        # Called (and awaited, if it returns an awaitable) with
+        # "reconnecting", "reconnected" or "failed"
+        self.on_reconnect: Optional[Callable[[str], Any]] = None
+
+    def set_config(self, config_data: Dict[str, Any], fingerprint: Optional[str] = None) -> None:
         """
         Store systemPrompt, voice, etc.
 
@@ -42,9 +126,26 @@ class GeminiConnection:
                   'toolUsage': True,
                   'temperature': 0.6
                 }
+            fingerprint: setup_fingerprint(config_data), if the caller already has it
         """
         self.config = config_data
-        print(f"Configuration set: {json.dumps(config_data)}")
+        # Hashing a config with large tool schemas takes milliseconds; done once
+        # here rather than on every (re)connect
+        self.setup_key = fingerprint or setup_fingerprint(config_data)
+        # The full config can carry large tool schemas; log its shape only
+        log.debug("config_set", keys=sorted(config_data), mode=config_data.get("currentMode"),
+                  tools=len(config_data.get("tools") or []))
+
+        current_mode = config_data.get("currentMode")
+        gate_enabled = os.environ.get("GEMINI_FRAME_GATE", "true").lower() != "false"
+        if gate_enabled and current_mode in ["camera", "screen"]:
+            self.frame_gate = FrameGate(
+                current_mode,
+                max_interval=float(os.environ.get("GEMINI_FRAME_MAX_INTERVAL", 8.0))
+            )
+        else:
+            self.frame_gate = None
+        self.vad = create_vad(current_mode)
 
     async def connect(self) -> None:
         """
@@ -60,125 +161,61 @@ class GeminiConnection:
             raise ValueError("Configuration must be set before connecting.")
 
         try:
-            self.ws = await connect(
-                self.uri,
-                additional_headers={"Content-Type": "application/json"}
-            )
+            await self._open()
+        except Exception as e:
+            raise ConnectionError(f"Failed to connect to Gemini API: {str(e)}")
 
-            # Build 'setup' payload from config
-            response_modalities = ["TEXT"]
-            # Request AUDIO modality if a multimodal input mode is active
-            current_mode = self.config.get("currentMode")
-            if current_mode in ["audio", "camera", "screen"]:
-                response_modalities.append("AUDIO")
-
-            # Get temperature from config or use default
-            temperature = float(self.config.get("temperature", 0.6))
-            
-            # Get model ID from config or use default
-            model_id = self.config.get("modelId", self.model)
-            print(f"Using model: {model_id}")
-            
-            setup_message = {
-                "setup": {
-                    "model": f"models/{model_id}",
-                    "generation_config": {
-                        "response_modalities": response_modalities,
-                        "temperature": temperature,
-                        "speech_config": {
-                            "voice_config": {
-                                "prebuilt_voice_config": {
-                                    "voice_name": self.config.get("voice", "Puck")
-                                }
-                            }
-                        },
-                        "allow_interruptions": self.config.get("allowInterruptions", False)
-                    },
-                    "system_instruction": {
-                        "parts": [
-                            {
-                                "text": self.config.get(
-                                    "systemPrompt",
-                                    "You are a friendly AI Assistant..."
-                                )
-                            }
-                        ]
-                    }
-                }
-            }
+    async def _open(self) -> None:
+        """Open the socket, send 'setup' built from the stored config and wait for the ack."""
+        started_at = time.monotonic()
+        self.ws = await connect(
+            self.uri,
+            additional_headers={"Content-Type": "application/json"}
+        )
+        connect_seconds.observe(time.monotonic() - started_at)
+        payload = self._setup_message()
 
-            # Add tool_config if tools are available in the config
-            # self.config["tools"] is expected to be a list of Tool objects/dictionaries
-            # as prepared by the frontend and Composio client.
-            client_provided_tools = self.config.get("tools")
-            
-            # Only add tool_config if toolUsage is enabled
-            if self.config.get("toolUsage", True) and client_provided_tools and isinstance(client_provided_tools, list) and len(client_provided_tools) > 0:
-                setup_message["setup"]["tool_config"] = {
-                    "tools": client_provided_tools,
-                    "function_calling_config": {
-                        "mode": "AUTO" if self.config.get("functionCalling", True) else "NONE",
-                        "auto_function_response": self.config.get("autoFunctionResponse", True)
-                    }
-                }
-                print(f"Gemini setup: Including {len(client_provided_tools)} tools in tool_config.")
-            
-            # Add Google Search grounding if enabled
-            if self.config.get("googleSearch", False):
-                setup_message["setup"]["grounding_config"] = {
-                    "google_search_config": {
-                        "enable_search": True
-                    }
-                }
-                print("Gemini setup: Google Search grounding enabled.")
-                
-            # Add code execution config if enabled
-            if self.config.get("codeExecution", False):
-                setup_message["setup"]["code_execution_config"] = {
-                    "enabled": True
-                }
-                print("Gemini setup: Code execution enabled.")
-                
-            # Add structured output config if enabled
-            structured_output = self.config.get("structuredOutput", {})
-            if structured_output.get("enabled", False):
-                format_type = structured_output.get("format", "json").upper()
-                schema = structured_output.get("schema", "")
-                strict = structured_output.get("strict", True)
-                
-                structured_output_config = {
-                    "enabled": True,
-                    "response_mime_type": f"application/{format_type.lower()}"
-                }
-                
-                # Add schema if provided
-                if schema:
-                    try:
-                        # Parse schema to ensure it's valid JSON
-                        schema_json = json.loads(schema)
-                        structured_output_config["schema"] = schema_json
-                    except json.JSONDecodeError:
-                        print("Warning: Invalid JSON schema provided for structured output. Using without schema.")
-                
-                # Add strict validation setting
-                structured_output_config["strict_validation"] = strict
-                
-                setup_message["setup"]["structured_response_config"] = structured_output_config
-                print(f"Gemini setup: Structured output enabled with format {format_type}")
-
-            # Send setup as the first message
-            await self.ws.send(json.dumps(setup_message))
-
-            # Read the initial response from Gemini (often just an ack)
-            setup_response = await self.ws.recv()
-            print("Gemini setup response:", setup_response)
+        # Send setup as the first message
+        setup_sent_at = time.monotonic()
+        await self.ws.send(payload)
 
-        except Exception as e:
-            raise ConnectionError(f"Failed to connect to Gemini API: {str(e)}")
+        # Read the initial response from Gemini (often just an ack)
+        setup_response = await self.ws.recv()
+        setup_ack_seconds.observe(time.monotonic() - setup_sent_at)
+        try:
+            # Only which messages came back is logged, not their content
+            ack = sorted(serialization.loads(setup_response))
+        except (ValueError, TypeError):
+            ack = None
+        setup = setup_payload(self.config, self.model, self.setup_key)[1]["setup"]
+        log.info("gemini_setup_complete", model=setup["model"],
+                 tools=len(setup.get("tool_config", {}).get("tools", [])),
+                 google_search="grounding_config" in setup,
+                 code_execution="code_execution_config" in setup,
+                 structured_output="structured_response_config" in setup,
+                 resumed=bool(self.session_resumption and self.resumption_handle),
+                 setup_bytes=len(payload),
+                 ack=ack)
+
+    def _setup_message(self) -> str:
+        """
+        The serialized 'setup' message for the stored config.
+
+        Built and compacted once per config fingerprint (see gemini/setup.py);
+        only the session resumption handle differs between connections.
+
+        Returns:
+            JSON text of the setup message
+        """
+        payload, _ = setup_payload(self.config, self.model, self.setup_key)
+        if self.session_resumption:
+            # Ask for resumption handles, and resume from the latest one if we have it
+            payload = with_session_resumption(payload, self.resumption_handle)
+        return payload
 
     async def send_audio(self, base64_pcm: str) -> None:
         """
-        Send 16-bit PCM audio (base64) to Gemini under 'realtime_input'.
+        Queue base64 encoded 16-bit PCM audio for Gemini.
 
         Args:
             base64_pcm: Base64 encoded 16-bit PCM audio data
@@ -186,17 +223,77 @@ class GeminiConnection:
         if not self.ws:
             return
 
+        await self._add_audio(base64.b64decode(base64_pcm))
+
+    async def send_audio_pcm(self, pcm: bytes) -> None:
+        """
+        Queue raw 16-bit PCM audio for Gemini.
+
+        Used for binary frames from the browser: the PCM is only base64
+        encoded once, when the coalesced batch is sent upstream.
+
+        Args:
+            pcm: Raw little-endian 16-bit PCM audio bytes
+        """
+        if not self.ws:
+            return
+
+        await self._add_audio(pcm)
+
+    async def _add_audio(self, pcm: bytes) -> None:
+        """Pass microphone audio through the VAD, if any, into the coalescer."""
+        if self.vad is None:
+            await self.audio_buffer.add(pcm)
+            return
+        for event, value in self.vad.process(pcm):
+            if event == "audio":
+                await self.audio_buffer.add(value)
+            else:
+                await self._activity(event, value)
+
+    async def _activity(self, event: str, at: float) -> None:
+        """
+        Handle a speech start or end from the VAD.
+
+        Args:
+            event: "activity_start" or "activity_end"
+            at: Monotonic time speech started, or was last heard
+        """
+        # Audio of the utterance goes out before its end is signalled
+        if event == "activity_end":
+            await self.audio_buffer.flush()
+        if self.vad.mode == "gate":
+            # Gemini's own detection is off in this mode (see gemini/setup.py)
+            await self._send("activity", serialization.dumps({"realtime_input": {event: {}}}))
+        log.debug("voice_activity", activity=event)
+        if self.on_activity is not None:
+            self.on_activity(event, at)
+
+    async def flush_audio(self) -> None:
+        """Send any buffered audio now, e.g. on a turn boundary."""
+        await self.audio_buffer.flush()
+
+    async def _send_audio_chunk(self, pcm: bytes) -> None:
+        """
+        Send 16-bit PCM audio to Gemini under 'realtime_input'.
+
+        Args:
+            pcm: Raw 16-bit PCM audio bytes
+        """
+        if not self.ws:
+            return
+
         payload = {
             "realtime_input": {
                 "media_chunks": [
                     {
-                        "data": base64_pcm,
+                        "data": base64.b64encode(pcm).decode("ascii"),
                         "mime_type": "audio/pcm"
                     }
                 ]
             }
         }
-        await self.ws.send(json.dumps(payload))
+        await self._send("audio", serialization.dumps(payload))
 
     async def send_text(self, text: str) -> None:
         """
@@ -208,6 +305,9 @@ class GeminiConnection:
         if not self.ws:
             return
 
+        # A text turn ends the current audio turn
+        await self.flush_audio()
+
         text_msg = {
             "client_content": {
                 "turns": [
@@ -219,7 +319,30 @@ class GeminiConnection:
                 "turn_complete": True
             }
         }
-        await self.ws.send(json.dumps(text_msg))
+        self._remember({"role": "user", "parts": [{"text": text}]})
+        await self._send("text", serialization.dumps(text_msg))
+
+    async def send_function_responses(self, responses: List[Dict[str, Any]]) -> None:
+        """
+        Send the results of one turn's function calls to Gemini in a single message.
+
+        Args:
+            responses: functionResponse dicts, each with "name", "response"
+                       and, if Gemini supplied one, the call "id"
+        """
+        if not self.ws:
+            return
+
+        payload = {
+            "client_content": {
+                "turns": [{
+                    "role": "model", # Role for function response part
+                    "parts": [{"functionResponse": response} for response in responses]
+                }],
+                "turn_complete": True # Typically true after a function call
+            }
+        }
+        await self._send("tool", serialization.dumps(payload))
 
     async def send_image(self, base64_jpeg: str) -> None:
         """
@@ -231,6 +354,10 @@ class GeminiConnection:
         if not self.ws:
             return
 
+        # Skip frames that are near-identical to the last one sent
+        if self.frame_gate and not self.frame_gate.should_forward(base64.b64decode(base64_jpeg)):
+            return
+
         payload = {
             "realtime_input": {
                 "media_chunks": [
@@ -241,21 +368,193 @@ class GeminiConnection:
                 ]
             }
         }
-        await self.ws.send(json.dumps(payload))
+        await self._send("image", serialization.dumps(payload))
+
+    def observe(self, response: Dict[str, Any]) -> None:
+        """
+        Note a decoded server message, for history replay and resumption.
+
+        The relay calls this for every message it parses (audio-only
+        messages take the fast path and carry nothing worth replaying).
+
+        Args:
+            response: Server message from Gemini
+        """
+        server_content = response.get("serverContent")
+        if server_content:
+            for part in server_content.get("modelTurn", {}).get("parts", []):
+                if "text" in part:
+                    self._model_text.append(part["text"])
+            if server_content.get("turnComplete") and self._model_text:
+                self._remember({"role": "model", "parts": [{"text": "".join(self._model_text)}]})
+                self._model_text = []
+
+        update = response.get("sessionResumptionUpdate")
+        if update and update.get("resumable") and update.get("newHandle"):
+            self.resumption_handle = update["newHandle"]
+        if "goAway" in response:
+            log.info("gemini_go_away", time_left=response["goAway"].get("timeLeft"))
+
+    def _remember(self, turn: Dict[str, Any]) -> None:
+        """Append a text turn to the replay history, keeping the newest history_limit turns."""
+        self.history.append(turn)
+        if len(self.history) > self.history_limit:
+            del self.history[:len(self.history) - self.history_limit]
+
+    async def _send(self, kind: str, payload: str) -> None:
+        """
+        Send a message, or hold it while the socket is being re-established.
+
+        Args:
+            kind: "audio", "image", "activity", "text" or "tool"
+            payload: Serialized message
+        """
+        if self._reconnect_task is not None:
+            self._hold(kind, payload)
+            return
+        try:
+            await self.ws.send(payload)
+        except ConnectionClosed as e:
+            if not self._should_reconnect(e):
+                raise
+            self._hold(kind, payload)
+            self._start_reconnect(e)
+
+    def _hold(self, kind: str, payload: str) -> None:
+        """Buffer a message for after the reconnect; media is dropped first when full."""
+        if kind == "image":
+            # Only the newest frame is worth sending once the session is back
+            for index, (held_kind, _) in enumerate(self._pending):
+                if held_kind == "image":
+                    del self._pending[index]
+                    break
+        if len(self._pending) >= self._pending_limit:
+            for index, (held_kind, _) in enumerate(self._pending):
+                if held_kind in ("audio", "image"):
+                    del self._pending[index]
+                    reconnect_buffer_dropped.inc(kind=held_kind)
+                    break
+            else:
+                if kind in ("audio", "image"):
+                    reconnect_buffer_dropped.inc(kind=kind)
+                    return
+        self._pending.append((kind, payload))
+
+    def _should_reconnect(self, error: ConnectionClosed) -> bool:
+        if self._closing or self._reconnect_failed or self.reconnect_attempts <= 0 or not self.config:
+            return False
+        close = error.rcvd or error.sent
+        return close is None or close.code not in FATAL_CLOSE_CODES
+
+    def _start_reconnect(self, error: ConnectionClosed) -> None:
+        if self._reconnect_task is None:
+            close = error.rcvd or error.sent
+            log.warning("gemini_connection_lost", code=close.code if close else None,
+                        reason=close.reason if close else None, reconnects=self.reconnects)
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _notify(self, state: str) -> None:
+        if self.on_reconnect is not None:
+            try:
+                result = self.on_reconnect(state)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                log.warning("reconnect_callback_failed", state=state, error=e)
+
+    async def _reconnect(self) -> None:
+        """
+        Re-establish the session: reopen with backoff, replay setup and
+        history, then send what was held during the gap.
+
+        Raises:
+            ConnectionError: If every attempt failed
+        """
+        started_at = time.monotonic()
+        await self._notify("reconnecting")
+        # The partial model turn is lost with the old socket
+        self._model_text = []
+        last_error: Optional[Exception] = None
+        try:
+            for attempt in range(self.reconnect_attempts):
+                if attempt:
+                    delay = min(self.reconnect_max_delay, self.reconnect_base_delay * 2 ** (attempt - 1))
+                    # Jitter so sessions dropped together do not reconnect in lockstep
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                try:
+                    await self._open()
+                    await self._replay_history()
+                    while self._pending:
+                        kind, payload = self._pending.popleft()
+                        await self.ws.send(payload)
+                    break
+                except Exception as e:
+                    last_error = e
+                    log.warning("gemini_reconnect_attempt_failed", attempt=attempt + 1, error=e)
+                    if self.ws is not None:
+                        await self.ws.close()
+            else:
+                reconnect_seconds.observe(time.monotonic() - started_at, result="failed")
+                self._reconnect_failed = True
+                self._pending.clear()
+                await self._notify("failed")
+                raise ConnectionError(f"Gemini reconnect failed after {self.reconnect_attempts} attempts: {last_error}")
+        finally:
+            self._reconnect_task = None
+
+        self.reconnects += 1
+        reconnect_seconds.observe(time.monotonic() - started_at, result="ok")
+        log.info("gemini_reconnected", attempts=attempt + 1, seconds=round(time.monotonic() - started_at, 3),
+                 history_turns=len(self.history), resumed=self.resumption_handle is not None)
+        await self._notify("reconnected")
+
+    async def _replay_history(self) -> None:
+        """Restore conversation context in a fresh session from the text history."""
+        if not self.history or (self.session_resumption and self.resumption_handle):
+            # Nothing to replay, or the server restores the context itself
+            return
+        await self.ws.send(serialization.dumps({
+            "client_content": {"turns": list(self.history), "turn_complete": False}
+        }))
+
+    def is_open(self) -> bool:
+        """Whether the Gemini WebSocket is connected and not closed."""
+        return self.ws is not None and getattr(self.ws, "close_code", None) is None
 
     async def receive(self) -> Optional[str]:
         """
         Wait for next message from Gemini.
 
+        If the socket drops, the session is re-established transparently
+        and receiving continues on the new socket.
+
         Returns:
             JSON response string or None if connection is closed
+
+        Raises:
+            ConnectionClosed: If the connection closed for good
+            ConnectionError: If reconnecting failed
         """
-        if not self.ws:
-            return None
-        return await self.ws.recv()
+        while True:
+            if self._reconnect_task is not None:
+                await asyncio.shield(self._reconnect_task)
+            if not self.ws:
+                return None
+            try:
+                return await self.ws.recv()
+            except ConnectionClosed as e:
+                if not self._should_reconnect(e):
+                    raise
+                self._start_reconnect(e)
 
     async def close(self) -> None:
         """Close the WebSocket connection."""
+        self._closing = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        self._pending.clear()
+        self.audio_buffer.clear()
         if self.ws:
             await self.ws.close()
             self.ws = None
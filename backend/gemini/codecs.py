@@ -0,0 +1,237 @@
+"""
+Downstream audio codecs for browser clients.
+
+Gemini speaks 24 kHz PCM16, about 48 KB/s per voice session before base64.
+A client can list the codecs it decodes in its config ("audioCodecs", in
+order of preference) and the relay encodes model audio with the first one
+it supports before sending it as a binary frame (see gemini/frames.py):
+
+    mulaw   G.711 mu-law, 8 bits per sample (2:1), needs numpy
+    opus    Opus in 20 ms packets (~24 kbit/s by default, ~16:1), needs
+            opuslib and the libopus shared library
+
+Encoders are stateful per session; DownstreamEncoder runs them on a shared
+worker pool, one chunk at a time and in order.
+"""
+
+import asyncio
+import binascii
+import struct
+import time
+from concurrent.futures import Executor
+from typing import List, Optional, Union
+from core.metrics import metrics
+from gemini.frames import FRAME_AUDIO_MULAW, FRAME_AUDIO_OPUS, build_frame
+
+try:
+    import numpy as np
+    has_numpy = True
+except ImportError:
+    has_numpy = False
+
+try:
+    import opuslib
+    # opuslib binds libopus at import; make sure it really loaded
+    opuslib.Encoder(24000, 1, opuslib.APPLICATION_VOIP)
+    has_opus = True
+except Exception:
+    has_opus = False
+
+# Preference order used when a client lists several codecs
+SUPPORTED_CODECS = ("opus", "mulaw")
+
+# Opus packets within one frame payload are each prefixed with this length
+OPUS_PACKET_LENGTH = struct.Struct("<H")
+
+encode_seconds = metrics.histogram(
+    "relay_audio_encode_seconds",
+    "Time to encode one Gemini audio chunk for the browser",
+    ("codec",)
+)
+
+
+class MulawEncoder:
+    """PCM16 to G.711 mu-law via a 64K-entry lookup table."""
+
+    name = "mulaw"
+    frame_kind = FRAME_AUDIO_MULAW
+    _table = None
+
+    def __init__(self, sample_rate: int = 24000):
+        self.sample_rate = sample_rate
+        if MulawEncoder._table is None:
+            MulawEncoder._table = self._build_table()
+
+    @staticmethod
+    def _build_table():
+        # ITU-T G.711 reference algorithm on the 14-bit magnitude
+        samples = np.arange(-32768, 32768, dtype=np.int32)
+        value = samples >> 2
+        mask = np.where(value < 0, 0x7F, 0xFF)
+        magnitude = np.minimum(np.abs(value), 8159) + 0x21
+        segment = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), magnitude)
+        encoded = np.where(
+            segment >= 8,
+            0x7F,
+            (np.minimum(segment, 7) << 4) | ((magnitude >> (np.minimum(segment, 7) + 1)) & 0x0F)
+        ) ^ mask
+        # Index by the sample's unsigned 16-bit representation
+        table = np.empty(65536, dtype=np.uint8)
+        table[samples.astype(np.uint16)] = encoded
+        return table
+
+    def encode(self, pcm: bytes) -> bytes:
+        samples = np.frombuffer(pcm, dtype="<u2", count=len(pcm) // 2)
+        return self._table[samples].tobytes()
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class OpusEncoder:
+    """
+    PCM16 to Opus, 20 ms per packet.
+
+    Samples that do not fill a whole packet are kept for the next chunk;
+    flush() pads and emits them at the end of a turn.
+    """
+
+    name = "opus"
+    frame_kind = FRAME_AUDIO_OPUS
+
+    def __init__(self, sample_rate: int = 24000, bitrate: int = 24000):
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate // 50
+        self._encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+        self._encoder.bitrate = bitrate
+        self._pending = bytearray()
+
+    def encode(self, pcm: bytes) -> bytes:
+        self._pending += pcm
+        frame_bytes = self.frame_samples * 2
+        packets = bytearray()
+        offset = 0
+        while len(self._pending) - offset >= frame_bytes:
+            packet = self._encoder.encode(bytes(self._pending[offset:offset + frame_bytes]), self.frame_samples)
+            packets += OPUS_PACKET_LENGTH.pack(len(packet)) + packet
+            offset += frame_bytes
+        del self._pending[:offset]
+        return bytes(packets)
+
+    def flush(self) -> bytes:
+        if not self._pending:
+            return b""
+        self._pending += bytes(self.frame_samples * 2 - len(self._pending))
+        return self.encode(b"")
+
+
+def available_codecs() -> List[str]:
+    """Codecs this process can encode, in preference order."""
+    available = []
+    if has_opus:
+        available.append("opus")
+    if has_numpy:
+        available.append("mulaw")
+    return available
+
+
+def negotiate_codec(requested: Optional[List[str]], allowed: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Pick the downstream codec for a session.
+
+    Args:
+        requested: The client's "audioCodecs" list, most preferred first
+        allowed: Codecs enabled by configuration (default: all available)
+
+    Returns:
+        The first requested codec that is allowed and available, or None to
+        keep sending PCM
+    """
+    if not requested or not isinstance(requested, list):
+        return None
+    usable = set(available_codecs())
+    if allowed is not None:
+        usable &= set(allowed)
+    for codec in requested:
+        if isinstance(codec, str) and codec.lower() in usable:
+            return codec.lower()
+    return None
+
+
+def create_encoder(codec: str, sample_rate: int = 24000, opus_bitrate: int = 24000):
+    """
+    Create a per-session encoder.
+
+    Args:
+        codec: A name returned by negotiate_codec()
+        sample_rate: Sample rate of the PCM that will be encoded
+        opus_bitrate: Target bitrate for Opus in bits per second
+
+    Returns:
+        An encoder with encode(pcm) -> bytes and flush() -> bytes
+
+    Raises:
+        ValueError: If the codec is unknown or unavailable
+    """
+    if codec == "mulaw" and has_numpy:
+        return MulawEncoder(sample_rate)
+    if codec == "opus" and has_opus:
+        return OpusEncoder(sample_rate, opus_bitrate)
+    raise ValueError(f"Audio codec not available: {codec}")
+
+
+class DownstreamEncoder:
+    """
+    Runs a session's encoder on a worker pool and wraps the output in frames.
+
+    send_to_frontend awaits each call before reading the next Gemini
+    message, so chunks reach the encoder in order even though the work
+    happens on pool threads.
+    """
+
+    def __init__(self, encoder, executor: Executor):
+        """
+        Args:
+            encoder: Per-session encoder from create_encoder()
+            executor: Shared worker pool
+        """
+        self.encoder = encoder
+        self.executor = executor
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def codec(self) -> str:
+        return self.encoder.name
+
+    async def encode(self, base64_pcm: Union[str, bytes]) -> Optional[bytes]:
+        """
+        Encode one base64 PCM chunk from Gemini.
+
+        Returns:
+            A binary frame, or None if the encoder is still buffering
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._encode, base64_pcm)
+
+    async def flush(self) -> Optional[bytes]:
+        """Emit whatever the encoder is holding back, e.g. at the end of a turn."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._flush)
+
+    def _encode(self, base64_pcm: Union[str, bytes]) -> Optional[bytes]:
+        started_at = time.perf_counter()
+        pcm = binascii.a2b_base64(base64_pcm)
+        payload = self.encoder.encode(pcm)
+        encode_seconds.observe(time.perf_counter() - started_at, codec=self.codec)
+        self.bytes_in += len(pcm)
+        return self._frame(payload)
+
+    def _flush(self) -> Optional[bytes]:
+        return self._frame(self.encoder.flush())
+
+    def _frame(self, payload: bytes) -> Optional[bytes]:
+        if not payload:
+            return None
+        self.bytes_out += len(payload)
+        return build_frame(self.encoder.frame_kind, payload, self.encoder.sample_rate)
@@ -0,0 +1,130 @@
+import io
+import time
+from typing import Optional
+from core.log import get_logger
+
+log = get_logger("gemini.frames")
+
+try:
+    import numpy as np
+    from PIL import Image
+    has_imaging = True
+except ImportError:
+    has_imaging = False
+
+# Side length of the grayscale thumbnail frames are compared on
+THUMBNAIL_SIZE = 32
+
+# Per-mode tuning. A frame counts as changed when more than
+# changed_fraction of thumbnail pixels moved by more than pixel_threshold
+# grey levels. Screen content changes in small regions (a line of text,
+# a cursor), so it uses a lower area threshold than camera video.
+MODE_SETTINGS = {
+    "camera": {"pixel_threshold": 12, "changed_fraction": 0.02},
+    "screen": {"pixel_threshold": 8, "changed_fraction": 0.002},
+}
+
+
+class FrameGate:
+    """
+    Drops near-identical video frames before they are sent to Gemini.
+
+    Each JPEG is decoded at reduced scale into a small grayscale thumbnail
+    and compared against the last forwarded frame. While the scene is
+    static the minimum interval between forwarded frames doubles, up to
+    max_interval; as soon as the scene changes it snaps back to
+    min_interval. A frame is always forwarded once max_interval has passed
+    so Gemini never works from a badly stale view.
+    """
+
+    def __init__(self, mode: str, min_interval: float = 0.5, max_interval: float = 8.0):
+        """
+        Args:
+            mode: Capture mode, "camera" or "screen"
+            min_interval: Shortest gap in seconds between forwarded frames
+            max_interval: Longest gap in seconds before a frame is forced through
+        """
+        settings = MODE_SETTINGS.get(mode, MODE_SETTINGS["camera"])
+        self.mode = mode
+        self.pixel_threshold = settings["pixel_threshold"]
+        self.changed_fraction = settings["changed_fraction"]
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+
+        self.interval = min_interval
+        self.last_thumbnail = None
+        self.last_forwarded_at = 0.0
+
+        self.forwarded = 0
+        self.dropped = 0
+
+    def should_forward(self, jpeg: bytes, now: Optional[float] = None) -> bool:
+        """
+        Decide whether a frame is worth sending upstream.
+
+        Args:
+            jpeg: Encoded JPEG bytes
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            True if the frame should be forwarded to Gemini
+        """
+        now = time.monotonic() if now is None else now
+        elapsed = now - self.last_forwarded_at
+
+        if elapsed < self.min_interval:
+            return self._drop()
+
+        thumbnail = self._thumbnail(jpeg)
+        if thumbnail is None or self.last_thumbnail is None:
+            return self._forward(thumbnail, now, changed=True)
+
+        if self._changed(thumbnail):
+            return self._forward(thumbnail, now, changed=True)
+
+        if elapsed >= self.interval:
+            # Static scene: send a refresh, then back off further
+            return self._forward(thumbnail, now, changed=False)
+
+        return self._drop()
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "forwarded": self.forwarded,
+            "dropped": self.dropped,
+            "interval": self.interval,
+        }
+
+    def _changed(self, thumbnail) -> bool:
+        diff = np.abs(thumbnail - self.last_thumbnail)
+        return float(np.mean(diff > self.pixel_threshold)) > self.changed_fraction
+
+    def _forward(self, thumbnail, now: float, changed: bool) -> bool:
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        self.last_thumbnail = thumbnail
+        self.last_forwarded_at = now
+        self.forwarded += 1
+        return True
+
+    def _drop(self) -> bool:
+        self.dropped += 1
+        return False
+
+    @staticmethod
+    def _thumbnail(jpeg: bytes):
+        """Decode a JPEG at reduced scale into a small grayscale array."""
+        if not has_imaging:
+            return None
+        try:
+            image = Image.open(io.BytesIO(jpeg))
+            # Let the JPEG decoder skip most of the work via DCT scaling
+            image.draft("L", (THUMBNAIL_SIZE * 2, THUMBNAIL_SIZE * 2))
+            image = image.convert("L").resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.BILINEAR)
+            return np.asarray(image, dtype=np.int16)
+        except Exception as e:
+            log.warning("frame_decode_failed", category="gemini.frame_error", error=e)
+            return None
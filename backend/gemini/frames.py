@@ -0,0 +1,72 @@
+"""
+Binary WebSocket frame format shared by the browser and the relay.
+
+Every binary frame starts with a 4 byte little-endian header followed by the
+raw payload:
+
+    offset  size  field
+    0       1     kind         (FRAME_AUDIO_PCM16, ...)
+    1       1     version      (FRAME_VERSION)
+    2       2     sample_rate  (Hz, 0 when not applicable)
+
+PCM16 payloads are little-endian 16-bit mono PCM, exactly the bytes that
+would otherwise be base64 encoded into a JSON "audio" message. Compressed
+downstream audio (see gemini/codecs.py) uses its own frame kinds.
+"""
+
+import struct
+from typing import NamedTuple
+
+FRAME_VERSION = 1
+
+# Frame kinds
+FRAME_AUDIO_PCM16 = 0x01
+FRAME_AUDIO_MULAW = 0x02  # G.711 mu-law, one byte per sample
+FRAME_AUDIO_OPUS = 0x03   # Opus packets, each prefixed with a u16 length
+
+HEADER = struct.Struct("<BBH")
+HEADER_SIZE = HEADER.size
+
+
+class BinaryFrame(NamedTuple):
+    kind: int
+    sample_rate: int
+    payload: memoryview
+
+
+def parse_frame(data: bytes) -> BinaryFrame:
+    """
+    Split a binary WebSocket frame into its header fields and payload.
+
+    Args:
+        data: Raw bytes received from the WebSocket
+
+    Returns:
+        BinaryFrame whose payload is a zero-copy view into data
+
+    Raises:
+        ValueError: If the frame is truncated or uses an unsupported version
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"Binary frame too short: {len(data)} bytes")
+
+    kind, version, sample_rate = HEADER.unpack_from(data)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported binary frame version: {version}")
+
+    return BinaryFrame(kind, sample_rate, memoryview(data)[HEADER_SIZE:])
+
+
+def build_frame(kind: int, payload: bytes, sample_rate: int = 0) -> bytes:
+    """
+    Prefix a payload with the binary frame header.
+
+    Args:
+        kind: Frame kind constant
+        payload: Raw payload bytes
+        sample_rate: Sample rate in Hz for audio frames
+
+    Returns:
+        Header and payload as a single bytes object
+    """
+    return HEADER.pack(kind, FRAME_VERSION, sample_rate) + payload
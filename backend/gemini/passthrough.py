@@ -0,0 +1,123 @@
+"""
+Fast path for Gemini messages that carry nothing but one audio part.
+
+While the model speaks, almost every server message has the shape
+
+    {"serverContent": {"modelTurn": {"parts": [{"inlineData":
+        {"mimeType": "audio/pcm;rate=24000", "data": "<base64 PCM>"}}]}}}
+
+match_audio_only() recognizes exactly that shape by matching the fixed text
+around the payload, without building a Python object for the message, and
+returns the base64 span and sample rate. audio_frame() turns it into a binary PCM
+frame for the browser (see gemini/frames.py); audio_message() splices it
+into the JSON "audio" message for clients that did not ask for binary audio. Anything else - other parts,
+turnComplete, usage metadata, reordered keys - returns None and takes the
+regular decode path, so the fast path never changes what is relayed.
+"""
+
+import binascii
+import re
+from typing import NamedTuple, Optional, Union
+from gemini.frames import FRAME_AUDIO_PCM16, FRAME_VERSION, HEADER
+
+# Gemini Live's output format when the mime type does not say otherwise
+DEFAULT_OUTPUT_SAMPLE_RATE = 24000
+
+# Everything up to the opening quote of the base64 data...
+_HEAD = (
+    rb'\s*\{\s*"serverContent"\s*:\s*\{\s*"modelTurn"\s*:\s*\{\s*"parts"\s*:\s*\[\s*'
+    rb'\{\s*"inlineData"\s*:\s*\{\s*'
+    rb'"mimeType"\s*:\s*"audio/pcm(?:;\s*rate=(?P<rate>\d+))?"\s*,\s*"data"\s*:\s*"'
+)
+# ...and everything after its closing quote. The data itself is found with
+# str.find, which is far cheaper than matching it with a regex.
+_TAIL = rb'"\s*\}\s*\}\s*\]\s*\}\s*\}\s*\}\s*'
+
+_PATTERNS = {
+    bytes: (re.compile(_HEAD), re.compile(_TAIL), b'"', b"\\"),
+    str: (re.compile(_HEAD.decode("ascii")), re.compile(_TAIL.decode("ascii")), '"', "\\"),
+}
+
+
+class AudioPart(NamedTuple):
+    sample_rate: int
+    data: Union[str, bytes]
+
+
+def match_audio_only(raw: Union[str, bytes]) -> Optional[AudioPart]:
+    """
+    Recognize a server message consisting of a single audio part.
+
+    Args:
+        raw: Message exactly as received from the Gemini WebSocket
+
+    Returns:
+        AudioPart with the base64 payload, or None for any other message
+    """
+    patterns = _PATTERNS.get(type(raw))
+    if patterns is None:
+        return None
+    head, tail, quote, backslash = patterns
+
+    match = head.match(raw)
+    if match is None:
+        return None
+    start = match.end()
+    end = raw.find(quote, start)
+    # A backslash means an escape sequence, which base64 never needs
+    if end < 0 or raw.find(backslash, start, end) >= 0 or tail.fullmatch(raw, end) is None:
+        return None
+
+    rate = match.group("rate")
+    return AudioPart(int(rate) if rate else DEFAULT_OUTPUT_SAMPLE_RATE, raw[start:end])
+
+
+def audio_frame(base64_pcm: Union[str, bytes], sample_rate: int = DEFAULT_OUTPUT_SAMPLE_RATE) -> bytes:
+    """
+    Decode base64 PCM into a binary audio frame for the browser.
+
+    Args:
+        base64_pcm: Base64 16-bit PCM as sent by Gemini
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        Frame header followed by the raw PCM bytes
+
+    Raises:
+        binascii.Error: If the payload is not valid base64
+    """
+    return HEADER.pack(FRAME_AUDIO_PCM16, FRAME_VERSION, sample_rate) + binascii.a2b_base64(base64_pcm)
+
+
+def audio_message(base64_pcm: Union[str, bytes]) -> str:
+    """
+    The browser's JSON "audio" message, built without re-encoding the payload.
+
+    Base64 needs no JSON escaping, so the span from Gemini is spliced in as is.
+
+    Args:
+        base64_pcm: Base64 16-bit PCM as sent by Gemini
+
+    Returns:
+        JSON text of {"type": "audio", "data": base64_pcm}
+    """
+    if isinstance(base64_pcm, bytes):
+        base64_pcm = base64_pcm.decode("ascii")
+    return '{"type":"audio","data":"' + base64_pcm + '"}'
+
+
+def sample_rate_from_mime(mime_type: str) -> int:
+    """
+    Sample rate from an "audio/pcm;rate=N" mime type.
+
+    Args:
+        mime_type: inlineData mimeType
+
+    Returns:
+        The rate in Hz, or DEFAULT_OUTPUT_SAMPLE_RATE if none is given
+    """
+    for param in mime_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key == "rate" and value.isdigit():
+            return int(value)
+    return DEFAULT_OUTPUT_SAMPLE_RATE
@@ -0,0 +1,248 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from cachetools import TTLCache
+from websockets.exceptions import ConnectionClosed
+from gemini.client import GeminiConnection
+from gemini.setup import setup_fingerprint
+from core import serialization
+from core.metrics import metrics
+from core.log import get_logger
+
+log = get_logger("gemini.pool")
+
+acquire_seconds = metrics.histogram(
+    "gemini_pool_acquire_seconds",
+    "Time to obtain a connected Gemini session, by pool hit or miss",
+    ("result",)
+)
+
+
+class GeminiSessionPool:
+    """
+    Keeps already-handshaken Gemini sessions warm, keyed by setup config.
+
+    Opening a session costs a TLS + WebSocket handshake and the 'setup'
+    round trip, and every warm session is a billable Gemini session. The
+    pool hands out a pre-connected session whose setup fingerprint matches
+    the client's config. A replacement is warmed in the background only
+    for configs acquired at least refill_after times, each within
+    demand_window seconds of the previous one, so one-off configs never
+    get a warm session. Sessions carry conversation state, so they are
+    never returned to the pool once handed out.
+
+    While idle, each session is read by a watcher task, so server messages
+    are consumed and a close or goAway retires the session at once instead
+    of at handoff. Idle sessions are closed after idle_timeout seconds.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 4,
+        per_config: int = 1,
+        idle_timeout: float = 60.0,
+        refill_after: int = 2,
+        demand_window: float = 300.0,
+        factory: Callable[[], GeminiConnection] = GeminiConnection
+    ):
+        """
+        Args:
+            max_size: Maximum number of warm sessions across all configs
+                      (0 disables pooling)
+            per_config: Warm sessions to keep per setup fingerprint
+            idle_timeout: Seconds a warm session may sit unused
+            refill_after: Acquisitions of a config before sessions are warmed for it
+            demand_window: Seconds after which a config's demand count resets
+            factory: Callable creating a new GeminiConnection
+        """
+        self.max_size = max_size
+        self.per_config = per_config
+        self.idle_timeout = idle_timeout
+        self.refill_after = max(1, refill_after)
+        self.factory = factory
+
+        self._idle: Dict[str, List[Tuple[GeminiConnection, float]]] = {}
+        self._warming: Dict[str, int] = {}
+        # Recent acquisitions per fingerprint; a key expires demand_window after its last use
+        self._demand = TTLCache(maxsize=1024, ttl=demand_window)
+        self._watchers: Dict[GeminiConnection, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._reaper: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.hits = 0
+        self.misses = 0
+
+    async def acquire(self, config: Dict[str, Any]) -> GeminiConnection:
+        """
+        Get a connected GeminiConnection for the given config.
+
+        Args:
+            config: Client configuration dict
+
+        Returns:
+            A GeminiConnection that has completed its setup handshake
+
+        Raises:
+            ConnectionError: If a new session has to be opened and fails
+        """
+        started_at = time.monotonic()
+        if self.max_size <= 0 or self._closed:
+            gemini = await self._open(config)
+            acquire_seconds.observe(time.monotonic() - started_at, result="disabled")
+            return gemini
+
+        self._ensure_reaper()
+        key = setup_fingerprint(config)
+
+        gemini = await self._take(key)
+        if gemini:
+            self.hits += 1
+            gemini.set_config(config, key)
+            acquire_seconds.observe(time.monotonic() - started_at, result="hit")
+        else:
+            self.misses += 1
+            gemini = await self._open(config, key)
+            acquire_seconds.observe(time.monotonic() - started_at, result="miss")
+
+        demand = self._demand[key] = self._demand.get(key, 0) + 1
+        if demand >= self.refill_after:
+            self._schedule_warm(key, config)
+        return gemini
+
+    def idle_count(self) -> int:
+        return sum(len(entries) for entries in self._idle.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "idle": self.idle_count(),
+            "warming": sum(self._warming.values()),
+            "configs": len(self._idle),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    async def close(self) -> None:
+        """Stop background work and close every warm session."""
+        self._closed = True
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        for task in list(self._tasks):
+            task.cancel()
+        self._watchers.clear()
+
+        idle, self._idle = self._idle, {}
+        for entries in idle.values():
+            for gemini, _ in entries:
+                await gemini.close()
+
+    async def _open(self, config: Dict[str, Any], key: Optional[str] = None) -> GeminiConnection:
+        gemini = self.factory()
+        gemini.set_config(config, key)
+        await gemini.connect()
+        return gemini
+
+    async def _take(self, key: str) -> Optional[GeminiConnection]:
+        """Pop the freshest usable warm session for key, discarding dead ones."""
+        while self._idle.get(key):
+            entries = self._idle[key]
+            gemini, _ = entries.pop()
+            if not entries:
+                del self._idle[key]
+            # The new owner reads the socket from now on
+            await self._unwatch(gemini)
+            if gemini.is_open():
+                return gemini
+            self._spawn(gemini.close())
+        return None
+
+    async def _unwatch(self, gemini: GeminiConnection) -> None:
+        watcher = self._watchers.pop(gemini, None)
+        if watcher is not None and not watcher.done():
+            watcher.cancel()
+            # Two readers may not wait on the socket at once
+            await asyncio.wait([watcher])
+
+    async def _watch(self, key: str, gemini: GeminiConnection) -> None:
+        """Read an idle session's socket until it closes or the server asks it to go away."""
+        reason = "closed"
+        try:
+            while True:
+                response = serialization.loads(await gemini.ws.recv())
+                # Keeps resumption handles current
+                gemini.observe(response)
+                if "goAway" in response:
+                    reason = "go_away"
+                    break
+        except ConnectionClosed:
+            pass
+        except Exception as e:
+            reason = "error"
+            log.warning("pool_watch_failed", error=e)
+
+        self._watchers.pop(gemini, None)
+        entries = self._idle.get(key, [])
+        self._idle[key] = [entry for entry in entries if entry[0] is not gemini]
+        if not self._idle[key]:
+            del self._idle[key]
+        log.info("pool_session_retired", reason=reason)
+        await gemini.close()
+
+    def _schedule_warm(self, key: str, config: Dict[str, Any]) -> None:
+        total = self.idle_count() + sum(self._warming.values())
+        for_key = len(self._idle.get(key, [])) + self._warming.get(key, 0)
+        if total >= self.max_size or for_key >= self.per_config:
+            return
+
+        self._warming[key] = self._warming.get(key, 0) + 1
+        self._spawn(self._warm(key, dict(config)))
+
+    async def _warm(self, key: str, config: Dict[str, Any]) -> None:
+        try:
+            gemini = await self._open(config, key)
+        except Exception as e:
+            log.warning("pool_warm_failed", error=e)
+            return
+        finally:
+            self._warming[key] -= 1
+            if not self._warming[key]:
+                del self._warming[key]
+
+        if self._closed:
+            await gemini.close()
+            return
+        self._idle.setdefault(key, []).append((gemini, time.monotonic()))
+        self._watchers[gemini] = self._spawn(self._watch(key, gemini))
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        """Periodically close sessions that sat unused for too long or died."""
+        while True:
+            await asyncio.sleep(max(self.idle_timeout / 2, 1.0))
+            cutoff = time.monotonic() - self.idle_timeout
+            stale = []
+            for key in list(self._idle):
+                keep = []
+                for gemini, warmed_at in self._idle[key]:
+                    if warmed_at >= cutoff and gemini.is_open():
+                        keep.append((gemini, warmed_at))
+                    else:
+                        stale.append(gemini)
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+
+            for gemini in stale:
+                await self._unwatch(gemini)
+                await gemini.close()
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
@@ -0,0 +1,281 @@
+"""
+Builds the 'setup' message that opens every Gemini Live session.
+
+The browser's config can carry hundreds of KB of Composio tool schemas,
+and the same config is used for many sessions (every reconnect, every
+pooled warm-up, every user of the same mode). setup_payload() builds and
+serializes the message once per setup fingerprint and returns the cached
+JSON text afterwards.
+
+Tool schemas are compacted on the way (GEMINI_SETUP_COMPACT_TOOLS=false
+turns this off):
+    - function declarations repeated across tool entries are sent once
+    - JSON Schema annotations Gemini does not use (title, examples,
+      $schema, ...) are dropped
+    - descriptions are clipped to GEMINI_TOOL_DESCRIPTION_MAX characters
+      for functions and GEMINI_PARAM_DESCRIPTION_MAX for parameters
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+from cachetools import LRUCache
+from core import serialization
+from core.log import get_logger
+from gemini.vad import VAD_MODE, vad_enabled_for
+
+log = get_logger("gemini.setup")
+
+# Config keys that feed into the 'setup' message
+SETUP_CONFIG_KEYS = (
+    "modelId", "voice", "currentMode", "systemPrompt", "temperature",
+    "allowInterruptions", "tools", "toolUsage", "functionCalling",
+    "autoFunctionResponse", "googleSearch", "codeExecution", "structuredOutput"
+)
+
+COMPACT_TOOLS = os.getenv("GEMINI_SETUP_COMPACT_TOOLS", "true").lower() != "false"
+TOOL_DESCRIPTION_MAX = int(os.getenv("GEMINI_TOOL_DESCRIPTION_MAX", 1024))
+PARAM_DESCRIPTION_MAX = int(os.getenv("GEMINI_PARAM_DESCRIPTION_MAX", 256))
+
+# Schema keys that only document the schema; the model never needs them
+DROPPED_SCHEMA_KEYS = frozenset({"title", "examples", "example", "$schema", "$id", "$comment", "readOnly", "writeOnly"})
+
+# Serialized setups by (fingerprint, default model)
+_payloads: LRUCache = LRUCache(maxsize=int(os.getenv("GEMINI_SETUP_CACHE_SIZE", 32)))
+
+
+def setup_fingerprint(config: Dict[str, Any]) -> str:
+    """
+    Hash the parts of a client config that determine the Gemini setup.
+
+    Two configs with the same fingerprint produce identical 'setup'
+    messages, so a session opened for one can be used for the other.
+
+    Args:
+        config: Client configuration dict
+
+    Returns:
+        Hex digest identifying the setup
+    """
+    relevant = {key: config.get(key) for key in SETUP_CONFIG_KEYS}
+    return hashlib.sha256(serialization.dumps_canonical(relevant)).hexdigest()
+
+
+def clip_description(text: Any, limit: int) -> Any:
+    if isinstance(text, str) and limit > 0 and len(text) > limit:
+        return text[:limit].rstrip() + "..."
+    return text
+
+
+def compact_schema(schema: Any) -> Any:
+    """
+    Copy of a parameter schema without documentation-only keys and with
+    parameter descriptions clipped.
+
+    Property names are never dropped, even one called "title".
+    """
+    if not isinstance(schema, dict):
+        return schema
+    compacted = {}
+    for key, value in schema.items():
+        if key in DROPPED_SCHEMA_KEYS:
+            continue
+        if key == "description":
+            compacted[key] = clip_description(value, PARAM_DESCRIPTION_MAX)
+        elif key == "properties" and isinstance(value, dict):
+            compacted[key] = {name: compact_schema(sub) for name, sub in value.items()}
+        elif key in ("items", "additionalProperties"):
+            compacted[key] = compact_schema(value)
+        elif key in ("anyOf", "oneOf", "allOf") and isinstance(value, list):
+            compacted[key] = [compact_schema(sub) for sub in value]
+        else:
+            compacted[key] = value
+    return compacted
+
+
+def compact_declaration(declaration: Dict[str, Any]) -> Dict[str, Any]:
+    compacted = dict(declaration)
+    if "description" in compacted:
+        compacted["description"] = clip_description(compacted["description"], TOOL_DESCRIPTION_MAX)
+    if "parameters" in compacted:
+        compacted["parameters"] = compact_schema(compacted["parameters"])
+    return compacted
+
+
+def compact_tools(tools: List[Any]) -> List[Any]:
+    """
+    Deduplicate and trim the function declarations in a tools list.
+
+    Args:
+        tools: Tool entries as sent by the browser, each usually
+               {"function_declarations": [...]} (camelCase is accepted too)
+
+    Returns:
+        New tools list; non-function entries (e.g. google_search) are kept as is
+    """
+    seen = set()
+    compacted = []
+    for tool in tools:
+        key = next((key for key in ("function_declarations", "functionDeclarations") if isinstance(tool, dict) and key in tool), None)
+        if key is None:
+            compacted.append(tool)
+            continue
+        declarations = []
+        for declaration in tool[key] or []:
+            name = declaration.get("name") if isinstance(declaration, dict) else None
+            if name in seen:
+                continue
+            if name is not None:
+                seen.add(name)
+            declarations.append(compact_declaration(declaration) if isinstance(declaration, dict) else declaration)
+        if declarations:
+            compacted.append({**tool, key: declarations})
+    return compacted
+
+
+def build_setup(config: Dict[str, Any], default_model: str, compact: bool = COMPACT_TOOLS) -> Dict[str, Any]:
+    """
+    Build the 'setup' message for a config.
+
+    Args:
+        config: Client configuration dict
+        default_model: Model used when the config has no modelId
+        compact: Compact the tool schemas (see module docstring)
+
+    Returns:
+        The setup message dict
+    """
+    # Build 'setup' payload from config
+    response_modalities = ["TEXT"]
+    # Request AUDIO modality if a multimodal input mode is active
+    current_mode = config.get("currentMode")
+    if current_mode in ["audio", "camera", "screen"]:
+        response_modalities.append("AUDIO")
+
+    # Get temperature from config or use default
+    temperature = float(config.get("temperature", 0.6))
+
+    # Get model ID from config or use default
+    model_id = config.get("modelId", default_model)
+
+    setup = {
+        "model": f"models/{model_id}",
+        "generation_config": {
+            "response_modalities": response_modalities,
+            "temperature": temperature,
+            "speech_config": {
+                "voice_config": {
+                    "prebuilt_voice_config": {
+                        "voice_name": config.get("voice", "Puck")
+                    }
+                }
+            },
+            "allow_interruptions": config.get("allowInterruptions", False)
+        },
+        "system_instruction": {
+            "parts": [
+                {
+                    "text": config.get(
+                        "systemPrompt",
+                        "You are a friendly AI Assistant..."
+                    )
+                }
+            ]
+        }
+    }
+
+    # Add tool_config if tools are available in the config and toolUsage is enabled.
+    # config["tools"] is a list of Tool dictionaries as prepared by the
+    # frontend and Composio client.
+    client_provided_tools = config.get("tools")
+    if config.get("toolUsage", True) and client_provided_tools and isinstance(client_provided_tools, list):
+        setup["tool_config"] = {
+            "tools": compact_tools(client_provided_tools) if compact else client_provided_tools,
+            "function_calling_config": {
+                "mode": "AUTO" if config.get("functionCalling", True) else "NONE",
+                "auto_function_response": config.get("autoFunctionResponse", True)
+            }
+        }
+
+    # The relay's VAD signals speech itself when GEMINI_VAD=gate (see gemini/vad.py)
+    if VAD_MODE == "gate" and vad_enabled_for(current_mode):
+        setup["realtime_input_config"] = {
+            "automatic_activity_detection": {"disabled": True}
+        }
+
+    # Add Google Search grounding if enabled
+    if config.get("googleSearch", False):
+        setup["grounding_config"] = {
+            "google_search_config": {
+                "enable_search": True
+            }
+        }
+
+    # Add code execution config if enabled
+    if config.get("codeExecution", False):
+        setup["code_execution_config"] = {
+            "enabled": True
+        }
+
+    # Add structured output config if enabled
+    structured_output = config.get("structuredOutput", {})
+    if structured_output.get("enabled", False):
+        format_type = structured_output.get("format", "json").upper()
+        schema = structured_output.get("schema", "")
+
+        structured_output_config = {
+            "enabled": True,
+            "response_mime_type": f"application/{format_type.lower()}"
+        }
+
+        # Add schema if provided
+        if schema:
+            try:
+                # Parse schema to ensure it's valid JSON
+                structured_output_config["schema"] = json.loads(schema)
+            except json.JSONDecodeError:
+                log.warning("structured_output_schema_invalid")
+
+        # Add strict validation setting
+        structured_output_config["strict_validation"] = structured_output.get("strict", True)
+
+        setup["structured_response_config"] = structured_output_config
+
+    return {"setup": setup}
+
+
+def setup_payload(config: Dict[str, Any], default_model: str, fingerprint: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    The serialized setup message for a config, built once per fingerprint.
+
+    Args:
+        config: Client configuration dict
+        default_model: Model used when the config has no modelId
+        fingerprint: setup_fingerprint(config), if the caller already has it
+
+    Returns:
+        (JSON text, setup dict); both are shared and must not be modified
+    """
+    key = (fingerprint or setup_fingerprint(config), default_model)
+    cached = _payloads.get(key)
+    if cached is None:
+        message = build_setup(config, default_model)
+        cached = _payloads[key] = (serialization.dumps(message), message)
+        log.debug("setup_built", bytes=len(cached[0]), tools=len(message["setup"].get("tool_config", {}).get("tools", [])))
+    return cached
+
+
+def with_session_resumption(payload: str, handle: Optional[str]) -> str:
+    """
+    Add a session_resumption field to serialized setup JSON.
+
+    Spliced into the text rather than re-serializing the whole message,
+    which is mostly tool schemas.
+
+    Args:
+        payload: Text returned by setup_payload(), ending in "}}"
+        handle: Resumption handle to resume from, or None to only request handles
+    """
+    resumption = serialization.dumps({"handle": handle} if handle else {})
+    return f'{payload[:-2]},"session_resumption":{resumption}}}}}'
@@ -0,0 +1,241 @@
+"""
+Voice activity detection on the microphone stream.
+
+With an always-on microphone most upstream audio is silence: the user is
+listening to the model, thinking, or away. VoiceActivityGate classifies
+each 20 ms frame of PCM16 as speech or not and drops silent frames before
+they reach the AudioCoalescer. GEMINI_VAD selects the mode:
+
+    off    every chunk is forwarded (default)
+    thin   speech is forwarded, plus GEMINI_VAD_HANGOVER_MS of trailing
+           silence so Gemini's own activity detection still sees the end
+           of the utterance; after that only one silent frame in
+           GEMINI_VAD_SILENCE_KEEP is sent
+    gate   only utterances (speech and the pauses within it) are
+           forwarded; Gemini's automatic activity
+           detection is disabled in the setup and the relay sends
+           activity_start / activity_end itself
+
+A frame is speech when its energy is above GEMINI_VAD_THRESHOLD_DB (dBFS)
+and GEMINI_VAD_MARGIN_DB above the running noise floor. With
+GEMINI_VAD_SPECTRAL=true it must also have most of its energy in the
+speech band, which rejects hum and hiss. Up to GEMINI_VAD_PRE_ROLL_MS of
+audio before the onset is sent with the speech so first syllables are not
+clipped. Needs numpy; without it the gate is not created.
+"""
+
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from core.metrics import metrics
+
+try:
+    import numpy as np
+    has_numpy = True
+except ImportError:
+    has_numpy = False
+
+VAD_MODE = os.getenv("GEMINI_VAD", "off").lower()
+
+# Capture modes that stream microphone audio
+AUDIO_MODES = ("audio", "camera", "screen")
+
+# Browser microphone audio (see frontend/js/audio-manager.js)
+INPUT_SAMPLE_RATE = 16000
+FRAME_MS = 20
+# Frequencies carrying most speech energy; the low edge is about the lowest voice pitch
+SPEECH_BAND_HZ = (85.0, 4000.0)
+
+vad_frames = metrics.counter(
+    "gemini_vad_frames_total",
+    "Microphone frames classified by the VAD, by what was done with them",
+    ("result",)
+)
+
+
+def vad_enabled_for(mode: Optional[str]) -> bool:
+    """Whether sessions in this capture mode run the VAD."""
+    return has_numpy and VAD_MODE in ("thin", "gate") and mode in AUDIO_MODES
+
+
+class VoiceActivityGate:
+    """
+    Energy-based VAD with hangover, pre-roll and an optional spectral check.
+
+    Frames of a chunk are scored together with numpy; the speech/silence
+    state machine then walks the per-frame decisions. Samples that do not
+    fill a whole frame are carried into the next chunk.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thin",
+        sample_rate: int = INPUT_SAMPLE_RATE,
+        threshold_db: float = -45.0,
+        margin_db: float = 10.0,
+        hangover_ms: int = 600,
+        pre_roll_ms: int = 200,
+        silence_keep: int = 5,
+        spectral: bool = False
+    ):
+        """
+        Args:
+            mode: "thin" or "gate" (see module docstring)
+            sample_rate: Sample rate of the incoming PCM16
+            threshold_db: Minimum frame energy for speech, in dBFS
+            margin_db: How far above the noise floor speech must be
+            hangover_ms: Silence kept after speech before the utterance ends
+            pre_roll_ms: Audio before the onset sent along with the speech
+            silence_keep: In thin mode, forward one silent frame in this many
+            spectral: Also require most energy in the speech band
+        """
+        self.mode = mode
+        self.frame_samples = sample_rate * FRAME_MS // 1000
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.hangover_frames = max(1, hangover_ms // FRAME_MS)
+        self.silence_keep = max(1, silence_keep)
+        self.spectral = spectral
+
+        frequencies = np.fft.rfftfreq(self.frame_samples, 1.0 / sample_rate)
+        self._speech_bins = (frequencies >= SPEECH_BAND_HZ[0]) & (frequencies <= SPEECH_BAND_HZ[1])
+
+        self.noise_floor_db = -60.0
+        self.speaking = False
+        self._quiet_frames = 0
+        self._silent_run = 0
+        self._last_speech_at = 0.0
+        self._carry = b""
+        self._pre_roll: Deque[bytes] = deque(maxlen=max(0, pre_roll_ms // FRAME_MS))
+
+        self.frames = 0
+        self.forwarded = 0
+        self.dropped = 0
+        self.utterances = 0
+
+    def process(self, pcm: bytes, now: Optional[float] = None) -> List[Tuple[str, Any]]:
+        """
+        Run one microphone chunk through the gate.
+
+        Args:
+            pcm: Little-endian PCM16 bytes
+            now: Current monotonic time (defaults to time.monotonic())
+
+        Returns:
+            Ordered events: ("audio", bytes) to forward, and
+            ("activity_start", t) / ("activity_end", t) with t the monotonic
+            time speech started or was last heard
+        """
+        now = time.monotonic() if now is None else now
+        data = self._carry + pcm
+        frame_bytes = self.frame_samples * 2
+        count = len(data) // frame_bytes
+        self._carry = data[count * frame_bytes:]
+        if count == 0:
+            return []
+
+        samples = np.frombuffer(data, dtype="<i2", count=count * self.frame_samples).reshape(count, self.frame_samples)
+        voiced = self._classify(samples.astype(np.float32) / 32768.0)
+
+        events: List[Tuple[str, Any]] = []
+        pending = bytearray()
+        forwarded, dropped = self.forwarded, self.dropped
+        for index in range(count):
+            frame = data[index * frame_bytes:(index + 1) * frame_bytes]
+            if voiced[index]:
+                self._quiet_frames = 0
+                self._last_speech_at = now
+                if not self.speaking:
+                    self.speaking = True
+                    self.utterances += 1
+                    if self.mode == "thin":
+                        # Silence kept so far stays ahead of the onset
+                        self._flush(pending, events)
+                    events.append(("activity_start", now))
+                    for held in self._pre_roll:
+                        pending += held
+                        self.forwarded += 1
+                        self.dropped -= 1
+                    self._pre_roll.clear()
+                pending += frame
+                self.forwarded += 1
+            elif self.speaking:
+                # Hangover: the utterance continues through short pauses
+                self._quiet_frames += 1
+                pending += frame
+                self.forwarded += 1
+                if self._quiet_frames >= self.hangover_frames:
+                    self.speaking = False
+                    self._silent_run = 0
+                    self._flush(pending, events)
+                    events.append(("activity_end", self._last_speech_at))
+            else:
+                self._silent_run += 1
+                if self.mode == "thin" and self._silent_run % self.silence_keep == 0:
+                    pending += frame
+                    self.forwarded += 1
+                    # Older held frames would now arrive out of order
+                    self._pre_roll.clear()
+                else:
+                    self._pre_roll.append(frame)
+                    self.dropped += 1
+        self._flush(pending, events)
+
+        self.frames += count
+        vad_frames.inc(self.forwarded - forwarded, result="forwarded")
+        vad_frames.inc(self.dropped - dropped, result="dropped")
+        return events
+
+    def _classify(self, frames) -> "np.ndarray":
+        energy = np.mean(frames * frames, axis=1)
+        energy_db = 10.0 * np.log10(energy + 1e-10)
+        voiced = (energy_db > self.threshold_db) & (energy_db > self.noise_floor_db + self.margin_db)
+        if self.spectral and voiced.any():
+            power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+            in_band = power[:, self._speech_bins].sum(axis=1) / (power.sum(axis=1) + 1e-10)
+            voiced &= in_band > 0.6
+        quiet = energy_db[~voiced]
+        if quiet.size:
+            # The floor follows background noise, not speech
+            self.noise_floor_db = 0.9 * self.noise_floor_db + 0.1 * float(np.mean(quiet))
+        return voiced
+
+    @staticmethod
+    def _flush(pending: bytearray, events: List[Tuple[str, Any]]) -> None:
+        if pending:
+            events.append(("audio", bytes(pending)))
+            pending.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "frames": self.frames,
+            "forwarded": self.forwarded,
+            "dropped": self.dropped,
+            "utterances": self.utterances,
+            "speaking": self.speaking,
+        }
+
+
+def create_vad(mode: Optional[str]) -> Optional[VoiceActivityGate]:
+    """
+    A gate for a session, configured from the environment.
+
+    Args:
+        mode: The session's capture mode (config "currentMode")
+
+    Returns:
+        A VoiceActivityGate, or None if the VAD is off or not available
+    """
+    if not vad_enabled_for(mode):
+        return None
+    return VoiceActivityGate(
+        VAD_MODE,
+        threshold_db=float(os.getenv("GEMINI_VAD_THRESHOLD_DB", -45)),
+        margin_db=float(os.getenv("GEMINI_VAD_MARGIN_DB", 10)),
+        hangover_ms=int(os.getenv("GEMINI_VAD_HANGOVER_MS", 600)),
+        pre_roll_ms=int(os.getenv("GEMINI_VAD_PRE_ROLL_MS", 200)),
+        silence_keep=int(os.getenv("GEMINI_VAD_SILENCE_KEEP", 5)),
+        spectral=os.getenv("GEMINI_VAD_SPECTRAL", "false").lower() == "true"
+    )
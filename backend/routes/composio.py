@@ -1,33 +1,45 @@
-from fastapi import APIRouter, HTTPException, Depends, Request, Query
-from fastapi.responses import JSONResponse, RedirectResponse, HTMLResponse
-from fastapi.templating import Jinja2Templates
-from typing import Dict, List, Optional, Any
-import uuid
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import JSONResponse, HTMLResponse
+from starlette.concurrency import run_in_threadpool
+from typing import TYPE_CHECKING, Dict, Optional, Any
 import os
-import requests
 
 # Create router
 router = APIRouter(prefix="/api/composio", tags=["composio"])
 
-# Use composio_integration if available
-# Import and initialize Composio client with proper error handling
-from composio_integration.client import ComposioClient
-try:
-    composio_client = ComposioClient()
-    print("Composio toolset initialized successfully")
-except Exception as e:
-    raise RuntimeError(f"ERROR: Failed to initialize Composio integration: {e}")
+# The shared ComposioClient is created on first use and injected into each route
+from composio_integration.provider import get_composio_client
+from composio_integration.result_shaping import result_shaper
+from core.session_store import session_store
+from core.log import get_logger
+
+log = get_logger("composio.routes")
+if TYPE_CHECKING:
+    from composio_integration.client import ComposioClient
+
+def require_composio_client() -> "ComposioClient":
+    """
+    Dependency providing the shared ComposioClient.
+
+    Runs in FastAPI's thread pool, so creating the client on first use
+    does not block the event loop.
+    """
+    try:
+        return get_composio_client()
+    except Exception as e:
+        log.error("composio_unavailable", error=e)
+        raise HTTPException(status_code=503, detail=f"Composio integration unavailable: {str(e)}")
 
 # Define the Composio OAuth base URL
 COMPOSIO_AUTH_URL = "https://auth.composio.dev/oauth"
 
-# In-memory storage for OAuth states.
-# WARNING: This is not suitable for production environments with multiple server instances
-# or where persistence across restarts is required. Use Redis or a database in such cases.
-oauth_states_storage: Dict[str, str] = {}
+# OAuth states live in the shared session store so the callback can be
+# verified by any worker or replica, not only the one that issued the URL.
+OAUTH_STATE_PREFIX = "oauth:"
+OAUTH_STATE_TTL = float(os.getenv("OAUTH_STATE_TTL_SECONDS", 600))
 
 @router.get("/oauth/url")
-async def get_oauth_url(app_name: str, redirect_uri: str):
+async def get_oauth_url(app_name: str, redirect_uri: str, composio_client: "ComposioClient" = Depends(require_composio_client)):
     """
     Get OAuth URL for white-label authentication
     
@@ -36,28 +48,27 @@ async def get_oauth_url(app_name: str, redirect_uri: str):
         redirect_uri: URI to redirect to after authentication
     """
     try:
-        print(f"Route /api/composio/oauth/url called for app: {app_name}")
         # Call the ComposioClient's get_oauth_url method.
         # This method is now expected to use toolset.initiate_connection
         # and return a dictionary: {"url": "...", "state": "..."}
-        response_data = composio_client.get_oauth_url(app_name, redirect_uri)
+        response_data = await run_in_threadpool(composio_client.get_oauth_url, app_name, redirect_uri)
         
         if not response_data or "url" not in response_data or "state" not in response_data:
-            print(f"ERROR: composio_client.get_oauth_url did not return expected data for {app_name}")
+            log.error("oauth_url_invalid_response", app=app_name)
             raise HTTPException(status_code=500, detail="Failed to get OAuth URL from Composio client")
 
         # Store the state generated and returned by the client for verification in the callback
         client_generated_state = response_data["state"]
-        oauth_states_storage[client_generated_state] = "pending"
-        print(f"OAuth state '{client_generated_state}' (from client) stored for app {app_name}.")
+        await session_store.set(OAUTH_STATE_PREFIX + client_generated_state, {"app": app_name, "status": "pending"}, OAUTH_STATE_TTL)
+        log.info("oauth_state_stored", app=app_name, state=client_generated_state)
         
         return response_data # Contains {"url": ..., "state": ...}
     except Exception as e:
-        print(f"ERROR in /api/composio/oauth/url route for app {app_name}: {e}")
+        log.error("oauth_url_failed", app=app_name, error=e)
         raise HTTPException(status_code=500, detail=f"Failed to get OAuth URL: {str(e)}")
 
 @router.get("/oauth/callback")
-async def oauth_callback(code: str = Query(...), state: str = Query(...)):
+async def oauth_callback(code: str = Query(...), state: str = Query(...), composio_client: "ComposioClient" = Depends(require_composio_client)):
     """
     Handle OAuth callback from Composio
     
@@ -66,21 +77,22 @@ async def oauth_callback(code: str = Query(...), state: str = Query(...)):
         state: State parameter
     """
     try:
-        print(f"--- OAUTH CALLBACK HIT: state={state}, code={code} ---") # Diagnostic print
         # Verify state parameter to prevent CSRF attacks
-        if state not in oauth_states_storage:
-            print(f"OAuth callback: State '{state}' not found in storage. Current storage: {oauth_states_storage}")
+        # pop() is atomic, so a state can only be redeemed once across all workers
+        if await session_store.pop(OAUTH_STATE_PREFIX + state) is None:
+            log.warning("oauth_state_unknown", state=state)
             raise ValueError("Invalid state parameter. Authentication flow may have expired, been tampered with, or this is an old state.")
         
-        # Clear state from our in-memory dictionary
-        oauth_states_storage.pop(state, None)
-        print(f"OAuth state verified and removed: {state}")
+        log.info("oauth_state_verified", state=state)
         
         # Extract app name from state
         app_name = state.split("_")[0] if "_" in state else "unknown"
         
         # Handle the OAuth callback with Composio
-        result = composio_client.handle_oauth_callback(code, state)
+        result = await run_in_threadpool(composio_client.handle_oauth_callback, code, state)
+
+        # A new connection changes which tools are available
+        composio_client.invalidate_tools_cache()
         
         # Create a VERY minimal success HTML response for debugging postMessage
         app_name_str = str(app_name)
@@ -149,7 +161,7 @@ async def oauth_callback(code: str = Query(...), state: str = Query(...)):
         }
         return HTMLResponse(content=raw_script_html, headers=headers)
     except Exception as e:
-        print(f"ERROR in /api/composio/oauth/callback generating HTML: {e}")
+        log.error("oauth_callback_failed", error=e)
         # Create error HTML response with safe handling of error message
         error_message = str(e).replace('"', '&quot;').replace("'", "&apos;")
         error_html = f"""
@@ -235,19 +247,19 @@ async def oauth_callback(code: str = Query(...), state: str = Query(...)):
         return HTMLResponse(content=error_html)
 
 @router.get("/connections")
-async def list_connections():
+async def list_connections(composio_client: "ComposioClient" = Depends(require_composio_client)):
     """
     List all available connections for the current user
     """
     try:
-        connections = composio_client.list_connections()
+        connections = await run_in_threadpool(composio_client.list_connections)
         return {"connections": connections}
     except Exception as e:
-        print(f"Error listing connections: {e}")
+        log.error("list_connections_failed", error=e)
         raise HTTPException(status_code=500, detail=f"Failed to list connections: {str(e)}")
 
 @router.post("/tools/{tool_name}/execute")
-async def execute_tool(tool_name: str, params: Dict[str, Any]):
+async def execute_tool(tool_name: str, params: Dict[str, Any], composio_client: "ComposioClient" = Depends(require_composio_client)):
     """
     Execute a Composio tool with the given parameters
     
@@ -256,13 +268,29 @@ async def execute_tool(tool_name: str, params: Dict[str, Any]):
         params: Tool parameters
     """
     try:
-        result = composio_client.execute_tool(tool_name, params)
+        result = await run_in_threadpool(composio_client.execute_tool, tool_name, params)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to execute tool: {str(e)}")
 
+@router.get("/results/{handle}")
+async def get_tool_result_page(handle: str, path: Optional[str] = None, offset: int = 0, limit: Optional[int] = None):
+    """
+    Read more of a tool result that was truncated before being sent
+
+    Args:
+        handle: Handle from the result's "truncated" object
+        path: Dotted path of the list to read (default: the longest list)
+        offset: Index of the first item
+        limit: Number of items
+    """
+    page = await result_shaper.fetch(handle, path, offset, limit)
+    if "error" in page:
+        raise HTTPException(status_code=404, detail=page["error"])
+    return page
+
 @router.get("/tools")
-async def get_tools(apps: Optional[str] = None):
+async def get_tools(apps: Optional[str] = None, composio_client: "ComposioClient" = Depends(require_composio_client)):
     """
     Get available tools for specified apps
     
@@ -271,24 +299,25 @@ async def get_tools(apps: Optional[str] = None):
     """
     try:
         app_list = apps.split(",") if apps else None
-        tools = composio_client.get_tools(app_list)
+        # Cached per app set; run in a worker so concurrent misses share one fetch
+        tools = await run_in_threadpool(composio_client.get_tools, app_list)
         return {"tools": tools}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get tools: {str(e)}")
 
 @router.get("/gmail/tools")
-async def get_gmail_tools():
+async def get_gmail_tools(composio_client: "ComposioClient" = Depends(require_composio_client)):
     """
     Get Gmail-specific tools
     """
     try:
-        tools = composio_client.get_gmail_tools()
+        tools = await run_in_threadpool(composio_client.get_gmail_tools)
         return {"tools": tools}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get Gmail tools: {str(e)}")
 
 @router.delete("/connections/{connection_id}")
-async def delete_connection(connection_id: str):
+async def delete_connection(connection_id: str, composio_client: "ComposioClient" = Depends(require_composio_client)):
     """
     Delete a Composio connection by its ID.
     """
@@ -296,8 +325,9 @@ async def delete_connection(connection_id: str):
         if not composio_client:
             raise HTTPException(status_code=500, detail="Composio client not initialized")
 
-        # This assumes a method 'delete_connection' will be added to ComposioClient
-        success = composio_client.delete_connection(connection_id)
+        success = await composio_client.delete_connection(connection_id)
+        if success:
+            composio_client.invalidate_tools_cache()
         
         if success:
             return JSONResponse(content={"message": "Connection deleted successfully"}, status_code=200)
@@ -310,5 +340,5 @@ async def delete_connection(connection_id: str):
         raise http_exc
     except Exception as e:
         # Catch any other unexpected errors
-        print(f"Error deleting connection {connection_id}: {e}")
+        log.error("delete_connection_failed", id=connection_id, error=e)
         raise HTTPException(status_code=500, detail=f"Failed to delete connection: {str(e)}")
\ No newline at end of file
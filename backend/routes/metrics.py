@@ -0,0 +1,76 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from core.metrics import metrics
+from core.log import sampled_out
+from core.session_store import NODE_ID, list_sessions, session_store
+from composio_integration.cache import tool_schema_cache
+from composio_integration.result_cache import tool_result_cache
+from routes.websocket import connections, relay_queues, session_pool, tool_executions
+
+# Create router
+router = APIRouter(tags=["metrics"])
+
+
+def collect_relay_state():
+    """
+    Gauges and counters read from the relay's live state at scrape time.
+
+    The session dicts are changed by the event loop; this runs on it (see
+    get_metrics) and iterates over snapshots of them.
+    """
+    yield ("relay_active_sessions", "gauge", "Connected relay sessions", [({}, len(connections))])
+    yield ("relay_running_tools", "gauge", "Tool executions currently in flight",
+           [({}, sum(len(executions) for executions in list(tool_executions.values())))])
+
+    depth = {"upstream": 0, "downstream": 0}
+    high_water = {"upstream": 0, "downstream": 0}
+    for queues in list(relay_queues.values()):
+        for direction, queue in list(queues.items()):
+            depth[direction] = depth.get(direction, 0) + len(queue)
+            high_water[direction] = max(high_water.get(direction, 0), queue.high_water_mark)
+    yield ("relay_queue_depth", "gauge", "Messages waiting in relay queues, summed over sessions",
+           [({"queue": direction}, value) for direction, value in depth.items()])
+    yield ("relay_queue_high_water_mark", "gauge", "Largest relay queue depth seen by any active session",
+           [({"queue": direction}, value) for direction, value in high_water.items()])
+
+    pool = session_pool.stats()
+    yield ("gemini_pool_idle_sessions", "gauge", "Warm Gemini sessions ready to hand out", [({}, pool["idle"])])
+    yield ("gemini_pool_warming_sessions", "gauge", "Gemini sessions currently being warmed", [({}, pool["warming"])])
+    yield ("gemini_pool_acquires_total", "counter", "Pool acquisitions by result",
+           [({"result": "hit"}, pool["hits"]), ({"result": "miss"}, pool["misses"])])
+
+    yield ("relay_log_sampled_out_total", "counter", "Log events dropped by RELAY_LOG_SAMPLE, per category",
+           [({"category": category}, count) for category, count in sampled_out().items()])
+
+    cache = tool_schema_cache.stats()
+    yield ("composio_tools_cache_entries", "gauge", "Cached Composio tool schema sets", [({}, cache["size"])])
+    yield ("composio_tools_cache_lookups_total", "counter", "Tool schema cache lookups by result",
+           [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])])
+
+    results = tool_result_cache.stats()
+    yield ("composio_result_cache_entries", "gauge", "Cached read-only tool results", [({}, results["size"])])
+    yield ("composio_result_cache_lookups_total", "counter", "Tool result cache lookups by result",
+           [({"result": "hit"}, results["hits"]), ({"result": "miss"}, results["misses"])])
+
+
+metrics.add_collector(collect_relay_state)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Relay latency histograms and state in Prometheus text format
+
+    Async so rendering runs on the event loop, not in the threadpool while
+    the loop mutates the state being read.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/api/sessions")
+async def get_sessions():
+    """
+    Relay sessions registered by every worker and replica sharing the session store
+    """
+    sessions = await list_sessions(session_store)
+    return {"node": NODE_ID, "count": len(sessions), "sessions": sessions}
@@ -1,56 +1,104 @@
 import asyncio
 import json
+import time
+import uuid
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 from gemini.client import GeminiConnection
+from gemini.frames import FRAME_AUDIO_PCM16, parse_frame
+from gemini.codecs import DownstreamEncoder, create_encoder, negotiate_codec
+from gemini.passthrough import DEFAULT_OUTPUT_SAMPLE_RATE, audio_frame, audio_message, match_audio_only, sample_rate_from_mime
+from gemini.session_pool import GeminiSessionPool
+from core import serialization
+from core.queues import RelayQueue
+from core.metrics import SessionTimeline, metrics
+from core.session_store import NODE_ID, session_store
+from core.log import get_logger
+from composio_integration.executor import ToolExecutor, parse_timeouts
+from composio_integration.provider import get_composio_client
+from composio_integration.result_cache import tool_result_cache
+from composio_integration.result_shaping import RESULT_PAGE_TOOL, result_shaper, with_result_page_tool
+from composio_integration.tool_selection import resolve_session_tools
+from starlette.concurrency import run_in_threadpool
 import os # Added
 from dotenv import load_dotenv # Added
 
 # Create router
 router = APIRouter()
+log = get_logger("websocket")
 
 # Store active connections
 connections: Dict[str, GeminiConnection] = {}
 
-# --- Composio Client Initialization ---
+# Per-client relay queues, keyed by client_id then direction
+relay_queues: Dict[str, Dict[str, RelayQueue]] = {}
+
+# Per-client stage and turn timestamps, exported through /metrics
+session_timelines: Dict[str, SessionTimeline] = {}
+
+tool_seconds = metrics.histogram(
+    "relay_tool_seconds",
+    "Composio tool execution time, from start to result or error",
+    ("tool", "outcome")
+)
+
+# Live sessions are also registered in the shared session store, so every
+# worker and replica can see them. Entries are refreshed every third of the
+# TTL and expire on their own if a process dies.
+SESSION_PREFIX = "session:"
+SESSION_REGISTRY_TTL = float(os.getenv("SESSION_REGISTRY_TTL_SECONDS", 60))
+
+# Set by drain_sessions() when the process is shutting down: new sessions
+# are refused and open ones end once their current turn is finished
+draining = asyncio.Event()
+drain_deadline = 0.0
+
+# Pre-warmed Gemini sessions, keyed by setup config fingerprint
+session_pool = GeminiSessionPool(
+    max_size=int(os.getenv("GEMINI_POOL_SIZE", 4)),
+    per_config=int(os.getenv("GEMINI_POOL_PER_CONFIG", 1)),
+    idle_timeout=float(os.getenv("GEMINI_POOL_IDLE_TIMEOUT", 60)),
+    refill_after=int(os.getenv("GEMINI_POOL_REFILL_AFTER", 2)),
+    demand_window=float(os.getenv("GEMINI_POOL_DEMAND_WINDOW", 300))
+)
+
+# Bounds for the per-client relay queues (messages, not bytes)
+UPSTREAM_QUEUE_SIZE = int(os.getenv("RELAY_UPSTREAM_QUEUE_SIZE", 64))
+DOWNSTREAM_QUEUE_SIZE = int(os.getenv("RELAY_DOWNSTREAM_QUEUE_SIZE", 256))
+
+# --- Composio Client ---
+# The shared ComposioClient is created lazily on the first tool call
+# (see composio_integration/provider.py) instead of at import time.
 load_dotenv() # Load .env file to get environment variables
-composio_client = None
-has_composio = False
+has_composio = bool(os.getenv("COMPOSIO_API_KEY"))
 
-composio_api_key = os.getenv("COMPOSIO_API_KEY")
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-
-if not composio_api_key:
+if not has_composio:
     # This will be caught by app.py, but good to be explicit if this module were used alone.
-    print("WEBSOCKET: WARNING - COMPOSIO_API_KEY not found. Tool execution will fail.")
-    # We don't raise here to allow the app to potentially start if app.py handles it,
-    # but Composio features will be non-functional.
-
-try:
-    if composio_api_key: # Only proceed if the key is actually set
-        from composio_integration.client import ComposioClient
-        composio_client = ComposioClient() # This will raise ValueError if keys are missing
-        has_composio = True
-        print("WEBSOCKET: Composio client initialized successfully")
-    else:
-        # This path means composio_api_key was not set.
-        # The app.py should have already raised an error.
-        # If somehow execution reaches here without the key, Composio is disabled.
-        print("WEBSOCKET: Composio API key not set. Composio features disabled.")
-
-except ImportError as e:
-    print(f"WEBSOCKET: ERROR: Composio integration not available due to ImportError: {e}")
-    # Depending on strictness, you might want to raise e here too.
-    # For now, let app.py be the main gatekeeper for startup.
-except ValueError as e: # Catch specific error from ComposioClient if keys are missing
-    print(f"WEBSOCKET: ERROR: Composio client initialization failed: {e}")
-    # Let app.py handle the startup failure.
-except Exception as e:
-    print(f"WEBSOCKET: ERROR: Unexpected Composio initialization error: {e}")
-# --- End Composio Client Initialization ---
-
-# Create a dictionary to store tool execution results
-tool_executions: Dict[str, Dict] = {}
+    log.warning("composio_api_key_missing", detail="Tool execution will fail")
+# --- End Composio Client ---
+
+# Maximum number of tools running at once for a single session
+TOOL_CONCURRENCY_PER_SESSION = int(os.getenv("TOOL_CONCURRENCY_PER_SESSION", 4))
+
+# Running tool executions per client, keyed by execution id
+tool_executions: Dict[str, Dict[str, asyncio.Task]] = {}
+
+# Thread pool for blocking Composio calls, so they never stall the event loop
+tool_executor = ToolExecutor(
+    max_workers=int(os.getenv("TOOL_EXECUTOR_WORKERS", 8)),
+    default_timeout=float(os.getenv("TOOL_TIMEOUT_SECONDS", 30)),
+    timeouts=parse_timeouts(os.getenv("TOOL_TIMEOUTS", ""))
+)
+
+# Downstream audio codecs clients may negotiate, and the pool that runs them.
+# None by default: every client gets PCM unless the operator enables a codec.
+DOWNSTREAM_CODECS = [codec.strip().lower() for codec in os.getenv("DOWNSTREAM_CODECS", "").split(",") if codec.strip()]
+OPUS_BITRATE = int(os.getenv("OPUS_BITRATE", 24000))
+codec_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DOWNSTREAM_CODEC_WORKERS", 2)),
+    thread_name_prefix="audio-codec"
+)
 
 @router.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
@@ -61,39 +109,95 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         websocket: WebSocket connection
         client_id: Unique client identifier
     """
+    if draining.is_set():
+        # Shutting down: the client should reconnect to another worker
+        await websocket.close(code=1012)
+        return
     await websocket.accept()
-    print(f"Client connected: {client_id}")
+    log.info("client_connected", client_id=client_id)
+    timeline = SessionTimeline()
+    session_timelines[client_id] = timeline
 
-    # Create Gemini connection for this client
-    gemini = GeminiConnection()
-    connections[client_id] = gemini
+    # Gemini connection for this client, taken from the pool once configured
+    gemini = None
+    # Downstream audio codec, if the client negotiated one
+    audio_encoder = None
+    # Keeps this session's entry in the shared session store alive
+    registry_task = None
 
     # Set up tools for this client
     tool_executions[client_id] = {}
 
     try:
         # 1) The first message from front-end must be "config"
-        initial_msg = await websocket.receive_json()
+        initial_msg = serialization.loads(await websocket.receive_text())
         if initial_msg.get("type") != "config":
             raise ValueError("First WebSocket message must be configuration.")
 
-        # Extract and apply configuration
+        # Extract configuration
         config_data = initial_msg.get("config", {})
-        gemini.set_config(config_data)
-        print(f"Received config for client {client_id}")
-
-        # 2) Connect to Gemini (sends 'setup' message)
-        await gemini.connect()
-        print(f"Gemini connected for client {client_id}")
-
-        # 3) Start tasks: reading from client and reading from Gemini
-        receive_task = asyncio.create_task(receive_from_client(websocket, gemini))
-        send_task = asyncio.create_task(send_to_frontend(websocket, gemini))
-
-        # Wait for either task to complete (or fail)
+        if has_composio:
+            # Apps and actions named in the config are resolved to schemas here
+            config_data = await resolve_session_tools(config_data)
+        config_data = with_result_page_tool(config_data)
+        log.debug("config_received", client_id=client_id)
+        timeline.mark("config_received")
+
+        # 2) Get a Gemini session that has already sent 'setup' for this config
+        gemini = await session_pool.acquire(config_data)
+        connections[client_id] = gemini
+        log.info("gemini_connected", client_id=client_id)
+        timeline.mark("gemini_connected")
+
+        # Clients that opt in get model audio as binary PCM frames instead of base64 JSON,
+        # or compressed with the first codec from their "audioCodecs" list that we support
+        binary_audio = bool(config_data.get("binaryAudio", False))
+        codec = negotiate_codec(config_data.get("audioCodecs"), DOWNSTREAM_CODECS)
+        if codec:
+            audio_encoder = DownstreamEncoder(
+                create_encoder(codec, DEFAULT_OUTPUT_SAMPLE_RATE, OPUS_BITRATE),
+                codec_executor
+            )
+            log.info("audio_codec_negotiated", client_id=client_id, codec=codec)
+
+        registry_task = asyncio.create_task(keep_session_registered(client_id, {
+            "client_id": client_id,
+            "node": NODE_ID,
+            "connected_at": time.time(),
+            "mode": config_data.get("currentMode"),
+            "codec": codec
+        }))
+
+        # 3) Start tasks: reading from client and reading from Gemini.
+        # Each direction goes through a bounded queue so a slow consumer
+        # on one side never stalls the other.
+        upstream = RelayQueue("upstream", UPSTREAM_QUEUE_SIZE)
+        downstream = RelayQueue("downstream", DOWNSTREAM_QUEUE_SIZE)
+        relay_queues[client_id] = {"upstream": upstream, "downstream": downstream}
+        # Turn latency is measured from the end of speech when the VAD is on
+        gemini.on_activity = lambda event, at: timeline.mark_user_turn_end("vad", at) if event == "activity_end" else None
+        # Tell the browser when the Gemini socket drops and is re-established
+        gemini.on_reconnect = lambda status: downstream.put("control", {"type": "gemini_status", "status": status})
+        if audio_encoder:
+            await downstream.put("control", {
+                "type": "audio_format",
+                "codec": audio_encoder.codec,
+                "sampleRate": audio_encoder.encoder.sample_rate
+            })
+
+        tasks = [
+            asyncio.create_task(receive_from_client(websocket, gemini, upstream)),
+            asyncio.create_task(pump_to_gemini(upstream, timeline)),
+            asyncio.create_task(send_to_frontend(gemini, upstream, downstream, client_id, timeline, binary_audio, audio_encoder)),
+            asyncio.create_task(pump_to_client(websocket, downstream)),
+        ]
+        drain_task = asyncio.create_task(wait_for_drain(client_id, timeline))
+        tasks.append(drain_task)
+
+        # Wait for any task to finish (client gone, Gemini gone, or failure)
         done, pending = await asyncio.wait(
-            [receive_task, send_task],
-            return_when=asyncio.FIRST_EXCEPTION
+            tasks,
+            return_when=asyncio.FIRST_COMPLETED
         )
 
         # Cancel any pending tasks
@@ -105,32 +209,151 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
             if task.exception():
                 raise task.exception()
 
+        if drain_task in done:
+            log.info("session_drained", client_id=client_id)
+            await pump_to_client_until_empty(websocket, downstream)
+            await websocket.close(code=1012, reason="Server restarting")
+
     except WebSocketDisconnect:
-        print(f"Client disconnected: {client_id}")
+        log.info("client_disconnected", client_id=client_id)
     except ValueError as e:
-        print(f"Validation error for client {client_id}: {e}")
-        await websocket.send_json({"type": "error", "message": str(e)})
+        log.warning("client_validation_error", client_id=client_id, error=e)
+        await websocket.send_text(serialization.dumps({"type": "error", "message": str(e)}))
     except Exception as e:
-        print(f"Error in WebSocket handler for client {client_id}: {e}")
+        log.exception("websocket_handler_error", client_id=client_id, error=e)
         try:
-            await websocket.send_json({"type": "error", "message": f"Server error: {str(e)}"})
+            await websocket.send_text(serialization.dumps({"type": "error", "message": f"Server error: {str(e)}"}))
         except:
             pass
     finally:
         # Clean up resources
-        await gemini.close()
+        for task in list(tool_executions.pop(client_id, {}).values()):
+            task.cancel()
+        tool_result_cache.invalidate(client_id)
+        if registry_task:
+            registry_task.cancel()
+            await unregister_session(client_id)
+        if gemini:
+            await gemini.close()
         if client_id in connections:
             del connections[client_id]
-        print(f"Connection closed for client {client_id}")
+        queues = relay_queues.pop(client_id, None)
+        if queues:
+            for queue in queues.values():
+                stats = queue.stats()
+                log.info("relay_queue_stats", client_id=client_id, queue=stats["name"], high_water_mark=stats["high_water_mark"],
+                         enqueued=stats["enqueued"], dropped=stats["dropped"])
+        if gemini and gemini.vad is not None:
+            log.info("vad_stats", client_id=client_id, **gemini.vad.stats())
+        if audio_encoder and audio_encoder.bytes_in:
+            log.info("audio_codec_stats", client_id=client_id, codec=audio_encoder.codec,
+                     pcm_bytes=audio_encoder.bytes_in, encoded_bytes=audio_encoder.bytes_out)
+        session_timelines.pop(client_id, None)
+        log.info("connection_closed", client_id=client_id, turns=timeline.turns, stages_ms=timeline.summary())
+
+
+async def wait_for_drain(client_id: str, timeline: SessionTimeline):
+    """
+    Return once the server is draining and this session is between turns
+
+    Sessions still waiting for an answer, receiving one or running tools
+    are given until drain_deadline to finish.
+
+    Args:
+        client_id: Unique client identifier
+        timeline: The session's timeline, which knows whether a turn is open
+    """
+    await draining.wait()
+    while time.monotonic() < drain_deadline and (timeline.in_turn or tool_executions.get(client_id)):
+        await asyncio.sleep(0.1)
+
+
+async def pump_to_client_until_empty(websocket: WebSocket, downstream: RelayQueue):
+    """
+    Deliver what is left in the downstream queue before a drained session is closed
+
+    Args:
+        websocket: WebSocket connection to the browser
+        downstream: Queue of messages waiting to be sent to the browser
+    """
+    try:
+        while len(downstream):
+            kind, message = await downstream.get()
+            await send_to_client(websocket, message)
+    except Exception as e:
+        log.warning("drain_flush_failed", error=e)
+
+
+async def drain_sessions(timeout: float) -> int:
+    """
+    Stop taking new sessions and let open ones finish their current turn
+
+    Each session closes itself (and its GeminiConnection) once it is
+    between turns, or when the deadline passes.
+
+    Args:
+        timeout: Seconds to wait for active turns
+
+    Returns:
+        Number of sessions still open when the deadline passed
+    """
+    global drain_deadline
+    drain_deadline = time.monotonic() + timeout
+    draining.set()
+    log.info("draining_sessions", sessions=len(session_timelines), timeout_seconds=timeout)
+    # Warm sessions will not be handed out any more
+    await session_pool.close()
+    # A little past the deadline, to let sessions close their sockets
+    while session_timelines and time.monotonic() < drain_deadline + 1.0:
+        await asyncio.sleep(0.1)
+    return len(session_timelines)
+
+
+async def keep_session_registered(client_id: str, record: Dict):
+    """
+    Publish a session to the shared session store until cancelled
+
+    The entry is rewritten every third of SESSION_REGISTRY_TTL with the
+    current number of running tools. Store errors are logged and retried
+    on the next refresh; they never end the session.
+
+    Args:
+        client_id: Unique client identifier
+        record: Session metadata (node, connected_at, mode, codec)
+    """
+    while True:
+        record["running_tools"] = len(tool_executions.get(client_id, {}))
+        gemini = connections.get(client_id)
+        if gemini is not None and gemini.vad is not None:
+            record["vad"] = gemini.vad.stats()
+        try:
+            await session_store.set(SESSION_PREFIX + client_id, record, SESSION_REGISTRY_TTL)
+        except Exception as e:
+            log.warning("session_register_failed", client_id=client_id, error=e)
+        await asyncio.sleep(SESSION_REGISTRY_TTL / 3)
+
+
+async def unregister_session(client_id: str):
+    """
+    Remove a session from the shared session store
+
+    Args:
+        client_id: Unique client identifier
+    """
+    try:
+        await session_store.delete(SESSION_PREFIX + client_id)
+    except Exception as e:
+        log.warning("session_unregister_failed", client_id=client_id, error=e)
 
 
-async def receive_from_client(websocket: WebSocket, gemini: GeminiConnection):
+async def receive_from_client(websocket: WebSocket, gemini: GeminiConnection, upstream: RelayQueue):
     """
     Process incoming messages from the client browser
 
     Args:
         websocket: WebSocket connection
         gemini: GeminiConnection instance for this client
+        upstream: Queue of messages waiting to be sent to Gemini
     """
     while True:
         try:
@@ -139,42 +362,106 @@ async def receive_from_client(websocket: WebSocket, gemini: GeminiConnection):
 
             # Handle disconnection
             if message["type"] == "websocket.disconnect":
-                print("Client disconnected.")
                 return
 
+            # Binary frames carry raw PCM16 audio behind a small header
+            if message.get("bytes") is not None:
+                frame = parse_frame(message["bytes"])
+                if frame.kind == FRAME_AUDIO_PCM16:
+                    await upstream.put("audio", (gemini.send_audio_pcm, frame.payload))
+                else:
+                    log.warning("unknown_frame_kind", category="client.invalid", kind=frame.kind)
+                continue
+
             # Parse the message content
-            content = json.loads(message["text"])
+            content = serialization.loads(message["text"])
             msg_type = content["type"]
 
             # Route to appropriate handler based on message type
             if msg_type == "audio":
-                await gemini.send_audio(content["data"])
+                await upstream.put("audio", (gemini.send_audio, content["data"]))
             elif msg_type == "image":
-                await gemini.send_image(content["data"])
+                await upstream.put("image", (gemini.send_image, content["data"]))
             elif msg_type == "text":
-                await gemini.send_text(content["data"])
+                await upstream.put("text", (gemini.send_text, content["data"]))
             # The "execute_tool" message type from client is removed as per Step 3 of the plan.
             # Tool execution is now initiated by the backend when Gemini issues a functionCall.
             else:
-                print(f"Unknown message type from client: {msg_type}")
+                log.warning("unknown_message_type", category="client.invalid", type=msg_type)
 
         except json.JSONDecodeError:
-            print("Received invalid JSON from client")
+            log.warning("invalid_json", category="client.invalid")
+        except ValueError as e:
+            log.warning("invalid_binary_frame", category="client.invalid", error=e)
         except KeyError as e:
-            print(f"Missing required field in client message: {e}")
+            log.warning("missing_field", category="client.invalid", field=str(e))
         except Exception as e:
-            print(f"Error processing client message: {e}")
+            log.exception("client_message_error", error=e)
             break
 
 
-async def send_to_frontend(websocket: WebSocket, gemini: GeminiConnection):
+async def pump_to_gemini(upstream: RelayQueue, timeline: SessionTimeline):
     """
-    Forward Gemini responses to the client browser
+    Drain the upstream queue into the Gemini connection
+
+    Args:
+        upstream: Queue of (send coroutine, payload) pairs for Gemini
+        timeline: Stage and turn timestamps for this session
+    """
+    while True:
+        kind, (send, data) = await upstream.get()
+        # Noted before sending: a fast reply can arrive before send() returns
+        timeline.input_sent(kind)
+        await send(data)
+
+
+async def pump_to_client(websocket: WebSocket, downstream: RelayQueue):
+    """
+    Drain the downstream queue into the client browser
+
+    Args:
+        websocket: WebSocket connection
+        downstream: Queue of messages for the browser: dicts to serialize,
+                    pre-serialized JSON text, or binary frames
+    """
+    while True:
+        kind, message = await downstream.get()
+        await send_to_client(websocket, message)
+
+
+async def send_to_client(websocket: WebSocket, message):
+    """
+    Send one downstream message: dicts are serialized, pre-serialized JSON
+    text and binary frames are sent as they are
 
     Args:
         websocket: WebSocket connection
+        message: Item taken from the downstream queue
+    """
+    if isinstance(message, bytes):
+        await websocket.send_bytes(message)
+    elif isinstance(message, str):
+        await websocket.send_text(message)
+    else:
+        await websocket.send_text(serialization.dumps(message))
+
+
+async def send_to_frontend(gemini: GeminiConnection, upstream: RelayQueue, downstream: RelayQueue, client_id: str, timeline: SessionTimeline, binary_audio: bool = False, audio_encoder: Optional[DownstreamEncoder] = None):
+    """
+    Forward Gemini responses to the client browser
+
+    Args:
         gemini: GeminiConnection instance for this client
+        upstream: Queue of messages waiting to be sent to Gemini
+        downstream: Queue of messages waiting to be sent to the browser
+        client_id: Unique client identifier
+        timeline: Stage and turn timestamps for this session
+        binary_audio: Send model audio as binary PCM frames instead of JSON
+        audio_encoder: Negotiated downstream codec, if any; takes precedence over binary_audio
     """
+    # Caps how many of this session's tools run at once
+    tool_semaphore = asyncio.Semaphore(TOOL_CONCURRENCY_PER_SESSION)
+
     while True:
         try:
             # Get next message from Gemini
@@ -182,81 +469,51 @@ async def send_to_frontend(websocket: WebSocket, gemini: GeminiConnection):
             if not msg:
                 continue
 
+            # Audio-only messages (the bulk of traffic) skip the JSON round trip
+            audio = match_audio_only(msg)
+            if audio is not None:
+                timeline.model_part("audio")
+                await forward_audio(downstream, audio.data, audio.sample_rate, binary_audio, audio_encoder)
+                continue
+
             # Parse response
-            response = json.loads(msg)
+            response = serialization.loads(msg)
+            # Model text and resumption handles, kept for replay after a reconnect
+            gemini.observe(response)
 
             # Extract and forward parts (audio, text, or tool calls)
             try:
                 parts = response["serverContent"]["modelTurn"]["parts"]
+                function_calls = []
                 for part in parts:
                     if "inlineData" in part:
+                        timeline.model_part("audio")
                         # Audio data from Gemini (base64 PCM)
-                        audio_data = part["inlineData"]["data"]
-                        await websocket.send_json({"type": "audio", "data": audio_data})
+                        inline_data = part["inlineData"]
+                        mime_type = inline_data.get("mimeType", "")
+                        if mime_type.startswith("audio/pcm"):
+                            await forward_audio(
+                                downstream, inline_data["data"], sample_rate_from_mime(mime_type),
+                                binary_audio, audio_encoder
+                            )
+                        else:
+                            await downstream.put("audio", {"type": "audio", "data": inline_data["data"]})
                     elif "text" in part:
+                        timeline.model_part("text")
                         # Text from Gemini
                         text_data = part["text"]
-                        print("Gemini text part:", text_data)
-                        await websocket.send_json({"type": "text", "text": text_data})
+                        log.debug("gemini_text_part", category="gemini.part", client_id=client_id, text=text_data)
+                        await downstream.put("text", {"type": "text", "text": text_data})
                     elif "functionCall" in part:
-                        # Handle tool/function calls
-                        function_call = part["functionCall"]
-                        tool_name = function_call.get("name", "")
-                        # Ensure args are parsed correctly, defaulting to an empty dict if args is missing or not a string
-                        raw_args = function_call.get("args", "{}")
-                        try:
-                            tool_params = json.loads(raw_args) if isinstance(raw_args, str) else raw_args
-                            if not isinstance(tool_params, dict): # Ensure it's a dictionary
-                                tool_params = {}
-                        except json.JSONDecodeError:
-                            print(f"Warning: Could not parse tool_params from args: {raw_args}. Defaulting to empty dict.")
-                            tool_params = {}
-
-
-                        print(f"Gemini functionCall: {tool_name} with params: {tool_params}")
-
-                        # Send tool call notification to frontend (can remain for UI purposes)
-                        await websocket.send_json({
-                            "type": "tool_call",
-                            "data": {
-                                "name": tool_name,
-                                "parameters": tool_params
-                            }
-                        })
-
-                        # Execute the tool using Composio (directly, no more round trip from client)
-                        result = await execute_composio_tool(
-                            websocket, # Still needed to send tool_result/tool_error to frontend
-                            tool_name,
-                            tool_params,
-                            client_id # client_id is used by execute_composio_tool
-                        )
-
-                        # Send the structured FunctionResponse back to Gemini
-                        # The actual structure of 'result' from composio_client.execute_tool matters here.
-                        # Assuming 'result' is a dictionary that can be directly used as content.
-                        function_response_payload = {
-                            "client_content": {
-                                "turns": [{
-                                    "role": "model", # Role for function response part
-                                    "parts": [{
-                                        "functionResponse": {
-                                            "name": tool_name,
-                                            "response": {
-                                                # Gemini expects the 'response' to contain the actual tool output,
-                                                # often as a JSON object.
-                                                "content": result
-                                            }
-                                        }
-                                    }]
-                                }],
-                                "turn_complete": True # Typically true after a function call
-                            }
-                        }
-                        print(f"Sending FunctionResponse to Gemini for tool {tool_name}: {json.dumps(function_response_payload)}")
-                        await gemini.send_text(json.dumps(function_response_payload))
-                        # Note: The global 'tool_executions' dictionary is no longer updated here
-                        # as its previous usage pattern is removed with the streamlined flow.
+                        timeline.model_part("function_call")
+                        function_calls.append(part["functionCall"])
+
+                if function_calls:
+                    # Run the turn's tools in the background so audio keeps streaming
+                    start_tool_execution(
+                        client_id,
+                        handle_function_calls(gemini, upstream, downstream, client_id, function_calls, tool_semaphore)
+                    )
             except KeyError:
                 # Not all responses have parts
                 pass
@@ -264,21 +521,171 @@ async def send_to_frontend(websocket: WebSocket, gemini: GeminiConnection):
             # Handle turn completion
             try:
                 if response["serverContent"]["turnComplete"]:
-                    await websocket.send_json({"type": "turn_complete", "data": True})
+                    timeline.turn_complete()
+                    await gemini.flush_audio()
+                    if audio_encoder:
+                        # Emit audio the codec held back for a partial packet
+                        try:
+                            frame = await audio_encoder.flush()
+                        except Exception as e:
+                            log.warning("audio_codec_flush_failed", client_id=client_id, codec=audio_encoder.codec, error=e)
+                            frame = None
+                        if frame:
+                            await downstream.put("audio", frame)
+                    await downstream.put("turn_complete", {"type": "turn_complete", "data": True})
             except KeyError:
                 # Not all responses indicate turn completion
                 pass
 
         except Exception as e:
-            print(f"Error processing Gemini response: {e}")
+            log.exception("gemini_response_error", client_id=client_id, error=e)
             break
 
-async def execute_composio_tool(websocket: WebSocket, tool_name: str, parameters: Dict, client_id: str):
+async def forward_audio(downstream: RelayQueue, data, sample_rate: int, binary_audio: bool, audio_encoder: Optional[DownstreamEncoder]):
+    """
+    Queue one Gemini audio chunk for the browser in the session's format
+
+    Args:
+        downstream: Queue of messages waiting to be sent to the browser
+        data: Base64 PCM16 from Gemini
+        sample_rate: Sample rate of the PCM in Hz
+        binary_audio: Send a binary PCM frame instead of a JSON message
+        audio_encoder: Negotiated downstream codec, if any. Its encoder runs at
+                       one fixed rate; chunks at any other rate are dropped.
+    """
+    try:
+        if audio_encoder:
+            if sample_rate != audio_encoder.encoder.sample_rate:
+                log.warning("audio_rate_mismatch", category="gemini.audio_error", codec=audio_encoder.codec,
+                            sample_rate=sample_rate, encoder_rate=audio_encoder.encoder.sample_rate)
+                return
+            message = await audio_encoder.encode(data)
+            if message is None:
+                # The codec is buffering until it has a full packet
+                return
+        elif binary_audio:
+            message = audio_frame(data, sample_rate)
+        else:
+            message = audio_message(data)
+    except Exception as e:
+        log.warning("audio_chunk_dropped", category="gemini.audio_error", error=e)
+        return
+    await downstream.put("audio", message)
+
+
+def start_tool_execution(client_id: str, coro) -> asyncio.Task:
+    """
+    Run a tool call as a background task tracked per client
+
+    The task is registered in tool_executions so it can be cancelled when
+    the client disconnects.
+
+    Args:
+        client_id: Unique client identifier
+        coro: Coroutine performing the tool call
+
+    Returns:
+        The created task
+    """
+    execution_id = uuid.uuid4().hex
+    task = asyncio.create_task(coro)
+    executions = tool_executions.setdefault(client_id, {})
+    executions[execution_id] = task
+    task.add_done_callback(lambda _: executions.pop(execution_id, None))
+    return task
+
+
+def parse_function_call(function_call: Dict) -> Dict:
+    """
+    Normalize a Gemini functionCall part into name, params and optional id
+
+    Args:
+        function_call: The functionCall part from Gemini
+
+    Returns:
+        Dict with "name", "params" and "id" (None if Gemini sent no id)
+    """
+    tool_name = function_call.get("name", "")
+    # Ensure args are parsed correctly, defaulting to an empty dict if args is missing or not a string
+    raw_args = function_call.get("args", "{}")
+    try:
+        tool_params = serialization.loads(raw_args) if isinstance(raw_args, str) else raw_args
+        if not isinstance(tool_params, dict): # Ensure it's a dictionary
+            tool_params = {}
+    except json.JSONDecodeError:
+        log.warning("function_call_args_invalid", args=raw_args)
+        tool_params = {}
+
+    return {"name": tool_name, "params": tool_params, "id": function_call.get("id")}
+
+
+async def handle_function_calls(gemini: GeminiConnection, upstream: RelayQueue, downstream: RelayQueue, client_id: str, function_calls: List[Dict], semaphore: asyncio.Semaphore):
+    """
+    Execute the functionCalls of one model turn concurrently and send a
+    single batched FunctionResponse back to Gemini
+
+    Args:
+        gemini: GeminiConnection instance for this client
+        upstream: Queue of messages waiting to be sent to Gemini
+        downstream: Queue of messages waiting to be sent to the browser
+        client_id: Unique client identifier
+        function_calls: The functionCall parts from one Gemini message
+        semaphore: Caps concurrently running tools for this session
+    """
+    calls = [parse_function_call(function_call) for function_call in function_calls]
+
+    for call in calls:
+        log.info("function_call", client_id=client_id, tool=call["name"], params=call["params"])
+
+        # Send tool call notification to frontend (can remain for UI purposes)
+        await downstream.put("tool", {
+            "type": "tool_call",
+            "data": {
+                "name": call["name"],
+                "parameters": call["params"]
+            }
+        })
+
+    async def run(call: Dict):
+        if call["name"] == RESULT_PAGE_TOOL:
+            # The model reading more of an earlier, truncated result
+            params = call["params"]
+            try:
+                offset, limit = int(params.get("offset") or 0), int(params.get("limit") or 0)
+            except (TypeError, ValueError):
+                return {"error": "offset and limit must be integers"}
+            return await result_shaper.fetch(str(params.get("handle", "")), params.get("path"), offset, limit)
+        async with semaphore:
+            # Execute the tool using Composio (directly, no more round trip from client)
+            return await execute_composio_tool(downstream, call["name"], call["params"], client_id)
+
+    # Independent calls run concurrently: the turn takes as long as the slowest tool
+    results = await asyncio.gather(*(run(call) for call in calls))
+
+    # Send all FunctionResponses back to Gemini in one message
+    responses = []
+    for call, result in zip(calls, results):
+        function_response = {
+            "name": call["name"],
+            "response": {
+                # Gemini expects the 'response' to contain the actual tool output,
+                # often as a JSON object.
+                "content": result
+            }
+        }
+        if call["id"]:
+            function_response["id"] = call["id"]
+        responses.append(function_response)
+
+    log.info("function_responses_sent", client_id=client_id, tools=[call["name"] for call in calls])
+    await upstream.put("tool", (gemini.send_function_responses, responses))
+
+async def execute_composio_tool(downstream: RelayQueue, tool_name: str, parameters: Dict, client_id: str):
     """
     Execute a Composio tool and return the result
 
     Args:
-        websocket: WebSocket connection
+        downstream: Queue of messages waiting to be sent to the browser
         tool_name: Name of the tool to execute
         parameters: Tool parameters
         client_id: Client ID for tracking execution
@@ -286,40 +693,47 @@ async def execute_composio_tool(websocket: WebSocket, tool_name: str, parameters
     Returns:
         Tool execution result
     """
+    started_at = time.monotonic()
     try:
-        if not has_composio or composio_client is None:
+        if not has_composio:
             error_message = f"Composio client not available. Cannot execute tool {tool_name}."
-            print(error_message)
-            await websocket.send_json({"type": "tool_error", "error": error_message})
-            if client_id in connections and connections[client_id]:
-                 await connections[client_id].send_text(f"Tool {tool_name} error: {error_message}")
+            log.error("tool_unavailable", client_id=client_id, tool=tool_name)
+            await downstream.put("tool", {"type": "tool_error", "error": error_message})
+            tool_seconds.observe(time.monotonic() - started_at, tool=tool_name, outcome="unavailable")
             return {"error": error_message}
 
-        print(f"Executing Composio tool: {tool_name}")
-        print(f"Parameters: {parameters}")
-
-        # Import the ComposioClient from the correct location
-        from composio_integration.client import ComposioClient
+        log.debug("tool_started", client_id=client_id, tool=tool_name, params=parameters)
 
-        # Create a new client instance if needed
-        if composio_client is None:
-            try:
-                # Initialize the client with API keys from environment
-                client = ComposioClient()
-                print("Created new Composio client for tool execution")
-            except Exception as e:
-                error_message = f"Failed to create Composio client: {str(e)}"
-                print(error_message)
-                await websocket.send_json({"type": "tool_error", "error": error_message})
-                return {"error": error_message}
-        else:
-            client = composio_client
+        # Get the shared client (created on first use, off the event loop)
+        try:
+            client = await run_in_threadpool(get_composio_client)
+        except Exception as e:
+            error_message = f"Failed to create Composio client: {str(e)}"
+            log.error("composio_client_failed", client_id=client_id, tool=tool_name, error=e)
+            await downstream.put("tool", {"type": "tool_error", "error": error_message})
+            tool_seconds.observe(time.monotonic() - started_at, tool=tool_name, outcome="unavailable")
+            return {"error": error_message}
 
-        # Execute the tool
-        result = client.execute_tool(tool_name, parameters)
+        # Execute the tool on the thread pool; the event loop keeps relaying.
+        # Repeated read-only calls are answered from the result cache.
+        try:
+            result, cached = await tool_result_cache.get_or_run(
+                client_id, tool_name, parameters,
+                lambda: tool_executor.run(tool_name, client.execute_tool, tool_name, parameters)
+            )
+        except asyncio.TimeoutError:
+            timeout = tool_executor.timeout_for(tool_name)
+            tool_seconds.observe(time.monotonic() - started_at, tool=tool_name, outcome="timeout")
+            raise TimeoutError(f"timed out after {timeout:g}s")
+        tool_seconds.observe(time.monotonic() - started_at, tool=tool_name, outcome="cached" if cached else "ok")
+        if cached:
+            log.debug("tool_result_cached", client_id=client_id, tool=tool_name)
+
+        # Oversized results are replaced by a page and a handle to the rest
+        result = await result_shaper.apply(tool_name, result)
 
         # Send the result back to the client
-        await websocket.send_json({
+        await downstream.put("tool", {
             "type": "tool_result",
             "data": result
         })
@@ -331,10 +745,12 @@ async def execute_composio_tool(websocket: WebSocket, tool_name: str, parameters
         return result
     except Exception as e:
         error_message = f"Failed to execute tool {tool_name}: {str(e)}"
-        print(error_message)
+        log.error("tool_failed", client_id=client_id, tool=tool_name, error=e)
+        if not isinstance(e, TimeoutError):
+            tool_seconds.observe(time.monotonic() - started_at, tool=tool_name, outcome="error")
 
         # Send error back to client
-        await websocket.send_json({
+        await downstream.put("tool", {
             "type": "tool_error",
             "error": error_message
         })
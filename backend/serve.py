@@ -0,0 +1,150 @@
+"""
+Production entry point for the relay.
+
+    python serve.py
+
+Runs app:app under uvicorn with RELAY_WORKERS processes sharing one socket,
+uvloop and httptools when they are installed, and WebSocket limits suited
+to streaming media. With several workers, set SESSION_STORE_URL to Redis so
+OAuth callbacks and the session registry work across processes (see
+core/session_store.py).
+
+On SIGTERM/SIGINT each worker stops accepting connections, refuses new /ws
+sessions, lets open Gemini turns finish for up to RELAY_DRAIN_TIMEOUT
+seconds, and closes the remaining sessions with code 1012 (service
+restart) before the application shuts down. `python app.py` is still the
+single-process development server.
+"""
+
+import importlib.util
+import multiprocessing
+import os
+import signal
+import socket
+from typing import List
+import uvicorn
+from dotenv import load_dotenv
+from core.log import get_logger
+
+load_dotenv()
+
+log = get_logger("serve")
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8000))
+WORKERS = int(os.getenv("RELAY_WORKERS", os.getenv("WEB_CONCURRENCY", 1)))
+
+# Largest WebSocket message accepted from a browser; camera frames are the biggest
+WS_MAX_SIZE = int(os.getenv("RELAY_WS_MAX_SIZE", 4 * 1024 * 1024))
+# Keepalive pings detect dead browsers behind NATs and load balancers
+WS_PING_INTERVAL = float(os.getenv("RELAY_WS_PING_INTERVAL", 20))
+WS_PING_TIMEOUT = float(os.getenv("RELAY_WS_PING_TIMEOUT", 20))
+
+# Time given to active turns on shutdown, then to uvicorn's own connection shutdown
+DRAIN_TIMEOUT = float(os.getenv("RELAY_DRAIN_TIMEOUT", 30))
+GRACEFUL_SHUTDOWN_TIMEOUT = float(os.getenv("RELAY_GRACEFUL_SHUTDOWN_TIMEOUT", 10))
+
+# uvicorn's access log writes a line per request synchronously; off by default
+ACCESS_LOG = os.getenv("RELAY_ACCESS_LOG", "false").lower() == "true"
+
+has_uvloop = importlib.util.find_spec("uvloop") is not None
+has_httptools = importlib.util.find_spec("httptools") is not None
+
+
+class DrainingServer(uvicorn.Server):
+    """uvicorn server that drains relay sessions before closing connections."""
+
+    async def shutdown(self, sockets=None):
+        # Stop accepting connections first; uvicorn's shutdown repeats this harmlessly
+        for server in self.servers:
+            server.close()
+        for sock in sockets or []:
+            sock.close()
+
+        if not self.force_exit:
+            from routes.websocket import drain_sessions, log
+            remaining = await drain_sessions(DRAIN_TIMEOUT)
+            if remaining:
+                log.warning("drain_deadline_passed", sessions=remaining)
+
+        await super().shutdown(sockets)
+
+
+def build_config() -> uvicorn.Config:
+    """
+    uvicorn settings for the relay, from the environment.
+
+    Returns:
+        Config for app:app
+    """
+    return uvicorn.Config(
+        "app:app",
+        host=HOST,
+        port=PORT,
+        workers=WORKERS,
+        loop="uvloop" if has_uvloop else "asyncio",
+        http="httptools" if has_httptools else "h11",
+        ws="websockets",
+        ws_max_size=WS_MAX_SIZE,
+        ws_ping_interval=WS_PING_INTERVAL,
+        ws_ping_timeout=WS_PING_TIMEOUT,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
+        access_log=ACCESS_LOG,
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    )
+
+
+def run_worker(config: uvicorn.Config, sockets: List[socket.socket]) -> None:
+    """Entry point of a worker process started by run_workers()."""
+    # Logging is configured again in every spawned child
+    config.configure_logging()
+    try:
+        DrainingServer(config).run(sockets=sockets)
+    except KeyboardInterrupt:
+        # The parent is already stopping us; a traceback would add nothing
+        pass
+
+
+def run_workers(config: uvicorn.Config) -> None:
+    """
+    Run config.workers DrainingServer processes on one shared socket.
+
+    uvicorn's own supervisor always starts a plain Server in each worker,
+    so the workers are spawned here with multiprocessing, the way uvicorn
+    does it but without its private helpers. SIGINT and SIGTERM are
+    forwarded as SIGTERM, which starts a graceful drain in every worker.
+
+    Args:
+        config: Config with workers > 1
+    """
+    sock = config.bind_socket()
+    # spawn, not fork: workers must not inherit the parent's threads or event loop
+    spawn = multiprocessing.get_context("spawn")
+    processes = [spawn.Process(target=run_worker, args=(config, [sock])) for _ in range(config.workers)]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGINT, forward)
+    signal.signal(signal.SIGTERM, forward)
+    for process in processes:
+        process.join()
+    sock.close()
+
+
+def main():
+    config = build_config()
+    log.info("relay_starting", host=HOST, port=PORT, workers=WORKERS, loop=config.loop, http=config.http)
+    if config.workers > 1:
+        run_workers(config)
+    else:
+        DrainingServer(config).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+from composio_integration import action_index
+from composio_integration.action_index import ActionIndex, app_key
+
+
+class Enum:
+    """Stand-in for a composio enum exposing members through all()."""
+
+    def __init__(self, members):
+        self.members = members
+        self.scans = 0
+
+    def all(self):
+        self.scans += 1
+        if isinstance(self.members, Exception):
+            raise self.members
+        return list(self.members)
+
+
+GMAIL = SimpleNamespace(slug="gmail", name="GMAIL")
+GITHUB = SimpleNamespace(slug="github", name="GITHUB")
+SEND = SimpleNamespace(name="GMAIL_SEND_EMAIL", app="gmail")
+FETCH = SimpleNamespace(name="GMAIL_FETCH_EMAILS", app="GMAIL")
+ISSUE = SimpleNamespace(name="GITHUB_GET_AN_ISSUE", app=GITHUB)
+
+
+def test_app_key():
+    assert app_key("GMail") == "gmail"
+    assert app_key(GITHUB) == "github"
+
+
+def test_lookups_use_one_scan():
+    actions = Enum([SEND, FETCH, ISSUE])
+    index = ActionIndex(actions, Enum([GMAIL, GITHUB]))
+    assert index.app("GMAIL") is GMAIL
+    assert index.app("slack") is None
+    assert index.actions_for("gmail") == [SEND, FETCH]
+    assert index.actions_for(GITHUB) == [ISSUE]
+    assert index.apps() == ["github", "gmail"]
+    assert actions.scans == 1
+
+
+def test_empty_scan_is_cached_until_retry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(action_index.time, "monotonic", lambda: now[0])
+    actions = Enum([])
+    index = ActionIndex(actions, Enum([]), retry_interval=30)
+
+    for _ in range(5):
+        assert index.actions_for("gmail") == []
+    assert actions.scans == 1
+
+    actions.members = [SEND]
+    now[0] += 31
+    assert index.actions_for("gmail") == [SEND]
+    now[0] += 1000
+    index.actions_for("gmail")
+    assert actions.scans == 2
+
+
+def test_failed_all_falls_back_to_attributes():
+    class Attributes:
+        GMAIL_SEND_EMAIL = SEND
+
+        @staticmethod
+        def all():
+            raise RuntimeError("cache unavailable")
+
+    index = ActionIndex(Attributes, Enum([GMAIL]))
+    assert index.actions_for("gmail") == [SEND]
@@ -0,0 +1,70 @@
+import asyncio
+
+from gemini.audio_buffer import AudioCoalescer
+
+
+def collect(**kwargs):
+    sent = []
+
+    async def send(data):
+        sent.append(data)
+
+    return AudioCoalescer(send, **kwargs), sent
+
+
+def test_flushes_when_target_is_reached():
+    async def scenario():
+        buffer, sent = collect(target_bytes=4, max_latency_ms=1000)
+        await buffer.add(b"ab")
+        before = list(sent)
+        await buffer.add(b"cd")
+        buffer.clear()
+        return before, sent
+
+    before, sent = asyncio.run(scenario())
+    assert before == []
+    assert sent == [b"abcd"]
+
+
+def test_flushes_after_deadline():
+    async def scenario():
+        buffer, sent = collect(target_bytes=1000, max_latency_ms=10)
+        await buffer.add(b"ab")
+        await buffer.add(b"cd")
+        await asyncio.sleep(0.05)
+        return sent
+
+    assert asyncio.run(scenario()) == [b"abcd"]
+
+
+def test_explicit_flush_cancels_deadline():
+    async def scenario():
+        buffer, sent = collect(target_bytes=1000, max_latency_ms=10)
+        await buffer.add(b"ab")
+        await buffer.flush()
+        await buffer.flush()
+        await asyncio.sleep(0.03)
+        return sent
+
+    assert asyncio.run(scenario()) == [b"ab"]
+
+
+def test_clear_drops_audio():
+    async def scenario():
+        buffer, sent = collect(target_bytes=1000, max_latency_ms=10)
+        await buffer.add(b"ab")
+        buffer.clear()
+        await asyncio.sleep(0.03)
+        return sent, len(buffer)
+
+    assert asyncio.run(scenario()) == ([], 0)
+
+
+def test_batching_disabled_sends_every_chunk():
+    async def scenario():
+        buffer, sent = collect(target_bytes=0)
+        await buffer.add(b"a")
+        await buffer.add(b"b")
+        return sent
+
+    assert asyncio.run(scenario()) == [b"a", b"b"]
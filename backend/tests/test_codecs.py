@@ -0,0 +1,59 @@
+import struct
+
+import pytest
+
+from gemini import codecs
+from gemini.frames import FRAME_AUDIO_PCM16, HEADER_SIZE, build_frame, parse_frame
+
+
+def test_frame_round_trip():
+    frame = build_frame(FRAME_AUDIO_PCM16, b"\x01\x02\x03\x04", 24000)
+    parsed = parse_frame(frame)
+    assert parsed.kind == FRAME_AUDIO_PCM16
+    assert parsed.sample_rate == 24000
+    assert bytes(parsed.payload) == b"\x01\x02\x03\x04"
+    assert len(frame) == HEADER_SIZE + 4
+
+
+def test_frame_rejects_short_and_unknown_versions():
+    with pytest.raises(ValueError):
+        parse_frame(b"\x01\x01")
+    with pytest.raises(ValueError):
+        parse_frame(struct.pack("<BBH", FRAME_AUDIO_PCM16, 99, 0))
+
+
+def test_no_codec_without_client_request():
+    assert codecs.negotiate_codec(None) is None
+    assert codecs.negotiate_codec([]) is None
+    assert codecs.negotiate_codec("mulaw") is None
+
+
+def test_no_codec_unless_enabled_by_configuration():
+    assert codecs.negotiate_codec(["opus", "mulaw"], allowed=[]) is None
+
+
+@pytest.mark.skipif(not codecs.has_numpy, reason="mu-law needs numpy")
+def test_first_usable_codec_wins():
+    assert codecs.negotiate_codec(["flac", "MULAW"], allowed=["opus", "mulaw"]) == "mulaw"
+    assert codecs.negotiate_codec(["mulaw"], allowed=["opus"]) is None
+
+
+@pytest.mark.skipif(not codecs.has_numpy, reason="mu-law needs numpy")
+def test_mulaw_reference_values():
+    encoder = codecs.create_encoder("mulaw")
+    pcm = struct.pack("<3h", 0, 32767, -32768)
+    # G.711: silence is 0xFF, full scale is 0x80 / 0x00
+    assert encoder.encode(pcm) == bytes([0xFF, 0x80, 0x00])
+    assert encoder.flush() == b""
+
+
+@pytest.mark.skipif(not codecs.has_numpy, reason="mu-law needs numpy")
+def test_mulaw_matches_audioop():
+    audioop = pytest.importorskip("audioop")
+    pcm = struct.pack("<65536h", *range(-32768, 32768))
+    assert codecs.create_encoder("mulaw").encode(pcm) == audioop.lin2ulaw(pcm, 2)
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        codecs.create_encoder("flac")
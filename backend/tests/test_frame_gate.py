@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+from gemini import frame_gate
+from gemini.frame_gate import FrameGate
+
+pytestmark = pytest.mark.skipif(not frame_gate.has_imaging, reason="needs numpy and Pillow")
+
+
+def jpeg(level, square=None):
+    from PIL import Image
+    image = Image.new("L", (320, 240), level)
+    if square is not None:
+        image.paste(255 - level, (square, square, square + 80, square + 80))
+    output = io.BytesIO()
+    image.convert("RGB").save(output, "JPEG")
+    return output.getvalue()
+
+
+def test_first_frame_is_forwarded():
+    assert FrameGate("camera").should_forward(jpeg(100), now=10.0)
+
+
+def test_frames_inside_min_interval_are_dropped():
+    gate = FrameGate("camera", min_interval=0.5)
+    gate.should_forward(jpeg(100), now=10.0)
+    assert not gate.should_forward(jpeg(200), now=10.2)
+    assert gate.dropped == 1
+
+
+def test_changed_scene_is_forwarded_and_static_scene_backs_off():
+    gate = FrameGate("camera", min_interval=0.5, max_interval=4.0)
+    static = jpeg(100)
+    gate.should_forward(static, now=10.0)
+    # Unchanged frames are refreshed at a doubling interval
+    assert gate.should_forward(static, now=10.6)
+    assert gate.interval == 1.0
+    assert not gate.should_forward(static, now=11.2)
+    assert gate.should_forward(static, now=11.6)
+    assert gate.interval == 2.0
+    # A change goes out as soon as min_interval allows, and resets the interval
+    assert not gate.should_forward(jpeg(100, square=40), now=11.9)
+    assert gate.should_forward(jpeg(100, square=40), now=12.2)
+    assert gate.interval == 0.5
+
+
+def test_static_scene_is_refreshed_by_max_interval():
+    gate = FrameGate("screen", min_interval=0.5, max_interval=2.0)
+    static = jpeg(50)
+    now = 0.0
+    forwarded_at = []
+    while now < 20:
+        if gate.should_forward(static, now=now):
+            forwarded_at.append(now)
+        now += 0.25
+    gaps = [b - a for a, b in zip(forwarded_at, forwarded_at[1:])]
+    assert max(gaps) <= 2.0
+    assert gaps[-1] == 2.0
+
+
+def test_undecodable_frame_is_forwarded():
+    gate = FrameGate("camera")
+    assert gate.should_forward(b"not a jpeg", now=1.0)
@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+from websockets.exceptions import ConnectionClosed
+from websockets.frames import Close
+
+from core import serialization
+from gemini import client as client_module
+from gemini.client import GeminiConnection, reconnect_buffer_dropped
+
+
+def closed(code):
+    return ConnectionClosed(Close(code, "test"), None)
+
+
+class FakeSocket:
+    """Records what is sent; recv() plays back replies, then raises close_error."""
+
+    def __init__(self, replies=(), close_error=None, send_error=None):
+        self.sent = []
+        self.replies = list(replies)
+        self.close_error = close_error
+        self.send_error = send_error
+        self.close_code = None
+
+    async def send(self, payload):
+        if self.send_error is not None:
+            raise self.send_error
+        self.sent.append(serialization.loads(payload))
+
+    async def recv(self):
+        if self.replies:
+            return self.replies.pop(0)
+        raise self.close_error or closed(1000)
+
+    async def close(self):
+        self.close_code = 1000
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    monkeypatch.setenv("GEMINI_API_KEY", "test")
+    connection = GeminiConnection(base_uri="ws://gemini.test")
+    connection.set_config({"systemPrompt": "Be brief.", "voice": "Puck", "currentMode": "audio"})
+    connection.reconnect_base_delay = 0
+    return connection
+
+
+def connect_to(monkeypatch, *sockets):
+    """Make each (re)connect return the next socket, or raise it if it is an exception."""
+    queue = list(sockets)
+    opened = []
+
+    async def fake_connect(uri, **kwargs):
+        target = queue.pop(0)
+        if isinstance(target, Exception):
+            raise target
+        opened.append(target)
+        return target
+
+    monkeypatch.setattr(client_module, "connect", fake_connect)
+    return opened
+
+
+def test_hold_keeps_only_the_newest_image(gemini):
+    gemini._hold("image", "frame-1")
+    gemini._hold("text", "hello")
+    gemini._hold("image", "frame-2")
+    assert list(gemini._pending) == [("text", "hello"), ("image", "frame-2")]
+
+
+def test_hold_drops_media_first_when_full(gemini):
+    gemini._pending_limit = 3
+    dropped = reconnect_buffer_dropped.value(kind="audio")
+    for kind, payload in [("text", "t1"), ("audio", "a1"), ("audio", "a2"), ("tool", "f1")]:
+        gemini._hold(kind, payload)
+    assert list(gemini._pending) == [("text", "t1"), ("audio", "a2"), ("tool", "f1")]
+
+    gemini._hold("text", "t2")
+    assert list(gemini._pending) == [("text", "t1"), ("tool", "f1"), ("text", "t2")]
+    # Full of messages that must not be lost: new media is dropped instead
+    gemini._hold("audio", "a3")
+    assert list(gemini._pending) == [("text", "t1"), ("tool", "f1"), ("text", "t2")]
+    assert reconnect_buffer_dropped.value(kind="audio") == dropped + 3
+
+
+def test_fatal_close_code_does_not_reconnect(gemini, monkeypatch):
+    opened = connect_to(monkeypatch)
+    gemini.ws = FakeSocket(close_error=closed(1008), send_error=closed(1008))
+
+    async def scenario():
+        with pytest.raises(ConnectionClosed):
+            await gemini._send("text", serialization.dumps({"client_content": {}}))
+        with pytest.raises(ConnectionClosed):
+            await gemini.receive()
+
+    asyncio.run(scenario())
+    assert gemini._reconnect_task is None
+    assert not gemini._pending
+    assert opened == []
+
+
+def test_reconnect_replays_history_and_held_messages(gemini, monkeypatch):
+    second = FakeSocket(replies=['{"setupComplete": {}}', '{"serverContent": {}}'])
+    connect_to(monkeypatch, second)
+    gemini.ws = FakeSocket(close_error=closed(1011), send_error=closed(1011))
+    gemini.history = [{"role": "user", "parts": [{"text": "hi"}]}]
+    states = []
+    gemini.on_reconnect = states.append
+
+    async def scenario():
+        await gemini._send("text", serialization.dumps({"client_content": {"turns": []}}))
+        return await gemini.receive()
+
+    assert asyncio.run(scenario()) == '{"serverContent": {}}'
+    assert [next(iter(message)) for message in second.sent] == ["setup", "client_content", "client_content"]
+    assert second.sent[1]["client_content"]["turns"] == gemini.history
+    assert states == ["reconnecting", "reconnected"]
+    assert gemini.reconnects == 1
+
+
+def test_history_replay_is_skipped_with_a_resumption_handle(gemini, monkeypatch):
+    second = FakeSocket(replies=['{"setupComplete": {}}', '{"serverContent": {}}'])
+    connect_to(monkeypatch, second)
+    gemini.session_resumption = True
+    gemini.resumption_handle = "handle-1"
+    gemini.history = [{"role": "user", "parts": [{"text": "hi"}]}]
+    gemini.ws = FakeSocket(close_error=closed(1011))
+
+    asyncio.run(gemini.receive())
+    assert [next(iter(message)) for message in second.sent] == ["setup"]
+    assert second.sent[0]["setup"]["session_resumption"]["handle"] == "handle-1"
+
+
+def test_failed_reconnect_raises_and_notifies(gemini, monkeypatch):
+    gemini.reconnect_attempts = 2
+    connect_to(monkeypatch, OSError("refused"), OSError("refused"))
+    gemini.ws = FakeSocket(close_error=closed(1011))
+    gemini._pending.append(("text", "{}"))
+    states = []
+
+    async def on_reconnect(state):
+        states.append(state)
+
+    gemini.on_reconnect = on_reconnect
+
+    async def scenario():
+        with pytest.raises(ConnectionError):
+            await gemini.receive()
+        # Later sends fail for good instead of starting another reconnect
+        gemini.ws = FakeSocket(send_error=closed(1011))
+        with pytest.raises(ConnectionClosed):
+            await gemini._send("audio", "{}")
+
+    asyncio.run(scenario())
+    assert states == ["reconnecting", "failed"]
+    assert not gemini._pending
+    assert gemini._reconnect_task is None
@@ -0,0 +1,31 @@
+from core.log import MAX_FIELD_ITEMS, Sampler, clip, parse_sampling
+
+
+def test_clip_bounds_values():
+    assert clip(5) == 5
+    assert clip(None) is None
+    assert clip(b"\x00" * 10) == "<10 bytes>"
+    assert clip("x" * 20, limit=5) == "xxxxx...(+15 chars)"
+    assert clip(ValueError("bad")) == "ValueError: bad"
+
+
+def test_clip_copies_containers_shallowly():
+    clipped = clip({str(i): i for i in range(MAX_FIELD_ITEMS + 3)})
+    assert len(clipped) == MAX_FIELD_ITEMS + 1
+    assert clipped["..."] == "+3 keys"
+    nested = clip({"a": {"b": {"c": [1, 2]}}})
+    assert isinstance(nested["a"]["b"], str)
+
+
+def test_parse_sampling():
+    assert parse_sampling("http=0.01, gemini.part=0,bad=x,=1,high=5") == {"http": 0.01, "gemini.part": 0.0, "high": 1.0}
+
+
+def test_sampler_keeps_a_fixed_fraction():
+    sampler = Sampler({"http": 0.25, "off": 0.0})
+    kept = [sampler.keep("http") for _ in range(12)]
+    # The first event of a category is kept, then one in every four
+    assert [index for index, keep in enumerate(kept) if keep] == [0, 3, 7, 11]
+    assert not any(sampler.keep("off") for _ in range(3))
+    assert sampler.keep("other")
+    assert sampler.dropped == {"http": 8, "off": 3}
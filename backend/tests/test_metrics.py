@@ -0,0 +1,125 @@
+import types
+
+import pytest
+
+from core import metrics as metrics_module
+from core.metrics import Histogram, MetricsRegistry, SessionTimeline
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(metrics_module, "time", types.SimpleNamespace(monotonic=clock))
+    # Fresh histograms, so the process-wide ones do not leak between tests
+    for name in ("session_stage_seconds", "first_part_seconds", "first_audio_seconds", "turn_seconds"):
+        original = getattr(metrics_module, name)
+        monkeypatch.setattr(metrics_module, name, Histogram(original.name, original.help, original.labelnames))
+    return clock
+
+
+def observed(histogram, **labels):
+    """Values observed per label set, as (count, sum)."""
+    key = tuple(labels.get(name, "") for name in histogram.labelnames)
+    series = histogram._series.get(key)
+    return (series[2], round(series[1], 6)) if series else (0, 0)
+
+
+def test_audio_turn_is_anchored_to_the_last_chunk_before_the_answer(clock):
+    timeline = SessionTimeline()
+    for clock.now in (1.0, 1.5):
+        timeline.input_sent("audio")
+    clock.now = 2.0
+    timeline.model_part("text")
+    # The microphone keeps streaming while the model answers
+    clock.now = 2.2
+    timeline.input_sent("audio")
+    clock.now = 2.7
+    timeline.model_part("audio")
+    clock.now = 2.9
+    timeline.model_part("audio")
+    clock.now = 3.5
+    timeline.turn_complete()
+
+    assert observed(metrics_module.first_part_seconds, trigger="audio") == (1, 0.5)
+    assert observed(metrics_module.first_audio_seconds, trigger="audio") == (1, 1.2)
+    assert observed(metrics_module.turn_seconds, trigger="audio") == (1, 2.0)
+    assert timeline.summary() == {"first_audio_up": 1000.0, "first_model_part": 2000.0,
+                                  "first_audio_down": 2700.0, "first_turn_complete": 3500.0}
+
+
+def test_each_turn_measures_its_own_first_audio(clock):
+    timeline = SessionTimeline()
+    clock.now = 1.0
+    timeline.input_sent("text")
+    clock.now = 1.4
+    timeline.model_part("audio")
+    clock.now = 2.0
+    timeline.turn_complete()
+    assert not timeline.in_turn
+
+    clock.now = 5.0
+    timeline.input_sent("tool")
+    assert timeline.in_turn
+    clock.now = 5.1
+    timeline.model_part("audio")
+    clock.now = 5.2
+    timeline.turn_complete()
+
+    assert observed(metrics_module.first_audio_seconds, trigger="text") == (1, 0.4)
+    assert observed(metrics_module.first_audio_seconds, trigger="tool") == (1, 0.1)
+    assert timeline.turns == 2
+    # Stages are recorded once per session
+    assert observed(metrics_module.session_stage_seconds, stage="first_audio_down") == (1, 1.4)
+
+
+def test_turn_without_user_input_is_not_measured(clock):
+    timeline = SessionTimeline()
+    clock.now = 1.0
+    timeline.model_part("audio")
+    timeline.turn_complete()
+    assert observed(metrics_module.first_audio_seconds, trigger="audio") == (0, 0)
+    assert observed(metrics_module.turn_seconds, trigger="audio") == (0, 0)
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("relay_requests_total", "Requests", ("route",))
+    latency = registry.histogram("relay_latency_seconds", "Latency", buckets=(0.1, 1))
+    assert registry.counter("relay_requests_total", "Requests", ("route",)) is requests
+
+    requests.inc(route="/ws")
+    requests.inc(2, route='say "hi"')
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+    registry.add_collector(lambda: [("relay_sessions", "gauge", "Live sessions", [({}, 3), ({"mode": "audio"}, 1.5)])])
+
+    def broken():
+        raise RuntimeError("stats unavailable")
+
+    registry.add_collector(broken)
+
+    assert registry.render() == "\n".join([
+        "# HELP relay_requests_total Requests",
+        "# TYPE relay_requests_total counter",
+        'relay_requests_total{route="/ws"} 1',
+        'relay_requests_total{route="say \\"hi\\""} 2',
+        "# HELP relay_latency_seconds Latency",
+        "# TYPE relay_latency_seconds histogram",
+        'relay_latency_seconds_bucket{le="0.1"} 1',
+        'relay_latency_seconds_bucket{le="1.0"} 2',
+        'relay_latency_seconds_bucket{le="+Inf"} 3',
+        "relay_latency_seconds_sum 5.55",
+        "relay_latency_seconds_count 3",
+        "# HELP relay_sessions Live sessions",
+        "# TYPE relay_sessions gauge",
+        "relay_sessions 3",
+        'relay_sessions{mode="audio"} 1.5',
+    ]) + "\n"
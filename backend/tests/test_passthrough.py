@@ -0,0 +1,88 @@
+import base64
+import json
+
+import pytest
+
+from core import serialization
+from gemini.passthrough import DEFAULT_OUTPUT_SAMPLE_RATE, audio_message, match_audio_only, sample_rate_from_mime
+
+DATA = base64.b64encode(bytes(range(256)) * 4).decode("ascii")
+
+
+def audio_only(data=DATA, mime="audio/pcm;rate=24000"):
+    return {"serverContent": {"modelTurn": {"parts": [{"inlineData": {"mimeType": mime, "data": data}}]}}}
+
+
+@pytest.mark.parametrize("encode", [json.dumps, serialization.dumps, lambda value: json.dumps(value, indent=2)])
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+def test_matches_audio_only_messages(encode, as_bytes):
+    raw = encode(audio_only(mime="audio/pcm;rate=16000"))
+    raw = raw.encode() if as_bytes else raw
+    match = match_audio_only(raw)
+    assert match is not None
+    assert match.sample_rate == 16000
+    assert match.data == (DATA.encode() if as_bytes else DATA)
+
+
+def test_rate_defaults_like_the_decode_path():
+    match = match_audio_only(json.dumps(audio_only(mime="audio/pcm")))
+    assert match.sample_rate == DEFAULT_OUTPUT_SAMPLE_RATE == sample_rate_from_mime("audio/pcm")
+
+
+def with_turn_complete():
+    message = audio_only()
+    message["serverContent"]["turnComplete"] = True
+    return json.dumps(message)
+
+
+def with_extra_part_key():
+    message = audio_only()
+    message["serverContent"]["modelTurn"]["parts"][0]["inlineData"]["extra"] = 1
+    return json.dumps(message)
+
+
+def with_usage_metadata():
+    message = audio_only()
+    message["usageMetadata"] = {"totalTokenCount": 10}
+    return json.dumps(message)
+
+
+def with_two_parts():
+    message = audio_only()
+    message["serverContent"]["modelTurn"]["parts"].append({"text": "hi"})
+    return json.dumps(message)
+
+
+def with_reordered_keys():
+    return json.dumps({"serverContent": {"modelTurn": {"parts": [{"inlineData": {"data": DATA, "mimeType": "audio/pcm;rate=24000"}}]}}})
+
+
+def with_escaped_data():
+    # DATA starts with "A"; JSON may spell it \u0041
+    return json.dumps(audio_only()).replace('"data": "A', '"data": "\\u0041', 1)
+
+
+@pytest.mark.parametrize("raw", [
+    with_turn_complete(), with_extra_part_key(), with_usage_metadata(), with_two_parts(),
+    with_reordered_keys(), with_escaped_data(), json.dumps(audio_only(mime="audio/wav")), '{"setupComplete": {}}', "not json"
+], ids=["turn_complete", "extra_key", "usage_metadata", "two_parts", "reordered", "escaped", "other_mime", "setup", "garbage"])
+def test_other_messages_take_the_decode_path(raw):
+    assert match_audio_only(raw) is None
+    assert match_audio_only(raw.encode()) is None
+
+
+def test_escaped_data_is_left_to_the_decoder():
+    raw = with_escaped_data()
+    assert "\\u0041" in raw
+    assert serialization.loads(raw) == audio_only()
+
+
+@pytest.mark.parametrize("as_bytes", [False, True], ids=["str", "bytes"])
+def test_audio_message_matches_the_decode_path(as_bytes):
+    raw = json.dumps(audio_only())
+    raw = raw.encode() if as_bytes else raw
+    fast = audio_message(match_audio_only(raw).data)
+    decoded = serialization.loads(raw)["serverContent"]["modelTurn"]["parts"][0]["inlineData"]["data"]
+    assert fast == serialization.dumps({"type": "audio", "data": decoded})
+    assert fast == audio_message(decoded)
+    assert json.loads(fast) == {"type": "audio", "data": DATA}
@@ -0,0 +1,56 @@
+import asyncio
+
+from core.queues import RelayQueue
+
+
+def test_fifo_and_stats():
+    async def scenario():
+        queue = RelayQueue("upstream", maxsize=4)
+        await queue.put("text", 1)
+        await queue.put("audio", 2)
+        return [await queue.get(), await queue.get()], queue.stats()
+
+    items, stats = asyncio.run(scenario())
+    assert items == [("text", 1), ("audio", 2)]
+    assert stats["high_water_mark"] == 2
+    assert stats["enqueued"] == {"text": 1, "audio": 1}
+
+
+def test_full_queue_drops_images_before_audio():
+    async def scenario():
+        queue = RelayQueue("upstream", maxsize=3)
+        await queue.put("audio", "a1")
+        await queue.put("image", "i1")
+        await queue.put("audio", "a2")
+        await queue.put("audio", "a3")
+        await queue.put("audio", "a4")
+        return [(await queue.get())[1] for _ in range(len(queue))], queue.dropped
+
+    items, dropped = asyncio.run(scenario())
+    assert items == ["a2", "a3", "a4"]
+    assert dropped == {"image": 1, "audio": 1}
+
+
+def test_image_never_evicts_audio():
+    async def scenario():
+        queue = RelayQueue("upstream", maxsize=2)
+        await queue.put("audio", "a1")
+        await queue.put("audio", "a2")
+        await queue.put("image", "i1")
+        return [(await queue.get())[1] for _ in range(len(queue))], queue.dropped
+
+    assert asyncio.run(scenario()) == (["a1", "a2"], {"image": 1})
+
+
+def test_text_waits_for_space_instead_of_dropping():
+    async def scenario():
+        queue = RelayQueue("downstream", maxsize=1)
+        await queue.put("text", "t1")
+        blocked = asyncio.ensure_future(queue.put("tool", "t2"))
+        await asyncio.sleep(0.01)
+        waiting = not blocked.done()
+        first = await queue.get()
+        await blocked
+        return waiting, first, await queue.get(), queue.dropped
+
+    assert asyncio.run(scenario()) == (True, ("text", "t1"), ("tool", "t2"), {})
@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from composio_integration.result_cache import ToolResultCache
+
+
+@pytest.mark.parametrize("name", [
+    "GITHUB_GET_AN_ISSUE",
+    "GMAIL_LIST_THREADS",
+    "GMAIL_FETCH_EMAILS",
+    "NOTION_SEARCH_NOTION_PAGE",
+])
+def test_read_actions_are_cacheable(name):
+    assert ToolResultCache(enabled=True).is_cacheable(name)
+
+
+@pytest.mark.parametrize("name", [
+    "GMAIL_MARK_AS_READ",
+    "SLACK_MARK_CHANNEL_READ",
+    "GMAIL_SEND_EMAIL",
+    "GMAIL_ADD_LABEL_TO_EMAIL",
+    "GITHUB_STAR_A_REPOSITORY_FOR_THE_AUTHENTICATED_USER",
+    "GMAIL_ARCHIVE_THREAD",
+    "SLACK_SET_READ_CURSOR",
+    "GITHUB_CREATE_AN_ISSUE_LIST",
+    # A read word outside the verb position does not make an action read-only
+    "TRELLO_REMOVE_READ_ONLY_FLAG",
+    "SLACK_UPDATE_LIST",
+])
+def test_mutating_actions_are_not_cacheable(name):
+    assert not ToolResultCache(enabled=True).is_cacheable(name)
+
+
+def test_patterns_override_verbs():
+    cache = ToolResultCache(enabled=True, read_only=["notion_query_*"], exclude=["GITHUB_GET_*"])
+    assert cache.is_cacheable("NOTION_QUERY_DATABASE")
+    assert not cache.is_cacheable("GITHUB_GET_AN_ISSUE")
+
+
+def test_repeat_call_is_served_from_cache():
+    cache = ToolResultCache(enabled=True)
+    calls = []
+
+    async def run():
+        calls.append(1)
+        return {"data": len(calls)}
+
+    async def scenario():
+        first = await cache.get_or_run("client-1", "GITHUB_GET_AN_ISSUE", {"a": 1, "b": 2}, run)
+        second = await cache.get_or_run("client-1", "GITHUB_GET_AN_ISSUE", {"b": 2, "a": 1}, run)
+        other_scope = await cache.get_or_run("client-2", "GITHUB_GET_AN_ISSUE", {"a": 1, "b": 2}, run)
+        return first, second, other_scope
+
+    first, second, other_scope = asyncio.run(scenario())
+    assert first == ({"data": 1}, False)
+    assert second == ({"data": 1}, True)
+    assert other_scope == ({"data": 2}, False)
+
+
+def test_invalidate_drops_one_session():
+    cache = ToolResultCache(enabled=True)
+
+    async def run():
+        return {"data": 1}
+
+    async def scenario():
+        for scope in ("client-1", "client-2"):
+            await cache.get_or_run(scope, "GITHUB_GET_AN_ISSUE", {}, run)
+        cache.invalidate("client-1")
+        hits = [(await cache.get_or_run(scope, "GITHUB_GET_AN_ISSUE", {}, run))[1] for scope in ("client-1", "client-2")]
+        cache.invalidate()
+        return hits, cache.stats()["size"]
+
+    assert asyncio.run(scenario()) == ([False, True], 0)
+
+
+def test_errors_are_not_cached():
+    cache = ToolResultCache(enabled=True)
+    results = iter([{"successful": False, "error": "rate limited"}, {"data": "ok"}])
+
+    async def run():
+        return next(results)
+
+    async def scenario():
+        await cache.get_or_run("default", "GMAIL_LIST_THREADS", {}, run)
+        return await cache.get_or_run("default", "GMAIL_LIST_THREADS", {}, run)
+
+    assert asyncio.run(scenario()) == ({"data": "ok"}, False)
+
+
+def test_cancelled_leader_does_not_cancel_waiters():
+    cache = ToolResultCache(enabled=True)
+    release = None
+    calls = []
+
+    async def run():
+        calls.append(1)
+        await release.wait()
+        return {"data": "issue"}
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        leader = asyncio.ensure_future(cache.get_or_run("default", "GITHUB_GET_AN_ISSUE", {"n": 1}, run))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_run("default", "GITHUB_GET_AN_ISSUE", {"n": 1}, run))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        result = await waiter
+        # The fetch finished and was cached for later calls
+        again = await cache.get_or_run("default", "GITHUB_GET_AN_ISSUE", {"n": 1}, run)
+        return result, again
+
+    result, again = asyncio.run(scenario())
+    assert result == ({"data": "issue"}, True)
+    assert again == ({"data": "issue"}, True)
+    assert len(calls) == 1
+
+
+def test_cancelled_waiter_does_not_cancel_leader():
+    cache = ToolResultCache(enabled=True)
+
+    async def run():
+        await asyncio.sleep(0.01)
+        return {"data": "issue"}
+
+    async def scenario():
+        leader = asyncio.ensure_future(cache.get_or_run("default", "GITHUB_GET_AN_ISSUE", {}, run))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_run("default", "GITHUB_GET_AN_ISSUE", {}, run))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        return await leader
+
+    assert asyncio.run(scenario()) == ({"data": "issue"}, False)
+
+
+def test_failure_reaches_every_caller():
+    cache = ToolResultCache(enabled=True)
+
+    async def run():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("composio down")
+
+    async def scenario():
+        calls = [cache.get_or_run("default", "GITHUB_GET_AN_ISSUE", {}, run) for _ in range(3)]
+        return await asyncio.gather(*calls, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not cache._inflight
@@ -0,0 +1,97 @@
+import asyncio
+
+from composio_integration.result_shaping import ResultShaper, largest_list_path, parse_fields, project, resolve, trim
+from core import serialization
+from core.session_store import MemorySessionStore
+
+
+def mailbox(count):
+    return {"data": {"messages": [
+        {"messageId": str(index), "subject": f"Subject {index}", "body": "x" * 500, "labels": ["INBOX"]}
+        for index in range(count)
+    ]}}
+
+
+def test_parse_fields():
+    assert parse_fields("gmail_fetch_emails=messageId, subject;GITHUB_*=title;broken;=x") == {
+        "GMAIL_FETCH_EMAILS": ["messageId", "subject"],
+        "GITHUB_*": ["title"],
+    }
+
+
+def test_project_keeps_wrappers():
+    projected = project(mailbox(2), ["messageId", "subject"])
+    assert projected == {"data": {"messages": [
+        {"messageId": "0", "subject": "Subject 0"},
+        {"messageId": "1", "subject": "Subject 1"},
+    ]}}
+
+
+def test_trim_records_cut_lists():
+    lists = {}
+    trimmed = trim({"items": list(range(10)), "text": "y" * 50}, 3, 10, lists)
+    assert trimmed["items"] == [0, 1, 2]
+    assert trimmed["text"].startswith("y" * 10)
+    assert lists == {"items": {"total": 10, "shown": 3}}
+
+
+def test_resolve_and_largest_list():
+    result = {"a": [1], "b": {"c": [1, 2, 3]}}
+    assert largest_list_path(result) == "b.c"
+    assert resolve(result, "b.c.1") == 2
+
+
+def test_small_result_is_returned_as_is():
+    shaper = ResultShaper(MemorySessionStore(), max_bytes=32768)
+    result = mailbox(3)
+    assert asyncio.run(shaper.apply("GMAIL_FETCH_EMAILS", result)) == result
+
+
+def test_projection_applies_below_budget():
+    shaper = ResultShaper(MemorySessionStore(), max_bytes=0, fields={"GMAIL_*": ["messageId"]})
+    shaped = asyncio.run(shaper.apply("GMAIL_FETCH_EMAILS", mailbox(2)))
+    assert shaped == {"data": {"messages": [{"messageId": "0"}, {"messageId": "1"}]}}
+
+
+def test_oversized_result_is_paged_and_fetchable():
+    store = MemorySessionStore()
+    shaper = ResultShaper(store, max_bytes=4096, max_list_items=25)
+    result = mailbox(200)
+
+    async def scenario():
+        page = await shaper.apply("GMAIL_FETCH_EMAILS", result)
+        handle = page["truncated"]["handle"]
+        rest = await shaper.fetch(handle, offset=190, limit=20)
+        missing = await shaper.fetch("nope")
+        bad_path = await shaper.fetch(handle, path="data.nothing")
+        return page, rest, missing, bad_path
+
+    page, rest, missing, bad_path = asyncio.run(scenario())
+    assert len(serialization.dumps_bytes(page["result"])) <= 4096
+    assert page["truncated"]["total_bytes"] == len(serialization.dumps_bytes(result))
+    assert page["truncated"]["lists"]["data.messages"]["total"] == 200
+    assert rest["path"] == "data.messages"
+    assert rest["total"] == 200
+    assert [item["messageId"] for item in rest["items"]][0] == "190"
+    assert "error" in missing
+    assert "error" in bad_path
+
+
+def test_expired_results_are_freed():
+    store = MemorySessionStore(sweep_interval=0)
+    shaper = ResultShaper(store, max_bytes=4096, ttl=0.01)
+
+    async def scenario():
+        for _ in range(5):
+            await shaper.apply("GMAIL_FETCH_EMAILS", mailbox(200))
+        held = len(store._entries)
+        await asyncio.sleep(0.05)
+        await store.set("session:a", {}, 60)
+        return held, list(store._entries)
+
+    assert asyncio.run(scenario()) == (5, ["session:a"])
+
+
+def test_token_budget_tightens_byte_budget():
+    shaper = ResultShaper(MemorySessionStore(), max_bytes=32768, max_tokens=1000)
+    assert shaper.budget == 4000
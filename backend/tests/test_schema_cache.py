@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from composio_integration.cache import ToolSchemaCache, normalize_apps
+
+
+def test_normalize_apps():
+    assert normalize_apps([" Gmail", "github", "GMAIL", ""]) == ("github", "gmail")
+    assert normalize_apps(None) == ()
+
+
+def test_concurrent_misses_load_once():
+    cache = ToolSchemaCache()
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return ["schema"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.get_or_load(("gmail",), loader), range(8)))
+
+    assert results == [["schema"]] * 8
+    assert len(calls) == 1
+    assert cache.get_or_load(("gmail",), loader) == ["schema"]
+    assert len(calls) == 1
+
+
+def test_failures_are_shared_and_not_cached():
+    cache = ToolSchemaCache()
+
+    def failing():
+        raise RuntimeError("composio down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load(("github",), failing)
+    assert cache.get_or_load(("github",), lambda: ["ok"]) == ["ok"]
+
+
+def test_invalidate_discards_loads_in_progress():
+    cache = ToolSchemaCache()
+    release = threading.Event()
+
+    def slow():
+        release.wait()
+        return ["stale"]
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = pool.submit(cache.get_or_load, ("slack",), slow)
+        time.sleep(0.02)
+        cache.invalidate()
+        release.set()
+        assert future.result() == ["stale"]
+
+    assert cache.get_or_load(("slack",), lambda: ["fresh"]) == ["fresh"]
@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from core import serialization
+
+
+def test_round_trip_and_compact_output():
+    value = {"text": "héllo", "n": [1, 2.5, None, True]}
+    text = serialization.dumps(value)
+    assert " " not in text
+    assert serialization.loads(text) == value
+    assert serialization.loads(serialization.dumps_bytes(value)) == value
+    assert serialization.loads(memoryview(serialization.dumps_bytes(value))) == value
+
+
+def test_canonical_form_ignores_key_order():
+    assert serialization.dumps_canonical({"b": 1, "a": {"d": 2, "c": 3}}) == serialization.dumps_canonical({"a": {"c": 3, "d": 2}, "b": 1})
+
+
+def test_big_integers_fall_back_to_json():
+    assert serialization.loads(serialization.dumps({"n": 2 ** 70})) == {"n": 2 ** 70}
+
+
+def test_decode_errors_are_json_errors():
+    with pytest.raises(json.JSONDecodeError):
+        serialization.loads("{not json")
@@ -0,0 +1,145 @@
+import asyncio
+
+from websockets.exceptions import ConnectionClosedOK
+
+from gemini.session_pool import GeminiSessionPool
+
+
+class FakeSocket:
+    def __init__(self):
+        self.inbox = asyncio.Queue()
+        self.close_code = None
+
+    async def recv(self):
+        message = await self.inbox.get()
+        if message is None:
+            self.close_code = 1000
+            raise ConnectionClosedOK(None, None)
+        return message
+
+
+class FakeConnection:
+    opened = []
+
+    def __init__(self):
+        self.ws = None
+        self.closed = False
+        self.observed = []
+
+    def set_config(self, config, key=None):
+        self.config = config
+
+    async def connect(self):
+        self.ws = FakeSocket()
+        FakeConnection.opened.append(self)
+
+    def is_open(self):
+        return self.ws is not None and self.ws.close_code is None
+
+    def observe(self, response):
+        self.observed.append(response)
+
+    async def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    FakeConnection.opened = []
+    return GeminiSessionPool(factory=FakeConnection, **kwargs)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_one_off_config_is_not_refilled():
+    async def scenario():
+        pool = make_pool(max_size=4, refill_after=2)
+        await pool.acquire({"systemPrompt": "once"})
+        await settle()
+        stats = pool.stats()
+        await pool.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["idle"] == 0
+    assert len(FakeConnection.opened) == 1
+
+
+def test_repeated_config_is_refilled_and_handed_out():
+    async def scenario():
+        pool = make_pool(max_size=4, refill_after=2)
+        config = {"systemPrompt": "again"}
+        await pool.acquire(config)
+        await pool.acquire(config)
+        await settle()
+        idle_before = pool.stats()["idle"]
+        third = await pool.acquire(config)
+        stats = pool.stats()
+        await pool.close()
+        return idle_before, third, stats
+
+    idle_before, third, stats = asyncio.run(scenario())
+    assert idle_before == 1
+    assert third is FakeConnection.opened[2]
+    assert stats["hits"] == 1
+
+
+def test_idle_session_retired_on_go_away_and_close():
+    async def scenario():
+        pool = make_pool(max_size=4, per_config=1, refill_after=1)
+        config = {"systemPrompt": "watched"}
+        await pool.acquire(config)
+        await settle()
+        warm = FakeConnection.opened[1]
+        await warm.ws.inbox.put('{"sessionResumptionUpdate": {"newHandle": "h", "resumable": true}}')
+        await warm.ws.inbox.put('{"goAway": {"timeLeft": "10s"}}')
+        await settle()
+        after_go_away = pool.stats()["idle"]
+        gemini = await pool.acquire(config)
+        await pool.close()
+        return warm, after_go_away, gemini
+
+    warm, after_go_away, gemini = asyncio.run(scenario())
+    assert warm.closed
+    assert warm.observed[0]["sessionResumptionUpdate"]["newHandle"] == "h"
+    assert after_go_away == 0
+    assert gemini is not warm
+
+
+def test_closed_session_is_not_handed_out():
+    async def scenario():
+        pool = make_pool(max_size=4, refill_after=1)
+        config = {"systemPrompt": "closed"}
+        await pool.acquire(config)
+        await settle()
+        warm = FakeConnection.opened[1]
+        await warm.ws.inbox.put(None)
+        await settle()
+        gemini = await pool.acquire(config)
+        await pool.close()
+        return warm, gemini
+
+    warm, gemini = asyncio.run(scenario())
+    assert warm.closed
+    assert gemini is not warm
+
+
+def test_handed_out_session_is_no_longer_read_by_the_pool():
+    async def scenario():
+        pool = make_pool(max_size=4, refill_after=1)
+        config = {"systemPrompt": "handoff"}
+        await pool.acquire(config)
+        await settle()
+        gemini = await pool.acquire(config)
+        await gemini.ws.inbox.put('{"serverContent": {}}')
+        await settle()
+        message = gemini.ws.inbox.get_nowait()
+        await pool.close()
+        return gemini, message
+
+    gemini, message = asyncio.run(scenario())
+    assert gemini is FakeConnection.opened[1]
+    assert message == '{"serverContent": {}}'
+    assert gemini.observed == []
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from core import session_store as store_module
+from core.session_store import MemorySessionStore, RedisSessionStore, SessionStore, create_session_store, list_sessions
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+needs_fakeredis = pytest.mark.skipif(fakeredis is None, reason="needs fakeredis")
+
+
+def memory_store():
+    return MemorySessionStore()
+
+
+def redis_store():
+    return RedisSessionStore(fakeredis.FakeAsyncRedis(), namespace="test:")
+
+
+@pytest.fixture(params=[memory_store, pytest.param(redis_store, marks=needs_fakeredis)], ids=["memory", "redis"])
+def make_store(request):
+    return request.param
+
+
+def run(make_store, scenario):
+    async def wrapper():
+        store = make_store()
+        try:
+            return await scenario(store)
+        finally:
+            await store.close()
+    return asyncio.run(wrapper())
+
+
+def test_set_get_delete(make_store):
+    async def scenario(store):
+        await store.set("oauth:a", {"user": "u1", "scopes": ["x"]}, 60)
+        value = await store.get("oauth:a")
+        await store.delete("oauth:a")
+        await store.delete("oauth:missing")
+        return value, await store.get("oauth:a")
+
+    assert run(make_store, scenario) == ({"user": "u1", "scopes": ["x"]}, None)
+
+
+def test_pop_returns_the_value_once(make_store):
+    async def scenario(store):
+        await store.set("oauth:state", {"n": 1}, 60)
+        results = await asyncio.gather(*(store.pop("oauth:state") for _ in range(5)))
+        return results, await store.pop("oauth:never")
+
+    results, missing = run(make_store, scenario)
+    assert [result for result in results if result is not None] == [{"n": 1}]
+    assert missing is None
+
+
+def test_entries_expire(make_store):
+    async def scenario(store):
+        await store.set("session:short", 1, 0.05)
+        await store.set("session:long", 2, 60)
+        await asyncio.sleep(0.1)
+        return await store.get("session:short"), await store.pop("session:short"), await store.items("session:")
+
+    assert run(make_store, scenario) == (None, None, {"session:long": 2})
+
+
+def test_memory_store_frees_expired_entries_on_set():
+    async def scenario():
+        store = MemorySessionStore(sweep_interval=0)
+        for index in range(50):
+            await store.set(f"result:{index}", "x" * 1000, 0.01)
+        await asyncio.sleep(0.05)
+        await store.set("session:a", 1, 60)
+        return set(store._entries)
+
+    assert asyncio.run(scenario()) == {"session:a"}
+
+
+def test_set_replaces_value_and_ttl(make_store):
+    async def scenario(store):
+        await store.set("session:a", 1, 0.05)
+        await store.set("session:a", 2, 60)
+        await asyncio.sleep(0.1)
+        return await store.get("session:a")
+
+    assert run(make_store, scenario) == 2
+
+
+def test_items_filters_by_prefix(make_store):
+    async def scenario(store):
+        await store.set("session:a", {"client_id": "a"}, 60)
+        await store.set("session:b", {"client_id": "b"}, 60)
+        await store.set("oauth:c", {}, 60)
+        return await store.items("session:"), await list_sessions(store)
+
+    items, sessions = run(make_store, scenario)
+    assert items == {"session:a": {"client_id": "a"}, "session:b": {"client_id": "b"}}
+    assert sorted(session["client_id"] for session in sessions) == ["a", "b"]
+
+
+@needs_fakeredis
+def test_redis_namespace_isolates_deployments():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        first = RedisSessionStore(fakeredis.FakeAsyncRedis(server=server), namespace="one:")
+        second = RedisSessionStore(fakeredis.FakeAsyncRedis(server=server), namespace="two:")
+        await first.set("session:a", 1, 60)
+        return await second.get("session:a"), await second.items("session:"), await first.get("session:a")
+
+    assert asyncio.run(scenario()) == (None, {}, 1)
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+
+def test_create_session_store_by_url():
+    assert isinstance(create_session_store("memory://"), MemorySessionStore)
+    with pytest.raises(ValueError):
+        create_session_store("sqlite:///tmp/x")
+    if store_module.has_redis:
+        assert isinstance(create_session_store("redis://localhost:6379/0"), RedisSessionStore)
@@ -0,0 +1,66 @@
+from gemini import setup as gemini_setup
+from gemini.setup import build_setup, compact_schema, compact_tools, setup_fingerprint, setup_payload, with_session_resumption
+from core import serialization
+
+
+def tool(name, description="d"):
+    return {
+        "name": name,
+        "description": description,
+        "parameters": {
+            "type": "object",
+            "title": "Request",
+            "properties": {
+                "title": {"type": "string", "title": "Title", "examples": ["x"], "description": "p" * 1000},
+                "items": {"type": "array", "items": {"type": "string", "title": "Item"}},
+            },
+        },
+    }
+
+
+def test_fingerprint_ignores_key_order_and_unrelated_keys():
+    first = {"modelId": "m", "systemPrompt": "s", "binaryAudio": True}
+    second = {"systemPrompt": "s", "modelId": "m", "binaryAudio": False}
+    assert setup_fingerprint(first) == setup_fingerprint(second)
+    assert setup_fingerprint(first) != setup_fingerprint({**first, "systemPrompt": "t"})
+
+
+def test_compact_schema_drops_annotations_not_properties():
+    schema = compact_schema(tool("A")["parameters"])
+    assert "title" not in schema
+    assert "title" in schema["properties"]
+    assert "examples" not in schema["properties"]["title"]
+    assert "title" not in schema["properties"]["items"]["items"]
+    assert len(schema["properties"]["title"]["description"]) <= gemini_setup.PARAM_DESCRIPTION_MAX + 3
+
+
+def test_compact_tools_deduplicates_and_keeps_other_entries():
+    tools = [{"function_declarations": [tool("A"), tool("B")]}, {"functionDeclarations": [tool("A")]}, {"google_search": {}}]
+    compacted = compact_tools(tools)
+    assert [d["name"] for d in compacted[0]["function_declarations"]] == ["A", "B"]
+    assert compacted[1] == {"google_search": {}}
+    assert len(compacted) == 2
+
+
+def test_build_setup_modes_and_tools():
+    config = {"currentMode": "audio", "tools": [{"function_declarations": [tool("A")]}], "functionCalling": False}
+    setup = build_setup(config, "default-model")["setup"]
+    assert setup["model"] == "models/default-model"
+    assert setup["generation_config"]["response_modalities"] == ["TEXT", "AUDIO"]
+    assert setup["tool_config"]["function_calling_config"]["mode"] == "NONE"
+    assert "tool_config" not in build_setup({**config, "toolUsage": False}, "m")["setup"]
+
+
+def test_setup_payload_is_cached_per_fingerprint():
+    config = {"modelId": "cached", "systemPrompt": "once"}
+    text, message = setup_payload(config, "m")
+    again, _ = setup_payload(dict(config), "m")
+    assert again is text
+    assert serialization.loads(text) == message
+
+
+def test_session_resumption_is_spliced_in():
+    text, _ = setup_payload({"modelId": "resume"}, "m")
+    resumed = serialization.loads(with_session_resumption(text, "handle-1"))
+    assert resumed["setup"]["session_resumption"] == {"handle": "handle-1"}
+    assert serialization.loads(with_session_resumption(text, None))["setup"]["session_resumption"] == {}
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from composio_integration import tool_selection
+from composio_integration.tool_selection import app_for_action, declarations_of, rank, resolve_session_tools, select_tools
+
+
+def declaration(name, description=""):
+    return {"name": name, "description": description, "parameters": {"type": "object", "properties": {}}}
+
+
+GITHUB = [
+    declaration("GITHUB_CREATE_AN_ISSUE", "Create an issue in a repository"),
+    declaration("GITHUB_GET_AN_ISSUE", "Get an issue by number"),
+    declaration("GITHUB_LIST_PULL_REQUESTS", "List pull requests of a repository"),
+    declaration("GITHUB_STAR_A_REPOSITORY", "Star a repository"),
+]
+GMAIL = [
+    declaration("GMAIL_SEND_EMAIL", "Send an email"),
+    declaration("GMAIL_FETCH_EMAILS", "Fetch emails from the inbox"),
+]
+
+
+class FakeClient:
+    def __init__(self):
+        self.requests = []
+        self.down = False
+
+    def get_tools(self, apps, raise_errors=False):
+        self.requests.append(list(apps))
+        if self.down:
+            if raise_errors:
+                raise ConnectionError("composio unavailable")
+            return []
+        tools = {"github": GITHUB, "gmail": GMAIL}
+        return [{"function_declarations": [d for app in apps for d in tools[app]]}]
+
+
+class FakeIndex:
+    def apps(self):
+        return ["github", "gmail"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(tool_selection, "get_composio_client", lambda: fake)
+    monkeypatch.setattr(tool_selection, "get_action_index", lambda: FakeIndex())
+    tool_selection._selections.clear()
+    return fake
+
+
+def names(tools):
+    return [d["name"] for d in declarations_of(tools)]
+
+
+def test_declarations_of_accepts_every_shape():
+    tools = [{"functionDeclarations": [GITHUB[0]]}, GMAIL[0], {"google_search": {}}, "junk"]
+    assert [d["name"] for d in declarations_of(tools)] == ["GITHUB_CREATE_AN_ISSUE", "GMAIL_SEND_EMAIL"]
+
+
+def test_app_for_action_prefers_longest_prefix():
+    assert app_for_action("GOOGLEDRIVE_LIST_FILES", ["google", "googledrive"]) == "googledrive"
+    assert app_for_action("SLACK_SEND_MESSAGE", ["github"]) is None
+
+
+def test_rank_keeps_relevant_actions_in_order():
+    kept = rank(GITHUB, "Help me triage pull requests", 2)
+    assert len(kept) == 2
+    assert "GITHUB_LIST_PULL_REQUESTS" in [d["name"] for d in kept]
+    assert rank(GITHUB, "anything", 0) == GITHUB
+
+
+def test_named_actions_are_added_to_apps(client):
+    tools = select_tools(("gmail",), ("GITHUB_GET_AN_ISSUE",), "", 0)
+    assert names(tools) == ["GITHUB_GET_AN_ISSUE", "GMAIL_SEND_EMAIL", "GMAIL_FETCH_EMAILS"]
+
+
+def test_top_k_counts_named_actions(client):
+    tools = select_tools(("github",), ("GMAIL_FETCH_EMAILS",), "issues", 2)
+    assert len(names(tools)) == 2
+    assert names(tools)[0] == "GMAIL_FETCH_EMAILS"
+
+
+def test_named_actions_filling_top_k_add_no_ranked_tools(client):
+    tools = select_tools(("github",), ("GMAIL_FETCH_EMAILS", "GMAIL_SEND_EMAIL"), "issues", 2)
+    assert names(tools) == ["GMAIL_SEND_EMAIL", "GMAIL_FETCH_EMAILS"]
+
+
+def test_named_actions_beyond_top_k_are_kept(client):
+    tools = select_tools((), ("GMAIL_FETCH_EMAILS", "GMAIL_SEND_EMAIL", "GITHUB_GET_AN_ISSUE"), "", 1)
+    assert len(names(tools)) == 3
+
+
+def test_selection_is_cached(client):
+    select_tools(("github",), (), "", 0)
+    select_tools(("github",), (), "", 0)
+    assert client.requests == [["github"]]
+
+
+def test_failed_selection_is_not_cached(client):
+    client.down = True
+    with pytest.raises(ConnectionError):
+        select_tools(("github",), (), "", 0)
+    assert asyncio.run(resolve_session_tools({"toolApps": ["github"]})) == {"toolApps": ["github"]}
+
+    client.down = False
+    assert names(select_tools(("github",), (), "", 0)) == [d["name"] for d in GITHUB]
+
+
+def test_empty_selection_is_not_cached(client):
+    assert select_tools((), ("SLACK_SEND_MESSAGE",), "", 0) == []
+    select_tools((), ("SLACK_SEND_MESSAGE",), "", 0)
+    assert len(tool_selection._selections) == 0
+
+
+def test_invalidating_the_client_cache_drops_selections(client):
+    from composio_integration.client import ComposioClient
+
+    select_tools(("github",), (), "", 0)
+    composio = ComposioClient.__new__(ComposioClient)
+    composio.entity_id = "default"
+    composio.invalidate_tools_cache()
+    select_tools(("github",), (), "", 0)
+    assert client.requests == [["github"], ["github"]]
+
+
+def test_resolve_session_tools_appends_to_own_tools(client):
+    own = [{"function_declarations": [declaration("MY_TOOL")]}]
+    config = {"toolApps": ["GitHub"], "tools": own, "systemPrompt": "x"}
+    resolved = asyncio.run(resolve_session_tools(config))
+    assert names(resolved["tools"]) == ["MY_TOOL"] + [d["name"] for d in GITHUB]
+    assert config["tools"] is own
+
+
+def test_resolve_session_tools_leaves_other_configs_alone(client):
+    config = {"toolApps": ["github"], "toolUsage": False}
+    assert asyncio.run(resolve_session_tools(config)) is config
+    assert asyncio.run(resolve_session_tools({})) == {}
@@ -0,0 +1,91 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from gemini.vad import FRAME_MS, INPUT_SAMPLE_RATE, VoiceActivityGate  # noqa: E402
+
+FRAME = INPUT_SAMPLE_RATE * FRAME_MS // 1000
+
+
+def tone(frames, amplitude=0.2, hz=200.0):
+    t = np.arange(frames * FRAME) / INPUT_SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * hz * t) * 32767).astype("<i2").tobytes()
+
+
+def silence(frames):
+    return bytes(frames * FRAME * 2)
+
+
+def run(gate, *chunks):
+    events = []
+    now = 0.0
+    for chunk in chunks:
+        events.extend(gate.process(chunk, now=now))
+        now += len(chunk) / 2 / INPUT_SAMPLE_RATE
+    return events
+
+
+def audio_bytes(events):
+    return sum(len(value) for event, value in events if event == "audio")
+
+
+def kinds(events):
+    return [event for event, _ in events if event != "audio"]
+
+
+def test_gate_drops_silence_and_signals_utterance():
+    gate = VoiceActivityGate("gate", hangover_ms=100, pre_roll_ms=40)
+    events = run(gate, silence(50), tone(20), silence(50))
+    assert kinds(events) == ["activity_start", "activity_end"]
+    # Speech, the pre-roll and the hangover; nothing else
+    assert audio_bytes(events) == (20 + 2 + 5) * FRAME * 2
+    assert gate.utterances == 1
+    assert gate.forwarded + gate.dropped == gate.frames == 120
+
+
+def test_audio_is_ordered_around_activity_events():
+    gate = VoiceActivityGate("gate", hangover_ms=100, pre_roll_ms=0)
+    events = run(gate, tone(10) + silence(10))
+    order = [event for event, _ in events]
+    assert order == ["activity_start", "audio", "activity_end"]
+
+
+def test_thin_keeps_some_silence():
+    gate = VoiceActivityGate("thin", silence_keep=5)
+    events = run(gate, silence(100))
+    assert audio_bytes(events) == 20 * FRAME * 2
+    assert kinds(events) == []
+
+
+def test_partial_frames_are_carried():
+    gate = VoiceActivityGate("gate", hangover_ms=100, pre_roll_ms=0)
+    speech = tone(10)
+    events = run(gate, speech[:333], speech[333:1001], speech[1001:])
+    assert kinds(events) == ["activity_start"]
+    assert audio_bytes(events) == len(speech)
+
+
+def test_short_pauses_stay_in_the_utterance():
+    gate = VoiceActivityGate("gate", hangover_ms=200)
+    events = run(gate, tone(10), silence(5), tone(10), silence(20))
+    assert kinds(events) == ["activity_start", "activity_end"]
+
+
+def test_quiet_signal_below_threshold_is_not_speech():
+    gate = VoiceActivityGate("gate", threshold_db=-45)
+    events = run(gate, tone(20, amplitude=0.001))
+    assert kinds(events) == []
+    assert audio_bytes(events) == 0
+
+
+def test_spectral_check_rejects_hiss():
+    rng = np.random.default_rng(1)
+    hiss = (rng.normal(0, 0.2, 30 * FRAME) * 32767).clip(-32768, 32767).astype("<i2")
+    # Keep only content well above the speech band
+    spectrum = np.fft.rfft(hiss)
+    spectrum[np.fft.rfftfreq(hiss.size, 1 / INPUT_SAMPLE_RATE) < 6000] = 0
+    hiss = np.fft.irfft(spectrum, hiss.size).astype("<i2").tobytes()
+
+    assert kinds(run(VoiceActivityGate("gate"), hiss)) == ["activity_start"]
+    assert kinds(run(VoiceActivityGate("gate", spectral=True), hiss)) == []
+    assert kinds(run(VoiceActivityGate("gate", spectral=True), tone(20))) == ["activity_start"]
@@ -0,0 +1,96 @@
+import asyncio
+import base64
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.queues import RelayQueue
+from gemini import codecs
+from gemini.frames import parse_frame
+from routes import websocket
+from routes.websocket import forward_audio, handle_function_calls
+
+PCM = base64.b64encode(b"\x00\x10" * 480).decode("ascii")
+
+
+@pytest.mark.skipif(not codecs.has_numpy, reason="mu-law needs numpy")
+def test_forward_audio_drops_chunks_at_another_rate():
+    executor = ThreadPoolExecutor(max_workers=1)
+    encoder = codecs.DownstreamEncoder(codecs.create_encoder("mulaw", 24000), executor)
+    downstream = RelayQueue("test")
+
+    async def scenario():
+        await forward_audio(downstream, PCM, 16000, False, encoder)
+        await forward_audio(downstream, PCM, 24000, False, encoder)
+        return len(downstream), await downstream.get()
+
+    try:
+        queued, (kind, frame) = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert queued == 1
+    assert kind == "audio"
+    assert parse_frame(frame).sample_rate == 24000
+    assert encoder.bytes_in == 960
+
+
+def test_forward_audio_binary_frame_carries_the_message_rate():
+    downstream = RelayQueue("test")
+
+    async def scenario():
+        await forward_audio(downstream, PCM, 16000, True, None)
+        return await downstream.get()
+
+    _, frame = asyncio.run(scenario())
+    assert parse_frame(frame).sample_rate == 16000
+
+
+class FakeExecutor:
+    """Stands in for the Composio thread pool; tools finish in reverse order."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.active = 0
+        self.max_active = 0
+
+    async def run(self, tool_name, func, *args):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays[tool_name])
+            return {"tool": tool_name, "params": args[1]}
+        finally:
+            self.active -= 1
+
+
+class FakeComposio:
+    def execute_tool(self, tool_name, params):
+        raise AssertionError("the executor runs tools")
+
+
+class FakeGemini:
+    async def send_function_responses(self, responses):
+        pass
+
+
+def test_function_calls_run_concurrently_and_respond_in_order(monkeypatch):
+    names = [f"GITHUB_TOOL_{index}" for index in range(5)]
+    executor = FakeExecutor({name: 0.05 - 0.01 * index for index, name in enumerate(names)})
+    monkeypatch.setattr(websocket, "tool_executor", executor)
+    monkeypatch.setattr(websocket, "get_composio_client", FakeComposio)
+    monkeypatch.setattr(websocket, "has_composio", True)
+    gemini = FakeGemini()
+    calls = [{"name": name, "args": {"n": index}, "id": f"call-{index}"} for index, name in enumerate(names)]
+    del calls[2]["id"]
+
+    async def scenario():
+        upstream, downstream = RelayQueue("upstream"), RelayQueue("downstream")
+        await handle_function_calls(gemini, upstream, downstream, "client-1", calls, asyncio.Semaphore(3))
+        return len(upstream), await upstream.get()
+
+    queued, (kind, (send, responses)) = asyncio.run(scenario())
+    assert executor.max_active == 3
+    assert (queued, kind, send) == (1, "tool", gemini.send_function_responses)
+    assert [response["name"] for response in responses] == names
+    assert [response.get("id") for response in responses] == ["call-0", "call-1", None, "call-3", "call-4"]
+    assert [response["response"]["content"]["params"] for response in responses] == [{"n": index} for index in range(5)]
@@ -1,8 +1,33 @@
+// G.711 mu-law to 16-bit PCM, one entry per byte value
+const MULAW_TABLE = new Int16Array(256);
+for (let i = 0; i < 256; i++) {
+  const u = ~i & 0xFF;
+  let t = ((u & 0x0F) << 3) + 0x84;
+  t <<= (u & 0x70) >> 4;
+  MULAW_TABLE[i] = (u & 0x80) ? (0x84 - t) : (t - 0x84);
+}
+
 /**
  * Audio Manager class
  * Handles audio capture from microphone and playback of received audio
  */
 export class AudioManager {
+    /**
+     * Downstream audio codecs to request, most preferred first. Compressed
+     * audio is opt-in: codecs are only listed when the page URL has
+     * ?audioCodecs=opus,mulaw or localStorage has an 'audioCodecs' entry,
+     * and only those this browser can decode.
+     * @returns {string[]} - Codec names for the config's audioCodecs list
+     */
+    static supportedCodecs() {
+      const wanted = new URLSearchParams(window.location.search).get('audioCodecs')
+        || window.localStorage.getItem('audioCodecs')
+        || '';
+      return wanted.split(',')
+        .map(codec => codec.trim().toLowerCase())
+        .filter(codec => codec === 'mulaw' || (codec === 'opus' && typeof AudioDecoder !== 'undefined'));
+    }
+    
     constructor() {
       // Audio capture
       this.captureAudioContext = null;
@@ -15,11 +40,15 @@ export class AudioManager {
       // Audio playback
       this.audioBufferQueue = [];
       this.isPlaying = false;
+      
+      // WebCodecs decoder for Opus downstream audio, created on first use
+      this.opusDecoder = null;
+      this.opusTimestamp = 0;
     }
     
     /**
      * Start audio capture from microphone
-     * @param {Function} onAudioData - Callback for captured audio data
+     * @param {Function} onAudioData - Callback for captured 16 kHz PCM16 chunks (Int16Array)
      * @returns {Promise} - Resolves when audio capture is initialized
      */
     async startCapture(onAudioData) {
@@ -46,13 +75,12 @@ export class AudioManager {
           // Get audio samples as Float32Array (-1.0 to 1.0)
           const floatSamples = event.inputBuffer.getChannelData(0);
           
-          // Convert to PCM 16-bit and send base64 encoded data
+          // Convert to PCM 16-bit; the WebSocket client sends it as a binary frame
           const pcm16 = this.float32ToPcm16(floatSamples);
-          const base64Audio = this.pcm16ToBase64(pcm16);
           
           // Send data through callback
           if (this.onAudioData) {
-            this.onAudioData(base64Audio);
+            this.onAudioData(pcm16);
           }
         };
         
@@ -98,6 +126,11 @@ export class AudioManager {
         this.mediaStream = null;
       }
       
+      if (this.opusDecoder && this.opusDecoder.state !== 'closed') {
+        this.opusDecoder.close();
+      }
+      this.opusDecoder = null;
+      
       // Clear queues
       this.audioBufferQueue = [];
       this.isPlaying = false;
@@ -109,8 +142,69 @@ export class AudioManager {
      */
     playAudio(base64Audio) {
       // Convert base64 to float32 audio data
-      const audioData = this.base64ToFloat32Array(base64Audio);
+      this.queueAudio(this.base64ToFloat32Array(base64Audio));
+    }
+    
+    /**
+     * Play received audio delivered as a binary PCM frame
+     * @param {Int16Array} pcm16 - 24 kHz mono 16-bit PCM samples from Gemini
+     */
+    playPcm16(pcm16) {
+      const float32 = new Float32Array(pcm16.length);
+      for (let i = 0; i < pcm16.length; i++) {
+        float32[i] = pcm16[i] / 32768.0;
+      }
+      this.queueAudio(float32);
+    }
+    
+    /**
+     * Play received audio delivered as a mu-law frame
+     * @param {Uint8Array} mulaw - 8-bit G.711 mu-law samples
+     */
+    playMulaw(mulaw) {
+      const float32 = new Float32Array(mulaw.length);
+      for (let i = 0; i < mulaw.length; i++) {
+        float32[i] = MULAW_TABLE[mulaw[i]] / 32768.0;
+      }
+      this.queueAudio(float32);
+    }
+    
+    /**
+     * Play received audio delivered as Opus packets (decoded with WebCodecs)
+     * @param {Uint8Array[]} packets - 20 ms Opus packets
+     * @param {number} sampleRate - Sample rate the audio was encoded at
+     */
+    playOpus(packets, sampleRate) {
+      if (!this.opusDecoder || this.opusDecoder.state === 'closed') {
+        this.opusDecoder = new AudioDecoder({
+          output: (audioData) => {
+            const float32 = new Float32Array(audioData.numberOfFrames);
+            audioData.copyTo(float32, { planeIndex: 0, format: 'f32-planar' });
+            audioData.close();
+            this.queueAudio(float32);
+          },
+          error: (error) => console.error('Opus decode error:', error)
+        });
+        this.opusDecoder.configure({ codec: 'opus', sampleRate: sampleRate, numberOfChannels: 1 });
+      }
       
+      for (const packet of packets) {
+        this.opusDecoder.decode(new EncodedAudioChunk({
+          type: 'key',
+          timestamp: this.opusTimestamp,
+          data: packet
+        }));
+        // 20 ms per packet, in microseconds
+        this.opusTimestamp += 20000;
+      }
+    }
+    
+    /**
+     * Queue decoded samples for continuous playback
+     * @param {Float32Array} audioData - Audio samples (-1.0 to 1.0)
+     * @private
+     */
+    queueAudio(audioData) {
       // Add to playback queue
       this.audioBufferQueue.push(audioData);
       
@@ -142,28 +142,16 @@ function initializeConnectionButtons(composioClient) {
 
 /**
  * Add Composio tools to the Gemini client
+ * Only the app names are sent; the backend resolves them to tool schemas
+ * from its own cache, so the config stays small.
  * @param {Object} geminiConfig - Gemini configuration object
  * @param {string[]} apps - List of app names to get tools for
  * @returns {Promise<Object>} - Updated Gemini configuration
  */
 export async function addComposioToolsToGemini(geminiConfig, apps = ['gmail']) {
-  try {
-    const composioClient = new ComposioClient();
-    const tools = await composioClient.getTools(apps.join(','));
-    
-    if (tools && tools.length > 0) {
-      // Add Composio tools to Gemini config
-      if (!geminiConfig.tools) {
-        geminiConfig.tools = [];
-      }
-      
-      geminiConfig.tools.push(...tools);
-      console.log('Added Composio tools to Gemini config:', tools);
-    }
-    
-    return geminiConfig;
-  } catch (error) {
-    console.error('Failed to add Composio tools to Gemini:', error);
-    return geminiConfig;
-  }
+  const toolApps = new Set(geminiConfig.toolApps || []);
+  apps.forEach(app => toolApps.add(app));
+  geminiConfig.toolApps = [...toolApps];
+  console.log('Requested Composio tools for apps:', geminiConfig.toolApps);
+  return geminiConfig;
 }
\ No newline at end of file
@@ -169,7 +169,19 @@ class GeminiApp {
   handleWebSocketMessage(response) {
     switch (response.type) {
       case 'audio':
-        this.audioManager.playAudio(response.data);
+        if (response.pcm) {
+          this.audioManager.playPcm16(response.pcm);
+        } else if (response.mulaw) {
+          this.audioManager.playMulaw(response.mulaw);
+        } else if (response.opus) {
+          this.audioManager.playOpus(response.opus, response.sampleRate);
+        } else {
+          this.audioManager.playAudio(response.data);
+        }
+        break;
+        
+      case 'audio_format':
+        console.log(`Receiving ${response.codec} audio at ${response.sampleRate} Hz`);
         break;
         
       case 'text':
@@ -180,6 +192,17 @@ class GeminiApp {
         console.log('Gemini turn complete');
         break;
         
+      case 'gemini_status':
+        // The server lost its Gemini connection and is re-establishing it
+        if (response.status === 'reconnecting') {
+          this.uiController.appendMessage('Connection to Gemini interrupted, reconnecting...');
+        } else if (response.status === 'reconnected') {
+          this.uiController.appendMessage('Reconnected to Gemini.');
+        } else if (response.status === 'failed') {
+          this.uiController.showError('Could not reconnect to Gemini. Please restart the session.');
+        }
+        break;
+        
       case 'tool_call':
         // Handle Composio tool call
         this.handleComposioToolCall(response.data);
@@ -1,3 +1,5 @@
+import { AudioManager } from './audio-manager.js';
+
 /**
  * UI Controller class
  * Handles all UI updates and user interactions
@@ -71,7 +73,11 @@ export class UIController {
           strict: structuredOutputStrict
         },
         // Include the current mode so the backend knows which multimodal input is active
-        currentMode: currentMode
+        currentMode: currentMode,
+        // Receive model audio as binary PCM frames instead of base64 JSON
+        binaryAudio: true,
+        // Compressed downstream audio if the user opted in; empty keeps PCM
+        audioCodecs: AudioManager.supportedCodecs()
       };
       // The backend will use currentMode to decide whether to request audio output from Gemini.
       return config;
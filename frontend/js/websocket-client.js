@@ -2,6 +2,16 @@
  * WebSocket client for communicating with the Gemini backend
  * Handles connection setup, data transmission, and event handling
  */
+
+// Binary frame header (see backend/gemini/frames.py):
+// kind (u8), version (u8), sample rate in Hz (u16, little-endian)
+const FRAME_HEADER_SIZE = 4;
+const FRAME_VERSION = 1;
+const FRAME_AUDIO_PCM16 = 0x01;
+const FRAME_AUDIO_MULAW = 0x02;
+const FRAME_AUDIO_OPUS = 0x03;
+const MIC_SAMPLE_RATE = 16000;
+
 export class WebSocketClient {
     constructor() {
       this.websocket = null;
@@ -44,6 +54,7 @@ export class WebSocketClient {
         
         console.log("Connecting to WebSocket:", wsUrl);
         this.websocket = new WebSocket(wsUrl);
+        this.websocket.binaryType = 'arraybuffer';
         
         this.websocket.onopen = () => {
           console.log("WebSocket connection established");
@@ -58,8 +69,10 @@ export class WebSocketClient {
         };
         
         this.websocket.onmessage = (event) => {
-          const response = JSON.parse(event.data);
-          if (this.callbacks.onMessage) {
+          const response = event.data instanceof ArrayBuffer
+            ? this.parseBinaryFrame(event.data)
+            : JSON.parse(event.data);
+          if (response && this.callbacks.onMessage) {
             this.callbacks.onMessage(response);
           }
         };
@@ -90,16 +103,69 @@ export class WebSocketClient {
     }
     
     /**
-     * Send audio data to the server
-     * @param {string} base64Audio - Base64 encoded audio data
+     * Send audio data to the server as a binary PCM16 frame
+     * @param {Int16Array} pcm16 - 16 kHz mono 16-bit PCM samples
      */
-    sendAudio(base64Audio) {
+    sendAudio(pcm16) {
       if (!this.isConnected()) return;
       
-      this.websocket.send(JSON.stringify({
-        type: 'audio',
-        data: base64Audio
-      }));
+      const frame = new Uint8Array(FRAME_HEADER_SIZE + pcm16.byteLength);
+      const header = new DataView(frame.buffer);
+      header.setUint8(0, FRAME_AUDIO_PCM16);
+      header.setUint8(1, FRAME_VERSION);
+      header.setUint16(2, MIC_SAMPLE_RATE, true);
+      frame.set(new Uint8Array(pcm16.buffer, pcm16.byteOffset, pcm16.byteLength), FRAME_HEADER_SIZE);
+      
+      this.websocket.send(frame.buffer);
+    }
+    
+    /**
+     * Decode a binary frame from the server
+     * @param {ArrayBuffer} buffer - Frame header followed by the payload
+     * @returns {Object|null} - {type: 'audio', pcm: Int16Array, sampleRate},
+     *   {type: 'audio', mulaw: Uint8Array, sampleRate}, {type: 'audio', opus: Uint8Array[], sampleRate},
+     *   or null if unrecognized
+     */
+    parseBinaryFrame(buffer) {
+      if (buffer.byteLength < FRAME_HEADER_SIZE) return null;
+      
+      const header = new DataView(buffer, 0, FRAME_HEADER_SIZE);
+      const kind = header.getUint8(0);
+      const version = header.getUint8(1);
+      const sampleRate = header.getUint16(2, true);
+      if (version !== FRAME_VERSION) {
+        console.log('Unknown binary frame version:', version);
+        return null;
+      }
+      
+      switch (kind) {
+        case FRAME_AUDIO_PCM16:
+          return {
+            type: 'audio',
+            pcm: new Int16Array(buffer, FRAME_HEADER_SIZE, (buffer.byteLength - FRAME_HEADER_SIZE) >> 1),
+            sampleRate: sampleRate
+          };
+          
+        case FRAME_AUDIO_MULAW:
+          return { type: 'audio', mulaw: new Uint8Array(buffer, FRAME_HEADER_SIZE), sampleRate: sampleRate };
+          
+        case FRAME_AUDIO_OPUS: {
+          // Opus packets, each prefixed with a little-endian u16 length
+          const view = new DataView(buffer);
+          const packets = [];
+          let offset = FRAME_HEADER_SIZE;
+          while (offset + 2 <= buffer.byteLength) {
+            const length = view.getUint16(offset, true);
+            packets.push(new Uint8Array(buffer, offset + 2, length));
+            offset += 2 + length;
+          }
+          return { type: 'audio', opus: packets, sampleRate: sampleRate };
+        }
+          
+        default:
+          console.log('Unknown binary frame kind:', kind);
+          return null;
+      }
     }
     
     /**